@@ -0,0 +1,351 @@
+"""
+Rate limiting and load shedding for the Moduro Flask apps.
+
+Three checks run before a request reaches its handler:
+
+* a per-client token bucket for every /api/ request, plus an optional
+  per-client, per-endpoint bucket on routes decorated with limit(). An
+  empty bucket answers 429 with Retry-After.
+* a concurrency cap on expensive routes. A request waits up to `max_wait`
+  seconds for a slot and is then shed with 503 and Retry-After.
+* queue-time shedding. When a proxy stamps X-Request-Start and the request
+  has already waited longer than `max_queue_time`, it gets 503 at once
+  instead of joining a backlog whose latency has collapsed.
+
+Limiter state lives in an anonymous shared memory map created at import
+time. Under the pre-fork server (serve.py) the map is inherited by every
+worker, so buckets and concurrency counts are enforced across processes.
+Buckets live in a fixed table of slots tagged with a 64-bit hash of their
+client key. A key probes a few neighbouring slots, and the slot of a bucket
+that has refilled completely is free for reuse, so memory stays constant
+however many clients connect.
+
+Updates are serialized by a record lock on an unlinked temporary file. The
+kernel drops it when the process holding it dies, so a worker killed in the
+middle of an update cannot block the others.
+"""
+
+import functools
+import hashlib
+import inspect
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import jsonify, request
+
+try:
+    import fcntl
+except ImportError:  # No fork without it, so each process has its own state anyway
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Key hash, tokens, last refill and when the bucket is full again (monotonic seconds)
+_BUCKET = struct.Struct('Qddd')
+# Slots a key may occupy, starting at its home slot
+PROBES = 8
+
+
+class SharedLock:
+    """Mutex across forked workers that is released if its holder dies
+
+    A POSIX record lock belongs to the process holding it and goes away with
+    that process, unlike a multiprocessing.Lock. It does not exclude threads
+    of one process, so a thread lock is taken first.
+    """
+
+    def __init__(self):
+        self._threads = threading.Lock()
+        self._file = tempfile.TemporaryFile() if fcntl is not None else None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Another thread of the parent may have held it at the fork
+        self._threads = threading.Lock()
+
+    def __enter__(self):
+        self._threads.acquire()
+        if self._file is not None:
+            try:
+                fcntl.lockf(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                self._threads.release()
+                raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is not None:
+            fcntl.lockf(self._file.fileno(), fcntl.LOCK_UN)
+        self._threads.release()
+        return False
+
+
+def key_hash(key: str) -> int:
+    """Nonzero 64-bit hash of a bucket key; zero marks an empty slot"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+class SharedLimiterState:
+    """Token buckets and per-worker in-flight counters in shared memory
+
+    Each worker process claims a row of the in-flight table, tagged with its
+    PID. When a route looks full, rows of dead workers are reclaimed, so a
+    crashed worker cannot leak concurrency slots.
+    """
+
+    def __init__(self, bucket_slots: int = 16384, max_workers: int = 64, max_routes: int = 16):
+        self.bucket_slots = bucket_slots
+        self.max_workers = max_workers
+        self.max_routes = max_routes
+        self._row = struct.Struct(f'q{max_routes}q')  # pid, in-flight per route
+        self._workers_offset = bucket_slots * _BUCKET.size
+        self._map = mmap.mmap(-1, self._workers_offset + max_workers * self._row.size)
+        self._lock = SharedLock()
+        self._my_row = None
+        self._my_pid = None
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        """Take one token; returns 0 if allowed, else seconds until one is available"""
+        tag = key_hash(key)
+        with self._lock:
+            now = time.monotonic()
+            offset, tokens, updated = self._find(tag, now)
+            tokens = burst if updated == 0 else min(burst, tokens + (now - updated) * rate)
+            taken = tokens >= 1
+            if taken:
+                tokens -= 1
+            _BUCKET.pack_into(self._map, offset, tag, tokens, now, now + (burst - tokens) / rate)
+        return 0.0 if taken else (1 - tokens) / rate
+
+    def _find(self, tag: int, now: float):
+        """Offset, tokens and last refill of the bucket for `tag`; caller holds the lock
+
+        A key without a bucket gets the first empty or refilled slot among its
+        probes, reported as a new bucket (last refill 0). If every probe is in
+        use, the bucket closest to full is replaced.
+        """
+        home = tag % self.bucket_slots
+        reusable = []
+        for i in range(PROBES):
+            offset = (home + i) % self.bucket_slots * _BUCKET.size
+            slot_tag, tokens, updated, full_at = _BUCKET.unpack_from(self._map, offset)
+            if slot_tag == tag:
+                return offset, tokens, updated
+            # Empty and refilled slots first, then the bucket closest to full
+            reusable.append((0.0 if slot_tag == 0 or full_at <= now else full_at, i, offset))
+        return min(reusable)[2], 0.0, 0.0
+
+    def _rows(self):
+        for index in range(self.max_workers):
+            offset = self._workers_offset + index * self._row.size
+            yield offset, self._row.unpack_from(self._map, offset)
+
+    def _claim_row(self) -> int:
+        """Offset of this process's row; caller holds the lock"""
+        pid = os.getpid()
+        if self._my_pid == pid:
+            return self._my_row
+        for offset, row in self._rows():
+            if row[0] == 0 or not _pid_alive(row[0]):
+                self._row.pack_into(self._map, offset, pid, *([0] * self.max_routes))
+                self._my_row, self._my_pid = offset, pid
+                return offset
+        raise RuntimeError('No free worker slot in the shared limiter state')
+
+    def _in_flight(self, route: int) -> int:
+        return sum(row[1 + route] for _, row in self._rows() if row[0])
+
+    def acquire(self, route: int, limit: int) -> bool:
+        """Claim a concurrency slot on `route` if fewer than `limit` are in use"""
+        with self._lock:
+            own = self._claim_row()
+            if self._in_flight(route) >= limit:
+                self._reap_dead_rows()
+                if self._in_flight(route) >= limit:
+                    return False
+            self._add(own, route, 1)
+            return True
+
+    def release(self, route: int):
+        with self._lock:
+            self._add(self._claim_row(), route, -1)
+
+    def _add(self, offset: int, route: int, delta: int):
+        field = offset + struct.calcsize('q') * (1 + route)
+        (value,) = struct.unpack_from('q', self._map, field)
+        struct.pack_into('q', self._map, field, max(0, value + delta))
+
+    def _reap_dead_rows(self):
+        for offset, row in self._rows():
+            if row[0] and not _pid_alive(row[0]):
+                self._row.pack_into(self._map, offset, 0, *([0] * self.max_routes))
+
+    def in_flight(self) -> Dict[int, int]:
+        with self._lock:
+            return {route: self._in_flight(route) for route in range(self.max_routes)}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _reject(status: int, message: str, retry_after: float):
+    response = jsonify({'error': message, 'retry_after': round(retry_after, 3)})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class AdmissionController:
+    """Applies the per-client bucket, route limits and queue-time shedding"""
+
+    def __init__(self, client_rate: float = 20.0, client_burst: float = 40.0,
+                 max_queue_time: float = 2.0, trust_proxy: bool = False,
+                 state: Optional[SharedLimiterState] = None):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_queue_time = max_queue_time
+        self.trust_proxy = trust_proxy
+        self.state = state or SharedLimiterState()
+        self._routes: Dict[str, int] = {}
+        # Per-process counters; the limits themselves are shared
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    def client_id(self) -> str:
+        if self.trust_proxy:
+            forwarded = request.headers.get('X-Forwarded-For', '')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return request.remote_addr or 'unknown'
+
+    def queue_time(self) -> Optional[float]:
+        """Seconds since the proxy's X-Request-Start stamp (t=<sec|ms|us>)"""
+        header = request.headers.get('X-Request-Start')
+        if not header:
+            return None
+        try:
+            stamp = float(header.strip().lstrip('t='))
+        except ValueError:
+            return None
+        # Proxies send seconds, milliseconds or microseconds since the epoch
+        while stamp > 1e11:
+            stamp /= 1000.0
+        return max(0.0, time.time() - stamp)
+
+    def init_app(self, app):
+        @app.before_request
+        def _admit():
+            if not request.path.startswith('/api/'):
+                return None
+            waited = self.queue_time()
+            if waited is not None and self.max_queue_time and waited > self.max_queue_time:
+                self.shed += 1
+                logger.warning("Shedding %s %s after %.2fs in the proxy queue", request.method, request.path, waited)
+                return _reject(503, 'Server busy', 1.0)
+            retry_after = self.state.take(f"client:{self.client_id()}", self.client_rate, self.client_burst)
+            if retry_after:
+                self.rate_limited += 1
+                return _reject(429, 'Rate limit exceeded', retry_after)
+            self.admitted += 1
+            return None
+
+    def limit(self, rate: Optional[float] = None, burst: Optional[float] = None,
+              max_concurrent: Optional[int] = None, max_wait: float = 2.0):
+        """Decorator adding a per-client bucket and/or a concurrency cap to a view"""
+        def decorator(view):
+            route = None
+            if max_concurrent:
+                if len(self._routes) >= self.state.max_routes:
+                    raise ValueError('Too many concurrency-limited routes')
+                route = self._routes.setdefault(view.__name__, len(self._routes))
+
+            def check_rate():
+                if rate is None:
+                    return None
+                key = f"route:{view.__name__}:{self.client_id()}"
+                retry_after = self.state.take(key, rate, burst or rate)
+                if retry_after:
+                    self.rate_limited += 1
+                    return _reject(429, 'Rate limit exceeded', retry_after)
+                return None
+
+            def shed():
+                self.shed += 1
+                logger.warning("Shedding %s: %d requests in flight for %.1fs", view.__name__, max_concurrent, max_wait)
+                return _reject(503, 'Server busy', max_wait or 1.0)
+
+            if inspect.iscoroutinefunction(view):
+                @functools.wraps(view)
+                async def async_wrapper(*args, **kwargs):
+                    rejected = check_rate()
+                    if rejected is not None:
+                        return rejected
+                    if route is None:
+                        return await view(*args, **kwargs)
+                    # Already loaded by the running event loop
+                    import asyncio
+                    deadline = time.monotonic() + max_wait
+                    while not self.state.acquire(route, max_concurrent):
+                        if time.monotonic() >= deadline:
+                            return shed()
+                        await asyncio.sleep(0.02)
+                    try:
+                        return await view(*args, **kwargs)
+                    finally:
+                        self.state.release(route)
+                return async_wrapper
+
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                rejected = check_rate()
+                if rejected is not None:
+                    return rejected
+                if route is None:
+                    return view(*args, **kwargs)
+                deadline = time.monotonic() + max_wait
+                while not self.state.acquire(route, max_concurrent):
+                    if time.monotonic() >= deadline:
+                        return shed()
+                    time.sleep(0.02)
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    self.state.release(route)
+            return wrapper
+        return decorator
+
+    def get_metrics(self) -> Dict:
+        in_flight = self.state.in_flight()
+        return {
+            'admitted': self.admitted,
+            'rate_limited': self.rate_limited,
+            'shed': self.shed,
+            'in_flight': {name: in_flight[route] for name, route in self._routes.items()}
+        }
+
+
+def controller_from_env() -> AdmissionController:
+    """AdmissionController configured by MODURO_RATE_LIMIT, MODURO_RATE_BURST,
+    MODURO_MAX_QUEUE_MS and MODURO_TRUST_PROXY"""
+    return AdmissionController(
+        client_rate=float(os.environ.get('MODURO_RATE_LIMIT', 20)),
+        client_burst=float(os.environ.get('MODURO_RATE_BURST', 40)),
+        max_queue_time=float(os.environ.get('MODURO_MAX_QUEUE_MS', 2000)) / 1000.0,
+        trust_proxy=os.environ.get('MODURO_TRUST_PROXY', '').lower() in ('1', 'true', 'yes')
+    )
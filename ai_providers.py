@@ -0,0 +1,538 @@
+"""
+Execution layer for the SEO tool's AI providers.
+
+A ProviderPool calls named providers, which are async functions from a page's
+site_data to an analysis dict ({'score', 'recommendations',
+'technical_issues'}), in one of three modes:
+
+* single: the first provider in order. If it fails, the next one is tried.
+* hedged: the first provider, and the next one as well if the first has not
+  answered within its own p95 latency. The first good answer wins and the
+  other call is cancelled. A slow outlier then costs about p95 plus the
+  backup's latency instead of its full tail, for about 5% extra calls.
+* ensemble: all providers at once. Once a majority has answered, the others
+  get until their own p95 latency and are then cut off. Scores are averaged,
+  and recommendations and issues are merged, ranked by how many providers
+  agree on them.
+
+Each provider's call latencies go into a histogram of fixed log-spaced buckets
+(constant memory). A call that is cut off counts with the time it had taken.
+The hedge delays and the reported quantiles are estimated from it. Until a
+provider has `min_samples` calls, its hedge delay is the configured default.
+
+Which provider goes first is up to a RoutingPolicy. The adaptive strategy
+keeps a rolling (exponentially weighted) latency and error rate per provider.
+It ranks the providers by expected time to a good answer, latency / (1 - error
+rate), plus a cost term. Now and then it leads with another provider, picked
+by inverse score, so that every estimate stays fresh. Only a hedged call
+explores freely, as its backup covers a slow lead; a single-mode call only
+explores providers within `explore_ratio` of the best score. The static strategy
+keeps the configured order. With either strategy, a provider that fails
+`max_failures` times in a row is ejected for `ejection_time` seconds. Ejected
+providers are only tried after all the others, and a single failure after the
+cool-down ejects them again.
+
+StubProvider answers locally from the page's own data after a configurable
+delay. It needs no network access, so tests and benchmarks can use it.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODES = ('single', 'hedged', 'ensemble')
+
+Provider = Callable[[Dict], Awaitable[Dict]]
+
+
+class LatencyHistogram:
+    """Latencies in log-spaced buckets; quantiles are interpolated within a bucket"""
+
+    def __init__(self, low: float = 0.001, high: float = 120.0, growth: float = 1.25):
+        bounds = [low]
+        while bounds[-1] * growth < high:
+            bounds.append(bounds[-1] * growth)
+        bounds.append(high)
+        self.bounds = bounds  # upper bounds in seconds; the last bucket is open-ended
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        index = bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+                return lower + (max(upper, lower) - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def to_dict(self) -> Dict:
+        def ms(seconds):
+            return round(seconds * 1000, 2) if seconds is not None else None
+
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.total / self.count) if self.count else None,
+            'p50_ms': ms(self.quantile(0.5)),
+            'p95_ms': ms(self.quantile(0.95)),
+            'p99_ms': ms(self.quantile(0.99)),
+            'max_ms': ms(self.max) if self.count else None,
+            # [upper bound in ms (None: open-ended), count] of the non-empty buckets
+            'buckets': [[ms(self.bounds[i]) if i < len(self.bounds) else None, count]
+                        for i, count in enumerate(self.counts) if count]
+        }
+
+
+class ProviderStats:
+    """Per-provider counters and latency histogram exported through get_metrics()"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'successes': self.successes,
+            'failures': self.failures,
+            'cancelled': self.cancelled,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'latency': self.latency.to_dict()
+        }
+
+
+class ProviderPool:
+    """Runs named providers in single, hedged or ensemble mode"""
+
+    def __init__(self, providers: Dict[str, Provider], timeout: float = 20.0, hedge_quantile: float = 0.95,
+                 hedge_delay: float = 2.0, min_samples: int = 20, policy: Optional['RoutingPolicy'] = None):
+        if not providers:
+            raise ValueError('At least one AI provider is required')
+        self.providers = dict(providers)
+        self.order = list(providers)
+        self.policy = policy or RoutingPolicy(self.order, strategy='static')
+        self.timeout = timeout
+        self.hedge_quantile = hedge_quantile
+        self.default_hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.stats = {name: ProviderStats() for name in self.order}
+        self.calls = dict.fromkeys(MODES, 0)
+
+    def hedge_delay(self, name: str) -> float:
+        """How long to wait for `name` before backing it up: its observed p95"""
+        latency = self.stats[name].latency
+        if latency.count < self.min_samples:
+            return self.default_hedge_delay
+        return latency.quantile(self.hedge_quantile)
+
+    async def analyze(self, site_data: Dict, mode: str = 'hedged', providers: Optional[Sequence[str]] = None) -> Dict:
+        """Analysis of one page; its 'ai' entry says which providers answered and how
+
+        `providers` picks and orders the providers for this call; by default
+        the routing policy orders all of them.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown AI mode {mode!r}; expected one of {', '.join(MODES)}")
+        order = list(providers) if providers else self.policy.order(self.order, hedged=(mode != 'single'))
+        unknown = [name for name in order if name not in self.providers]
+        if unknown:
+            raise ValueError(f"Unknown AI providers: {', '.join(unknown)}")
+        self.calls[mode] += 1
+        start = time.perf_counter()
+        if mode == 'ensemble':
+            analysis, meta = await self._ensemble(site_data, order)
+        else:
+            analysis, meta = await self._first(site_data, order, hedge=(mode == 'hedged'))
+        analysis = dict(analysis)
+        analysis['ai'] = {'mode': mode, **meta, 'elapsed': round(time.perf_counter() - start, 4)}
+        return analysis
+
+    async def _call(self, name: str, site_data: Dict) -> Dict:
+        stats = self.stats[name]
+        stats.requests += 1
+        self.policy.started(name)
+        outcome = 'error'
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self.providers[name](site_data), self.timeout)
+            outcome = 'ok'
+            stats.successes += 1
+            return result
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            stats.cancelled += 1
+            raise
+        except Exception as e:
+            stats.failures += 1
+            logger.warning("AI provider %s failed: %s", name, e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if outcome != 'error':
+                # A call cut off here took at least this long. Leaving it out would
+                # pull p95 down with every cut-off, and cut off ever more calls.
+                stats.latency.record(elapsed)
+            self.policy.finished(name, elapsed, outcome)
+
+    async def _first(self, site_data: Dict, order: List[str], hedge: bool) -> Tuple[Dict, Dict]:
+        """First good answer, trying providers in order; one backup call when hedging"""
+        remaining = list(order)
+        pending: Dict[asyncio.Future, str] = {}
+        failed: List[str] = []
+        error: Optional[BaseException] = None
+        hedged = False
+
+        def launch() -> str:
+            name = remaining.pop(0)
+            pending[asyncio.ensure_future(self._call(name, site_data))] = name
+            return name
+
+        primary = launch()
+        try:
+            while pending:
+                can_hedge = hedge and not hedged and remaining
+                done, _ = await asyncio.wait(pending, timeout=self.hedge_delay(primary) if can_hedge else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The primary is slower than its p95: back it up
+                    backup = launch()
+                    self.stats[backup].hedges += 1
+                    hedged = True
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        if name != primary:
+                            self.stats[name].hedge_wins += 1
+                        return task.result(), {'providers': [name], 'hedged': hedged, 'failed': failed}
+                    failed.append(name)
+                    error = task.exception()
+                if not pending and remaining:
+                    # Fail over; the next provider becomes the primary
+                    primary = launch()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _ensemble(self, site_data: Dict, order: List[str]) -> Tuple[Dict, Dict]:
+        """All providers at once, merged; stragglers are cut off at their p95 once a majority answered"""
+        # Ejected providers only join when none is healthy
+        order = [name for name in order if self.policy.healthy(name)] or order
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        quorum = len(order) // 2 + 1
+        pending = {asyncio.ensure_future(self._call(name, site_data)): name for name in order}
+        deadlines = {task: start + self.hedge_delay(name) for task, name in pending.items()}
+        answers: List[Tuple[str, Dict]] = []
+        failed: List[str] = []
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = None
+                if len(answers) >= quorum:
+                    timeout = max(0.0, max(deadlines[task] for task in pending) - loop.time())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        answers.append((name, task.result()))
+                    else:
+                        failed.append(name)
+                        error = task.exception()
+            skipped = [pending[task] for task in pending]
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        if not answers:
+            raise error
+        # Merge in configured order, whichever provider answered first
+        answers.sort(key=lambda answer: order.index(answer[0]))
+        return merge_analyses([analysis for _, analysis in answers]), {
+            'providers': [name for name, _ in answers], 'failed': failed, 'skipped': skipped}
+
+    def get_metrics(self) -> Dict:
+        return {
+            'order': self.order,
+            'routing': self.policy.strategy,
+            'calls': dict(self.calls),
+            'providers': {
+                name: {**stats.to_dict(), 'hedge_delay_ms': round(self.hedge_delay(name) * 1000, 2)}
+                for name, stats in self.stats.items()
+            }
+        }
+
+
+class ProviderRoute:
+    """Rolling latency, error rate and health of one provider"""
+
+    def __init__(self, name: str, cost: float = 0.0, latency_alpha: float = 0.2, error_alpha: float = 0.1):
+        self.name = name
+        self.cost = cost
+        self.latency_alpha = latency_alpha
+        self.error_alpha = error_alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.picks = 0
+        self.explorations = 0
+        self.spent = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def expected_latency(self) -> Optional[float]:
+        """Time to a good answer if failed calls were retried here"""
+        if self.latency is None:
+            return None
+        return self.latency / (1.0 - min(self.error_rate, 0.95))
+
+    def to_dict(self) -> Dict:
+        expected = self.expected_latency()
+        return {
+            'healthy': self.healthy,
+            'latency_ms': round(self.latency * 1000, 2) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 4),
+            'expected_latency_ms': round(expected * 1000, 2) if expected is not None else None,
+            'cost': self.cost,
+            'spent': round(self.spent, 6),
+            'in_flight': self.in_flight,
+            'calls': self.calls,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'ejected_for': round(max(0.0, self.ejected_until - time.monotonic()), 1),
+            'ejections': self.ejections,
+            'picks': self.picks,
+            'explorations': self.explorations
+        }
+
+
+class RoutingPolicy:
+    """Orders the providers for each call, from their observed latency, errors and cost"""
+
+    STRATEGIES = ('adaptive', 'static')
+
+    def __init__(self, names: Sequence[str], strategy: str = 'adaptive', costs: Optional[Dict[str, float]] = None,
+                 cost_weight: float = 1.0, explore: float = 0.05, explore_ratio: float = 3.0,
+                 max_failures: int = 3, ejection_time: float = 30.0, seed: Optional[int] = None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown routing strategy {strategy!r}; expected one of {', '.join(self.STRATEGIES)}")
+        unknown = set(costs or {}) - set(names)
+        if unknown:
+            raise ValueError(f"Costs given for unknown providers: {', '.join(sorted(unknown))}")
+        self.strategy = strategy
+        self.cost_weight = cost_weight
+        self.explore = explore
+        self.explore_ratio = explore_ratio
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.routes = {name: ProviderRoute(name, (costs or {}).get(name, 0.0)) for name in names}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def score(self, route: ProviderRoute) -> float:
+        """Seconds to a good answer plus the cost in seconds; lower goes first"""
+        expected = route.expected_latency()
+        if expected is None:
+            # Unmeasured providers go first so they get measured
+            return 0.0
+        return expected + self.cost_weight * route.cost
+
+    def _ranked(self, names: Sequence[str]) -> Tuple[List[ProviderRoute], List[ProviderRoute]]:
+        routes = [self.routes[name] for name in names]
+        healthy = [route for route in routes if route.healthy]
+        ejected = sorted((route for route in routes if not route.healthy), key=lambda route: route.ejected_until)
+        if self.strategy == 'adaptive':
+            healthy.sort(key=lambda route: (self.score(route), route.in_flight))
+        return healthy, ejected
+
+    def order(self, names: Sequence[str], hedged: bool = True) -> List[str]:
+        """Providers in the order to try them for one call
+
+        Without a hedge, nothing cuts a slow first provider short, so only
+        providers scoring within `explore_ratio` of the best are explored.
+        """
+        with self._lock:
+            healthy, ejected = self._ranked(names)
+            candidates = healthy[1:]
+            if candidates and not hedged:
+                limit = self.explore_ratio * self.score(healthy[0])
+                candidates = [route for route in candidates if self.score(route) <= limit]
+            if self.strategy == 'adaptive' and candidates and self._random.random() < self.explore:
+                # Lead with another provider now and then, so its estimate stays
+                # fresh. Slower ones are explored less, so they cost little p99.
+                weights = [1.0 / max(self.score(route), 1e-3) for route in candidates]
+                route = self._random.choices(candidates, weights)[0]
+                healthy.remove(route)
+                healthy.insert(0, route)
+                route.explorations += 1
+            ordered = healthy + ejected
+            ordered[0].picks += 1
+            return [route.name for route in ordered]
+
+    def healthy(self, name: str) -> bool:
+        return self.routes[name].healthy
+
+    def started(self, name: str):
+        with self._lock:
+            route = self.routes[name]
+            route.in_flight += 1
+            route.calls += 1
+            route.spent += route.cost
+
+    def finished(self, name: str, elapsed: float, outcome: str):
+        """Record a call that ended 'ok', 'error' or 'cancelled' after `elapsed` seconds"""
+        with self._lock:
+            route = self.routes[name]
+            route.in_flight -= 1
+            # A cancelled call lost a race or was cut off: its time is a lower bound
+            if route.latency is None:
+                route.latency = elapsed
+            else:
+                route.latency += route.latency_alpha * (elapsed - route.latency)
+            if outcome == 'cancelled':
+                return
+            failed = outcome == 'error'
+            route.error_rate += route.error_alpha * (failed - route.error_rate)
+            if not failed:
+                route.consecutive_failures = 0
+                return
+            route.failures += 1
+            route.consecutive_failures += 1
+            if route.consecutive_failures >= self.max_failures and route.healthy:
+                route.ejected_until = time.monotonic() + self.ejection_time
+                route.ejections += 1
+                logger.warning("Ejecting AI provider %s for %.0fs after %d failures in a row",
+                               name, self.ejection_time, route.consecutive_failures)
+
+    def get_state(self) -> Dict:
+        with self._lock:
+            healthy, ejected = self._ranked(list(self.routes))
+            return {
+                'strategy': self.strategy,
+                'explore': self.explore,
+                'explore_ratio': self.explore_ratio,
+                'cost_weight': self.cost_weight,
+                'max_failures': self.max_failures,
+                'ejection_time': self.ejection_time,
+                'ranking': [route.name for route in healthy + ejected],
+                'providers': {
+                    name: {**route.to_dict(), 'score': round(self.score(route), 4)}
+                    for name, route in self.routes.items()
+                }
+            }
+
+
+def parse_costs(spec: str) -> Dict[str, float]:
+    """'openai=0.01,anthropic=0.015' -> {'openai': 0.01, 'anthropic': 0.015}"""
+    costs = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Expected name=cost, got {item.strip()!r}")
+        costs[name.strip()] = float(value)
+    return costs
+
+
+def merge_analyses(analyses: List[Dict]) -> Dict:
+    """Average score; recommendations and issues ranked by how many analyses name them"""
+    scores = [a['score'] for a in analyses if isinstance(a.get('score'), (int, float))]
+
+    def ranked(key: str) -> List[str]:
+        # normalized text -> [votes, (rank within its list, analysis index), first wording]
+        votes: Dict[str, list] = {}
+        for index, analysis in enumerate(analyses):
+            for rank, item in enumerate(analysis.get(key) or []):
+                entry = votes.setdefault(' '.join(str(item).lower().split()), [0, (rank, index), item])
+                entry[0] += 1
+        return [entry[2] for entry in sorted(votes.values(), key=lambda entry: (-entry[0], entry[1]))]
+
+    return {
+        'score': sum(scores) / len(scores) if scores else None,
+        'recommendations': ranked('recommendations'),
+        'technical_issues': ranked('technical_issues')
+    }
+
+
+class StubProvider:
+    """Local provider answering from the page's own data after a simulated delay
+
+    The delay is `latency` times a log-normal factor with spread `sigma`, so a
+    sigma of about 0.5-1 gives the long tail of a real API. A share of calls
+    fails with `failure_rate`.
+    """
+
+    def __init__(self, latency: float = 0.05, sigma: float = 0.0, failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.sigma = sigma
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    def delay(self) -> float:
+        if not self.sigma:
+            return self.latency
+        return self.latency * math.exp(self._random.gauss(0.0, self.sigma))
+
+    async def __call__(self, site_data: Dict) -> Dict:
+        await asyncio.sleep(self.delay())
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError('Stub provider failure')
+        meta_tags = site_data.get('meta_tags') or {}
+        findings = [
+            (not meta_tags.get('title'), 'Missing title tag', 'Add a descriptive title tag'),
+            (not meta_tags.get('description'), 'Missing meta description', 'Optimize meta descriptions'),
+            (not meta_tags.get('viewport'), 'Poor mobile responsiveness', 'Enhance mobile experience'),
+            (len(site_data.get('text_content') or '') < 300, 'Low content quality', 'Improve content quality'),
+            ((site_data.get('load_time') or 0) >= 3.0, 'Slow loading page', 'Improve page load speed'),
+            (not site_data.get('structured_data'), 'No structured data', 'Add structured data markup')
+        ]
+        found = [(issue, recommendation) for present, issue, recommendation in findings if present]
+        return {
+            'score': 100.0 - 10.0 * len(found),
+            'recommendations': [recommendation for _, recommendation in found],
+            'technical_issues': [issue for issue, _ in found]
+        }
@@ -0,0 +1,282 @@
+"""
+Cache of AI SEO analyses keyed by a fingerprint of the page's content.
+
+A page is fingerprinted with a 64-bit SimHash of weighted features: shingles
+of three words of its visible text, words of its meta tags and headings, and
+the host and path of its links. Before hashing, words with digits (dates,
+prices, counters) and very long tokens (session ids) become one placeholder,
+and query strings and fragments are dropped from links. A page that only
+differs in such details gets the same fingerprint. Small edits flip a few
+bits.
+
+A lookup returns the stored analysis of a page whose fingerprint is within
+`max_distance` bits (Hamming distance) of the page's own. The candidates are
+found through an index of the fingerprint split into `max_distance + 1`
+blocks: two fingerprints that close agree on at least one whole block.
+
+Fingerprints are only compared within a scope. The scope holds what an
+analysis depends on directly: the AI mode, status code, load-time band, which
+meta tags are present, whether there is structured data, and the title,
+numbers included. A page that gains a description or turns slow is analyzed
+again.
+
+Entries expire after `ttl` seconds. When the stored analyses exceed
+`max_bytes`, the least recently used entries are evicted.
+"""
+
+import copy
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+BITS = 64
+MASK = (1 << BITS) - 1
+
+WORD_RE = re.compile(r'[^\W_]+')
+# Replaces words with digits and tokens too long to be words
+PLACEHOLDER = '0'
+MAX_WORD = 24
+
+# Feature weights: a meta tag or heading word counts for more than running text
+TEXT_WEIGHT = 1
+META_WEIGHT = 4
+HEADING_WEIGHT = 2
+LINK_WEIGHT = 1
+
+# The default speed-score bands, in seconds
+LOAD_BANDS = (1.0, 2.0, 3.0)
+
+# Bytes per entry besides its analysis: the entry and its index keys
+ENTRY_OVERHEAD = 512
+
+# For each bit of a byte, a translation of every byte value to that bit
+_BIT_TABLES = [bytes(value >> bit & 1 for value in range(256)) for bit in range(8)]
+
+
+def normalized_words(text: str) -> List[str]:
+    """Lowercased words, volatile ones replaced; runs of placeholders collapse to one"""
+    words = [word if word.isalpha() and len(word) <= MAX_WORD else PLACEHOLDER
+             for word in WORD_RE.findall(text.lower())]
+    return [word for i, word in enumerate(words)
+            if word != PLACEHOLDER or i == 0 or words[i - 1] != PLACEHOLDER]
+
+
+def normalized_link(url: str) -> str:
+    """Words of a URL without its query string and fragment"""
+    return ' '.join(normalized_words(url.partition('#')[0].partition('?')[0]))
+
+
+def content_features(site_data: Dict) -> List[Tuple[int, List[int]]]:
+    """64-bit feature hashes of a page's text, meta tags, headings and links, by weight
+
+    Python's string hashes are used, so fingerprints are only comparable
+    within one process, which is all an in-memory cache needs.
+    """
+    words = normalized_words(site_data.get('text_content') or '')
+    if len(words) >= 3:
+        text = [hash(shingle) & MASK for shingle in zip(words, words[1:], words[2:])]
+    else:
+        text = [hash(('t', word)) & MASK for word in words]
+    meta = [hash(('m', name, word)) & MASK for name, value in (site_data.get('meta_tags') or {}).items()
+            for word in normalized_words(str(value))]
+    headings = [hash(('h', heading.get('level'), word)) & MASK for heading in site_data.get('headings') or ()
+                for word in normalized_words(heading.get('text') or '')]
+    links = [hash(('l', normalized_link(url))) & MASK for url in site_data.get('links') or ()]
+    return [(TEXT_WEIGHT, text), (META_WEIGHT, meta), (HEADING_WEIGHT, headings), (LINK_WEIGHT, links)]
+
+
+def simhash(features: List[Tuple[int, List[int]]]) -> int:
+    """SimHash of weighted feature hashes: bit i is set where the features having
+    it set outweigh those that do not"""
+    # Each hash is repeated by its weight. Per byte position, the bytes of all
+    # hashes are translated to one bit and counted, all in C.
+    packed = b''.join(array('Q', hashes).tobytes() * weight for weight, hashes in features)
+    total = len(packed) // (BITS // 8)
+    fingerprint = 0
+    for position in range(BITS // 8):
+        column = packed[position::BITS // 8]
+        for bit, table in enumerate(_BIT_TABLES):
+            if column.translate(table).count(1) * 2 > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def page_scope(site_data: Dict, *parts: str) -> str:
+    """What an analysis of the page depends on besides its content, plus `parts`"""
+    meta_tags = site_data.get('meta_tags') or {}
+    load_time = site_data.get('load_time')
+    structured_data = site_data.get('structured_data') or {}
+    return '\x1f'.join((
+        *parts,
+        str(site_data.get('status_code')),
+        'load?' if load_time is None else f'load{bisect_right(LOAD_BANDS, load_time)}',
+        ','.join(sorted(name for name, value in meta_tags.items() if value)),
+        'sd' if any(structured_data.values()) else '',
+        # Digits are kept: a title that differs in a number names another page
+        ' '.join(WORD_RE.findall(str(meta_tags.get('title') or '').lower()))
+    ))
+
+
+def page_key(site_data: Dict, *parts: str) -> Tuple[str, int]:
+    """Scope and content fingerprint of a page"""
+    return page_scope(site_data, *parts), simhash(content_features(site_data))
+
+
+def distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class CachedAnalysis:
+    """A stored analysis and what it cost to produce"""
+
+    __slots__ = ('scope', 'fingerprint', 'analysis', 'latency', 'size', 'created_at', 'hits')
+
+    def __init__(self, scope: str, fingerprint: int, analysis: Dict, latency: float, size: int):
+        self.scope = scope
+        self.fingerprint = fingerprint
+        self.analysis = analysis
+        self.latency = latency
+        self.size = size
+        self.created_at = time.monotonic()
+        self.hits = 0
+
+
+class AnalysisCache:
+    """Returns stored AI analyses for pages with the same or nearly the same content"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 86400.0, max_distance: int = 3):
+        if not 0 <= max_distance < BITS // 2:
+            raise ValueError(f"max_distance must be between 0 and {BITS // 2 - 1} bits")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_distance = max_distance
+        # Bit offsets of the index blocks; a fingerprint within max_distance
+        # bits matches at least one of max_distance + 1 blocks exactly
+        blocks = max_distance + 1
+        bounds = [round(i * BITS / blocks) for i in range(blocks + 1)]
+        self._blocks = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+
+        self._entries: 'OrderedDict[Tuple[str, int], CachedAnalysis]' = OrderedDict()
+        self._index: Dict[Tuple[str, int, int], set] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.near_hits = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+        self.time_saved = 0.0
+
+    def _block_keys(self, scope: str, fingerprint: int):
+        return [(scope, i, fingerprint >> start & mask) for i, (start, mask) in enumerate(self._blocks)]
+
+    def lookup(self, scope: str, fingerprint: int) -> Optional[Dict]:
+        """A copy of the analysis of the nearest page in the scope, or None
+
+        The copy's 'ai' entry is marked cached, with the fingerprint distance
+        and the age of the analysis.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self.lookups += 1
+            entry = self._entries.get((scope, fingerprint))
+            if entry is None:
+                candidates = set()
+                for key in self._block_keys(scope, fingerprint):
+                    candidates.update(self._index.get(key, ()))
+                bits, key = min(((distance(fingerprint, candidate), candidate) for candidate in candidates),
+                                default=(BITS, None))
+                if bits <= self.max_distance:
+                    entry = self._entries[(scope, key)]
+            if entry is None:
+                return None
+            age = time.monotonic() - entry.created_at
+            if age > self.ttl:
+                self._remove((entry.scope, entry.fingerprint))
+                self.expired += 1
+                return None
+            self._entries.move_to_end((entry.scope, entry.fingerprint))
+            bits = distance(fingerprint, entry.fingerprint)
+            entry.hits += 1
+            self.hits += 1
+            if bits:
+                self.near_hits += 1
+            self.time_saved += entry.latency
+            analysis = entry.analysis
+        analysis = copy.deepcopy(analysis)
+        analysis['ai'] = {**analysis.get('ai', {}), 'cached': True, 'distance': bits, 'age': round(age, 1),
+                          'elapsed': round(time.perf_counter() - start, 4)}
+        return analysis
+
+    def store(self, scope: str, fingerprint: int, analysis: Dict, latency: float):
+        """Remember an analysis together with how long it took to produce"""
+        analysis = copy.deepcopy(analysis)
+        size = len(json.dumps(analysis, default=str)) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if (scope, fingerprint) in self._entries:
+                self._remove((scope, fingerprint))
+            self._entries[(scope, fingerprint)] = CachedAnalysis(scope, fingerprint, analysis, latency, size)
+            for key in self._block_keys(scope, fingerprint):
+                self._index.setdefault(key, set()).add(fingerprint)
+            self._bytes += size
+            self.stores += 1
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Tuple[str, int]):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for block_key in self._block_keys(entry.scope, entry.fingerprint):
+            fingerprints = self._index.get(block_key)
+            if fingerprints is not None:
+                fingerprints.discard(entry.fingerprint)
+                if not fingerprints:
+                    del self._index[block_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self._bytes = 0
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'stored_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'lookups': self.lookups,
+                'hits': self.hits,
+                # Hits on a page whose fingerprint differs in a few bits
+                'near_hits': self.near_hits,
+                'misses': self.lookups - self.hits,
+                'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                'expired': self.expired,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'time_saved_ms': round(self.time_saved * 1000, 2),
+                'max_distance': self.max_distance,
+                'ttl': self.ttl
+            }
+
+
+def analysis_cache_from_env() -> Optional[AnalysisCache]:
+    """AnalysisCache configured by MODURO_SEO_ANALYSIS_CACHE_* variables; None when disabled"""
+    if os.environ.get('MODURO_SEO_ANALYSIS_CACHE', '1').lower() in ('0', 'false', 'no'):
+        return None
+    return AnalysisCache(
+        max_bytes=int(float(os.environ.get('MODURO_SEO_ANALYSIS_CACHE_MB', 64)) * 1024 * 1024),
+        ttl=float(os.environ.get('MODURO_SEO_ANALYSIS_CACHE_TTL', 86400)),
+        max_distance=int(os.environ.get('MODURO_SEO_ANALYSIS_CACHE_DISTANCE', 3))
+    )
@@ -0,0 +1,107 @@
+"""
+Application factory for the Moduro servers.
+
+create_app() builds a Flask app from any combination of subsystems:
+
+    data   dataset upload, analysis and expansion          (data_api)
+    code   Python code analysis and expansion              (code_api)
+    llm    chat, model comparison, Ollama backend pool     (llm_api)
+    seo    SEO audit tool                                  (seo_ai_tool_backend)
+
+The core blueprint (health, modules, metrics, engine metrics) is always
+mounted. Every app in a process shares the same engine, so logging, tracing,
+rate limits, the response cache, the retrieval index and the LLM pools exist
+once however the subsystems are grouped. To split subsystems across
+processes, start one server per group:
+
+    MODURO_SUBSYSTEMS=data,code,llm python serve.py
+    MODURO_SUBSYSTEMS=seo python serve.py --bind 0.0.0.0:5001
+"""
+
+import importlib
+import logging
+import os
+import traceback
+from typing import Iterable, List, Optional
+
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+
+import core_api
+from engine import engine
+from request_limits import init_app as init_request_limits
+from serialization import FastJSONProvider
+from static_assets import AssetStore
+from tracing import init_app as init_tracing
+
+logger = logging.getLogger(__name__)
+
+# Subsystem name -> module exposing `blueprint`; imported only when mounted
+SUBSYSTEMS = {
+    'data': 'data_api',
+    'code': 'code_api',
+    'llm': 'llm_api',
+    'seo': 'seo_ai_tool_backend'
+}
+
+MAX_BODY_BYTES = int(os.environ.get('MODURO_MAX_BODY_BYTES', 1024 * 1024))
+
+
+def subsystems_from_env() -> List[str]:
+    """Subsystems named in MODURO_SUBSYSTEMS, or all of them"""
+    names = [n.strip() for n in os.environ.get('MODURO_SUBSYSTEMS', '').split(',') if n.strip()]
+    return names or list(SUBSYSTEMS)
+
+
+def create_app(subsystems: Optional[Iterable[str]] = None, static_root: str = 'frontend/build',
+               static_files: Optional[List[str]] = None) -> Flask:
+    """Build a Flask app mounting `subsystems` on the shared engine"""
+    names = list(subsystems) if subsystems is not None else subsystems_from_env()
+    unknown = [name for name in names if name not in SUBSYSTEMS]
+    if unknown:
+        raise ValueError(f"Unknown subsystems {unknown}; choose from {sorted(SUBSYSTEMS)}")
+
+    # No Flask static route: /static/* belongs to the frontend build
+    app = Flask(__name__, static_folder=None)
+    app.json = FastJSONProvider(app)
+    CORS(app)
+
+    init_tracing(app, engine.tracer)
+    engine.admission.init_app(app)
+    # Request body limits: rejected on Content-Length, uploads spooled to disk
+    init_request_limits(app, default_max_bytes=MAX_BODY_BYTES)
+
+    app.register_blueprint(core_api.blueprint)
+    for name in names:
+        app.register_blueprint(importlib.import_module(SUBSYSTEMS[name]).blueprint)
+    app.config['MODURO_SUBSYSTEMS'] = names
+
+    # The frontend build is precompressed once; requests are served from memory
+    static_assets = AssetStore(static_root, files=static_files)
+
+    @app.route('/')
+    def index():
+        return static_assets.serve('index.html')
+
+    @app.route('/<path:path>')
+    def serve_static(path):
+        return static_assets.serve(path)
+
+    @app.errorhandler(400)
+    def bad_request(error):
+        logger.warning("400 error on %s: %s", request.path, error.description)
+        return jsonify({'error': error.description}), 400
+
+    @app.errorhandler(404)
+    def not_found(error):
+        logger.warning("404 error: %s", request.url)
+        return jsonify({'error': 'Not found'}), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        logger.error("500 error: %s", error)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Internal server error'}), 500
+
+    logger.info("Moduro app created with subsystems: %s", ', '.join(names) or 'core only')
+    return app
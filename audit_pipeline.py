@@ -0,0 +1,165 @@
+"""
+Dependency-aware stage runner for SEO audits.
+
+An audit is a set of named stages. A stage lists the stages whose results it
+needs (`after`). Every stage starts as soon as its inputs are ready, so
+independent stages run concurrently and an audit takes as long as its
+critical path, not the sum of its stages.
+
+Each stage may have a timeout. A stage that times out or raises does not fail
+the audit: its `default` value is passed on to the stages that depend on it,
+and the run records what happened. The caller thus always gets a result,
+marked partial when any stage fell back to its default.
+
+Stage functions receive a dict of their inputs' results and may be plain
+functions (run inline, for cheap CPU work) or return awaitables.
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """One step of a pipeline"""
+
+    __slots__ = ('name', 'run', 'after', 'timeout', 'default')
+
+    def __init__(self, name: str, run: Callable[[Dict[str, Any]], Any], after: Iterable[str] = (),
+                 timeout: Optional[float] = None, default: Any = None):
+        self.name = name
+        self.run = run
+        self.after = tuple(after)
+        self.timeout = timeout
+        self.default = default
+
+
+class StageOutcome:
+    """Status, value and timing of one stage in one run"""
+
+    __slots__ = ('name', 'status', 'value', 'started', 'finished', 'error')
+
+    def __init__(self, name: str, started: float):
+        self.name = name
+        self.status = 'running'
+        self.value = None
+        self.started = started
+        self.finished = started
+        self.error: Optional[str] = None
+
+    @property
+    def elapsed(self) -> float:
+        return self.finished - self.started
+
+    def to_dict(self) -> Dict:
+        return {
+            'status': self.status,
+            'started': round(self.started, 4),
+            'elapsed': round(self.elapsed, 4),
+            'error': self.error
+        }
+
+
+class PipelineRun:
+    """Outcomes of every stage of one pipeline run"""
+
+    def __init__(self, stages: Dict[str, Stage], outcomes: Dict[str, StageOutcome], elapsed: float):
+        self.stages = stages
+        self.outcomes = outcomes
+        self.elapsed = elapsed
+
+    def __getitem__(self, name: str):
+        return self.outcomes[name].value
+
+    @property
+    def complete(self) -> bool:
+        return all(outcome.status == 'ok' for outcome in self.outcomes.values())
+
+    def critical_path(self) -> List[str]:
+        """Chain of stages, each waiting on the last, that ended the run"""
+        if not self.outcomes:
+            return []
+        path = [max(self.outcomes.values(), key=lambda o: o.finished).name]
+        while self.stages[path[-1]].after:
+            path.append(max(self.stages[path[-1]].after, key=lambda n: self.outcomes[n].finished))
+        return path[::-1]
+
+    def to_dict(self) -> Dict:
+        return {
+            'elapsed': round(self.elapsed, 4),
+            'partial': not self.complete,
+            'critical_path': self.critical_path(),
+            'stages': {name: outcome.to_dict() for name, outcome in self.outcomes.items()}
+        }
+
+
+class AuditPipeline:
+    """Runs stages concurrently in dependency order"""
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage {stage.name!r}")
+            self.stages[stage.name] = stage
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 visiting, 2 done
+
+        def visit(name: str, chain: List[str]):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Stage cycle: {' -> '.join(chain + [name])}")
+            if name not in self.stages:
+                raise ValueError(f"Stage {chain[-1]!r} depends on unknown stage {name!r}")
+            state[name] = 1
+            for dep in self.stages[name].after:
+                visit(dep, chain + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    async def run(self) -> PipelineRun:
+        loop = asyncio.get_running_loop()
+        origin = loop.time()
+        tasks: Dict[str, asyncio.Future] = {}
+
+        async def execute(stage: Stage) -> StageOutcome:
+            inputs = {}
+            for dep in stage.after:
+                inputs[dep] = (await tasks[dep]).value
+            outcome = StageOutcome(stage.name, loop.time() - origin)
+            try:
+                value = stage.run(inputs)
+                if inspect.isawaitable(value):
+                    value = await asyncio.wait_for(value, stage.timeout)
+                outcome.status, outcome.value = 'ok', value
+            except asyncio.TimeoutError:
+                outcome.status, outcome.value = 'timeout', stage.default
+                outcome.error = f"timed out after {stage.timeout}s"
+                logger.warning("Audit stage %s timed out after %ss", stage.name, stage.timeout)
+            except Exception as e:
+                outcome.status, outcome.value = 'error', stage.default
+                outcome.error = f"{type(e).__name__}: {e}"
+                logger.warning("Audit stage %s failed: %s", stage.name, e)
+            outcome.finished = loop.time() - origin
+            return outcome
+
+        # Dependencies are created first, so every stage can await its inputs
+        for name in self.order:
+            tasks[name] = asyncio.ensure_future(execute(self.stages[name]))
+        try:
+            outcomes = await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return PipelineRun(self.stages, {o.name: o for o in outcomes}, loop.time() - origin)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Hit rate of the AI analysis cache on re-audited pages that change in details.
+
+Generates --pages synthetic pages (text, title, description, headings and
+links, drawn from a shared vocabulary with a common site template) and audits
+--audits of them, skewed towards popular pages. Each audit renders the page
+afresh: a new timestamp and view counter in the text and a new session token
+in every link. A --edit-rate share of audits also rewrites one sentence. Every
+audit looks up its page in an AnalysisCache and stores it on a miss. The
+benchmark then prints, for the SimHash fingerprint and for an exact hash of
+the same content:
+
+* the hit rate, and the share of hits that were near (not exact) matches;
+* false hits, answered with the analysis of a different page;
+* the time to fingerprint a page and to look it up.
+
+    python benchmarks/analysis_cache_benchmark.py
+    python benchmarks/analysis_cache_benchmark.py --edit-rate 0.5 --cache-mb 1
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis_cache import AnalysisCache, page_key, page_scope  # noqa: E402
+
+TEMPLATE = ('Home Products Pricing Blog About us Contact Sign in Subscribe to our newsletter '
+            'Privacy policy Terms of service Cookie settings All rights reserved')
+
+
+def vocabulary(rng: random.Random, size: int = 5000):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def sentence(rng: random.Random, words) -> str:
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() + '.'
+
+
+def make_page(rng: random.Random, words, i: int):
+    """The stable parts of page i"""
+    return {
+        'title': f"{' '.join(rng.choice(words) for _ in range(rng.randint(3, 7))).title()} | Example",
+        'description': sentence(rng, words),
+        'sentences': [sentence(rng, words) for _ in range(rng.randint(15, 100))],
+        'headings': [{'level': rng.choice((1, 2, 3)), 'text': sentence(rng, words)} for _ in range(rng.randint(2, 8))],
+        'links': [f"https://example.com/{rng.choice(words)}/{rng.choice(words)}" for _ in range(rng.randint(10, 60))]
+    }
+
+
+def render(rng: random.Random, words, page, edit_rate: float):
+    """site_data of one audit of the page, with fresh volatile details"""
+    sentences = list(page['sentences'])
+    if rng.random() < edit_rate:
+        sentences[rng.randrange(len(sentences))] = sentence(rng, words)
+    stamp = f"Updated {rng.randint(1, 28)} March 2026 at {rng.randint(0, 23)}:{rng.randint(0, 59):02d}"
+    views = f"{rng.randint(100, 99999)} views"
+    token = '%032x' % rng.getrandbits(128)
+    return {
+        'status_code': 200,
+        'load_time': 0.8,
+        'meta_tags': {'title': page['title'], 'description': page['description'], 'viewport': 'width=device-width'},
+        'text_content': ' '.join([TEMPLATE, stamp, views] + sentences + [TEMPLATE]),
+        'headings': page['headings'],
+        'links': [f"{link}?session={token}" for link in page['links']]
+    }
+
+
+def exact_key(site_data):
+    """Scope and a hash of the raw content, for comparison"""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (site_data['text_content'], repr(sorted(site_data['meta_tags'].items())),
+                 repr(site_data['headings']), '\n'.join(site_data['links'])):
+        digest.update(part.encode('utf-8'))
+    return page_scope(site_data, 'hedged'), int.from_bytes(digest.digest(), 'little')
+
+
+def run(name: str, key_fn, audits, cache_bytes: int):
+    cache = AnalysisCache(max_bytes=cache_bytes)
+    false_hits = 0
+    key_time = lookup_time = 0.0
+    for page_id, site_data in audits:
+        start = time.perf_counter()
+        scope, fingerprint = key_fn(site_data)
+        key_time += time.perf_counter() - start
+        start = time.perf_counter()
+        cached = cache.lookup(scope, fingerprint)
+        lookup_time += time.perf_counter() - start
+        if cached is None:
+            cache.store(scope, fingerprint, {'page': page_id, 'score': 80.0, 'recommendations': [], 'ai': {}}, 1.0)
+        elif cached['page'] != page_id:
+            false_hits += 1
+    metrics = cache.get_metrics()
+    near = metrics['near_hits'] / metrics['hits'] if metrics['hits'] else 0.0
+    print(f"{name:<10}{metrics['hit_rate']:>10.1%}{near:>8.1%}{false_hits:>12}"
+          f"{key_time / len(audits) * 1e3:>12.3f}{lookup_time / len(audits) * 1e6:>11.1f}"
+          f"{metrics['entries']:>9}{metrics['evictions']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--pages', type=int, default=2000, help='distinct pages')
+    parser.add_argument('--audits', type=int, default=10000)
+    parser.add_argument('--edit-rate', type=float, default=0.2, help='share of audits that rewrite a sentence')
+    parser.add_argument('--cache-mb', type=float, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = vocabulary(rng)
+    pages = [make_page(rng, words, i) for i in range(args.pages)]
+    # Popular pages are audited far more often than the rest
+    weights = [1.0 / (i + 1) for i in range(args.pages)]
+    chosen = rng.choices(range(args.pages), weights, k=args.audits)
+    audits = [(i, render(rng, words, pages[i], args.edit_rate)) for i in chosen]
+    print(f"{args.audits:,} audits of {len(set(chosen)):,} distinct pages ({args.pages:,} generated), "
+          f"{args.edit_rate:.0%} with an edited sentence, {args.cache_mb:g} MB cache")
+    print(f"{'key':<10}{'hit rate':>10}{'near':>8}{'false hits':>12}{'key ms/pg':>12}"
+          f"{'lookup us':>11}{'entries':>9}{'evictions':>11}")
+    cache_bytes = int(args.cache_mb * 1024 * 1024)
+    run('exact', exact_key, audits, cache_bytes)
+    run('simhash', lambda site_data: page_key(site_data, 'hedged'), audits, cache_bytes)
+    print(f"The best possible hit rate here is {1 - len(set(chosen)) / args.audits:.1%} "
+          f"(one miss per distinct page)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Throughput and memory of the bulk SEO audit endpoint.
+
+Serves the synthetic site of crawler_benchmark.py, whose /sitemap.xml lists
+every page, in a subprocess. It then posts the sitemap to
+/api/seo-audit/bulk through the Flask test client and reads the NDJSON stream
+line by line, as a client would. The benchmark prints the audited pages per
+second, the time to the first result and the site rollup. With
+--trace-memory it also prints the peak Python heap (tracemalloc) at 1/4, 1/2
+and all of the pages. The peak should not grow with the number of pages.
+tracemalloc slows everything down, so throughput is only meaningful without
+it. Crawl cache entries do add to the heap (about 1 KB of metadata per cached
+page), within the cache's own size budget. Pass --no-cache to leave them out.
+
+    python benchmarks/bulk_audit_benchmark.py
+    python benchmarks/bulk_audit_benchmark.py --pages 20000 --trace-memory --no-cache
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from crawler_benchmark import free_port  # noqa: E402
+
+
+def ndjson_lines(chunks):
+    """Lines of a streamed NDJSON body, whatever the chunking"""
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        yield from (line for line in lines if line)
+    if pending:
+        yield pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--pages', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--per-host', type=int, default=16)
+    parser.add_argument('--trace-memory', action='store_true', help='report the peak heap (slow)')
+    parser.add_argument('--no-cache', action='store_true', help='audit without the crawl cache')
+    args = parser.parse_args()
+
+    # Before the app is imported, so the SEO services pick them up
+    os.environ.setdefault('MODURO_CRAWL_PER_HOST', str(args.per_host))
+    os.environ.setdefault('MODURO_BULK_CONCURRENCY', str(args.concurrency))
+    os.environ.setdefault('MODURO_BULK_MAX_URLS', str(args.pages))
+    os.environ.setdefault('MODURO_CRAWL_CACHE_DIR', tempfile.mkdtemp(prefix='bulk-audit-cache-'))
+    if args.no_cache:
+        os.environ['MODURO_CRAWL_CACHE'] = '0'
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'benchmarks', 'crawler_benchmark.py'),
+                               '--serve', str(port), '--pages', str(args.pages)])
+    try:
+        from app_factory import create_app
+        from crawler_benchmark import wait_until_ready
+        import asyncio
+
+        asyncio.run(wait_until_ready(port))
+        client = create_app(['seo']).test_client()
+        if args.trace_memory:
+            tracemalloc.start()
+        checkpoints = {args.pages // 4: None, args.pages // 2: None}
+        start = time.perf_counter()
+        first = None
+        pages = 0
+        last = None
+        response = client.post('/api/seo-audit/bulk', json={'sitemap': f'http://127.0.0.1:{port}/sitemap.xml',
+                                                            'concurrency': args.concurrency},
+                               buffered=False)
+        for line in ndjson_lines(response.response):
+            record = json.loads(line)
+            if 'rollup' in record:
+                last = record
+                continue
+            pages += 1
+            if first is None:
+                first = time.perf_counter() - start
+            if args.trace_memory and pages in checkpoints:
+                checkpoints[pages] = tracemalloc.get_traced_memory()[1]
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+        response.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{pages} pages in {elapsed:.2f}s: {pages / elapsed:.0f} pages/s, first result after {first * 1000:.0f} ms")
+    if args.trace_memory:
+        for count, heap in sorted(checkpoints.items()) + [(pages, peak)]:
+            print(f"peak heap after {count:>6} pages: {heap / 1e6:6.1f} MB")
+    print(json.dumps(last, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Pages/sec of the site crawler against a local synthetic site.
+
+Starts an aiohttp test server in a subprocess. The server serves a site of
+--pages HTML pages laid out as a 10-ary tree, so /page/n links to pages
+10n+1 to 10n+10. Every page also links back to the root, to a random page
+and to a /private/ URL that robots.txt disallows. The benchmark then crawls
+the whole site with site_crawler.SiteCrawler and prints the crawl summary.
+
+Pages carry an ETag, a Last-Modified date and `Cache-Control: max-age=N`, and
+the server answers matching conditional requests with 304. /sitemap.xml lists
+every page. With --passes 2 or
+more, the site is crawled repeatedly through a crawl_cache.CrawlCache, as
+repeat audits are. Each pass prints its summary and the cache counters: with
+--max-age 0 every page is revalidated, and with a longer max-age the later
+passes are served from the cache.
+
+    python benchmarks/crawler_benchmark.py
+    python benchmarks/crawler_benchmark.py --pages 10000 --per-host 64 --crawl-delay 0
+    python benchmarks/crawler_benchmark.py --pages 1000 --passes 3 --max-age 0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from crawl_cache import CrawlCache  # noqa: E402
+from site_crawler import SiteCrawler  # noqa: E402
+
+FILLER = ' '.join(['Lorem ipsum dolor sit amet, consectetur adipiscing elit.'] * 40)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def page_html(n: int, pages: int) -> str:
+    children = ''.join(f'<li><a href="/page/{c}">Page {c}</a></li>'
+                       for c in range(10 * n + 1, min(10 * n + 11, pages)))
+    return (f'<!DOCTYPE html><html><head><title>Page {n}</title>'
+            f'<meta name="description" content="Synthetic page {n}"></head><body>'
+            f'<h1>Page {n}</h1><p>{FILLER}</p><ul>{children}</ul>'
+            f'<a href="/">Home</a> <a href="/page/{random.Random(n).randrange(pages)}#top">Random</a> '
+            f'<a href="/private/{n}">Private</a></body></html>')
+
+
+def serve(port: int, pages: int, robots_delay: float, max_age: int):
+    from aiohttp import web
+
+    last_modified = 'Mon, 05 Oct 2026 08:00:00 GMT'
+
+    robots = 'User-agent: *\nDisallow: /private/\n'
+    if robots_delay:
+        robots += f'Crawl-delay: {robots_delay}\n'
+
+    async def robots_txt(request):
+        return web.Response(text=robots)
+
+    async def sitemap(request):
+        entries = ''.join(f'<url><loc>http://{request.host}/page/{n}</loc></url>' for n in range(pages))
+        return web.Response(text='<?xml version="1.0" encoding="UTF-8"?>'
+                                 '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                                 f'{entries}</urlset>', content_type='application/xml')
+
+    async def page(request):
+        n = int(request.match_info.get('n', 0))
+        if n >= pages:
+            raise web.HTTPNotFound()
+        headers = {'ETag': f'"page-{n}"', 'Last-Modified': last_modified,
+                   'Cache-Control': f'max-age={max_age}'}
+        if request.headers.get('If-None-Match') == headers['ETag']:
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=page_html(n, pages), content_type='text/html', headers=headers)
+
+    app = web.Application()
+    app.router.add_get('/robots.txt', robots_txt)
+    app.router.add_get('/sitemap.xml', sitemap)
+    app.router.add_get('/', page)
+    app.router.add_get('/page/{n}', page)
+    web.run_app(app, host='127.0.0.1', port=port, print=None, access_log=None)
+
+
+async def wait_until_ready(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Test server on port {port} did not start")
+
+
+async def run(args, port: int):
+    import aiohttp
+
+    await wait_until_ready(port)
+    cache = None
+    if args.passes > 1:
+        cache = CrawlCache(args.cache_dir or tempfile.mkdtemp(prefix='crawl-cache-'))
+    connector = aiohttp.TCPConnector(limit=args.concurrency, limit_per_host=args.per_host)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for number in range(1, args.passes + 1):
+            crawler = SiteCrawler(session, max_pages=args.pages, max_depth=args.max_depth,
+                                  concurrency=args.concurrency, per_host_concurrency=args.per_host,
+                                  crawl_delay=args.crawl_delay, cache=cache)
+            report = await crawler.crawl([f'http://127.0.0.1:{port}/'])
+            if cache is not None:
+                print(f"Pass {number}")
+            print(json.dumps(report.summary(), indent=2))
+    if cache is not None:
+        print(json.dumps(cache.get_metrics(), indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--pages', type=int, default=10000)
+    parser.add_argument('--max-depth', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--per-host', type=int, default=32)
+    parser.add_argument('--crawl-delay', type=float, default=0.0)
+    parser.add_argument('--robots-delay', type=float, default=0.0, help='Crawl-delay served in robots.txt')
+    parser.add_argument('--max-age', type=int, default=0, help='Cache-Control max-age served with pages')
+    parser.add_argument('--passes', type=int, default=1, help='crawls of the site; 2 or more use a crawl cache')
+    parser.add_argument('--cache-dir', help='crawl cache directory (default: a new temporary one)')
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.pages, args.robots_delay, args.max_age)
+        return
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(port),
+                               '--pages', str(args.pages), '--robots-delay', str(args.robots_delay),
+                               '--max-age', str(args.max_age)])
+    try:
+        asyncio.run(run(args, port))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Parsing throughput (MB/s) of html_extract against the stdlib html.parser.
+
+Pages are either files given on the command line (save real pages with
+`curl -o page.html URL`) or a generated article page with the markup mix of a
+large news or wiki page: long head with meta/link/script tags, JSON-LD, a big
+navigation menu, paragraphs dense with inline markup and links, images,
+tables, comments and inline scripts. A second generated page is `'<a ' * n`,
+tags that never close: a hostile page of this kind must parse at a rate
+comparable to a real one, not in time growing with the square of its size.
+html.parser is skipped on it, as it does take quadratic time there (15 s for
+40 KB).
+
+Each page is parsed three ways:
+
+* `extract_page`: html_extract in one call;
+* `streamed 64K`: html_extract fed in 64 KB chunks, as the crawler does;
+* `html.parser`: stdlib HTMLParser collecting only links and text, a lower
+  bound for any handler built on it.
+
+    python benchmarks/html_extract_benchmark.py
+    python benchmarks/html_extract_benchmark.py saved/*.html --min-time 2
+"""
+
+import argparse
+import os
+import sys
+import time
+from html.parser import HTMLParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from html_extract import HTMLExtractor, extract_page  # noqa: E402
+
+
+def generated_page(paragraphs: int) -> str:
+    head = ['<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">',
+            '<title>Generated article &ndash; Benchmark</title>',
+            '<meta name="description" content="A long generated article for parser benchmarks">',
+            '<meta name="viewport" content="width=device-width, initial-scale=1">',
+            '<link rel="canonical" href="https://example.org/wiki/Article">']
+    head += [f'<link rel="alternate" hreflang="{lang}" href="https://{lang}.example.org/wiki/Article">'
+             for lang in ('de', 'fr', 'es', 'it', 'ja', 'pt', 'ru', 'zh')]
+    head += [f'<meta property="og:tag{i}" content="value {i}"><link rel="stylesheet" href="/s/{i}.css">'
+             for i in range(40)]
+    head.append('<script type="application/ld+json">{"@context":"https://schema.org","@type":"Article",'
+                '"headline":"Generated article","author":{"@type":"Person","name":"Bench"}}</script>')
+    head.append('<script>' + 'window.cfg={"a":1,"b":"<div>not markup</div>"};' * 200 + '</script>')
+    head.append('<style>' + '.c{color:#123;margin:0 auto}' * 300 + '</style></head>')
+    nav = ['<body><nav><ul>'] + [f'<li class="nav-item"><a href="/wiki/Topic_{i}" title="Topic {i}">'
+                                  f'Topic {i}</a></li>' for i in range(600)] + ['</ul></nav><main>']
+    body = []
+    for i in range(paragraphs):
+        if i % 25 == 0:
+            body.append(f'<h2 id="s{i}">Section {i // 25}</h2>')
+        body.append(
+            f'<p>Paragraph {i} of the article with <b>bold</b>, <i>italic</i> and '
+            f'<a href="/wiki/Link_{i}" rel="nofollow">a link to page {i}</a> plus a '
+            f'<a href="https://external{i % 7}.example.com/ref?id={i}&amp;x=1">reference</a>'
+            f'<sup class="ref">[{i}]</sup>. Lorem ipsum dolor sit amet, consectetur adipiscing elit, '
+            f'sed do eiusmod tempor incididunt ut labore et dolore magna aliqua &amp; more.</p>')
+        if i % 10 == 0:
+            body.append(f'<figure><img src="/img/{i}.jpg" alt="Figure {i}" width="640" height="480" '
+                        f'loading="lazy"><figcaption>Figure {i}</figcaption></figure>')
+        if i % 40 == 0:
+            body.append('<table><tr>' + ''.join(f'<td>{c}</td>' for c in range(12)) + '</tr></table>'
+                        '<!-- table generated by the layout engine -->')
+    return ''.join(head + nav + body + ['</main><script>track();</script></body></html>'])
+
+
+class StdlibLinks(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self.links.append(dict(attrs).get('href'))
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+
+def stdlib_parse(markup: str):
+    parser = StdlibLinks()
+    parser.feed(markup)
+    parser.close()
+    return parser
+
+
+def streamed(markup: str, chunk: int = 64 * 1024):
+    extractor = HTMLExtractor('https://example.org/wiki/Article')
+    for start in range(0, len(markup), chunk):
+        extractor.feed(markup[start:start + chunk])
+    return extractor.close()
+
+
+def throughput(parse, markup: str, min_time: float) -> float:
+    parse(markup)  # warm-up
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        parse(markup)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return len(markup.encode('utf-8')) * runs / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('files', nargs='*', help='HTML files to parse instead of the generated page')
+    parser.add_argument('--paragraphs', type=int, default=5000, help='size of the generated page')
+    parser.add_argument('--unterminated', type=int, default=1000000,
+                        help="bytes of the generated '<a ' * n page")
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds per measurement')
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.files:
+        with open(path, 'rb') as fh:
+            pages.append((os.path.basename(path), fh.read().decode('utf-8', errors='replace'), True))
+    if not pages:
+        pages.append((f'generated ({args.paragraphs} paragraphs)', generated_page(args.paragraphs), True))
+        pages.append(('unterminated tags', '<a ' * (args.unterminated // 3), False))
+
+    candidates = [
+        ('extract_page', lambda markup: extract_page(markup, 'https://example.org/wiki/Article')),
+        ('streamed 64K', streamed),
+        ('html.parser', stdlib_parse)
+    ]
+    print(f"{'page':<34}{'MB':>7}{'parser':>16}{'MB/s':>9}")
+    for label, markup, stdlib in pages:
+        result = extract_page(markup, 'https://example.org/wiki/Article')
+        size = len(markup.encode('utf-8')) / 1e6
+        for name, parse in candidates if stdlib else candidates[:2]:
+            print(f"{label:<34}{size:>7.2f}{name:>16}{throughput(parse, markup, args.min_time):>9.1f}")
+        print(f"{'':<34}{len(result.links)} links, {len(result.images)} images, "
+              f"{len(result.headings)} headings, {len(result.text)} chars of text\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+LLM router against local stub Ollama servers: balancing, ejection and failover.
+
+Starts --backends stub servers in this process. Each answers /api/tags with
+its models and /api/generate (plain or streamed) after its own latency. The
+first backend is --slow times slower than the others. Then runs:
+
+* `balance`: --requests generations, --concurrency at a time. P2C should
+  send the slow backend a small share. Prints each backend's share and the
+  p50/p99 latency.
+* `failover`: the first backend answers 500. Every request should still
+  succeed on another backend, and the failing one should be ejected.
+* `down`: the first backend is shut down halfway through streamed requests.
+  Streams fail over before their first token.
+* `models`: a backend that lists no models gets no requests once it has
+  been health-checked.
+
+The router's warnings about failures and ejections are shown with --verbose.
+
+Each scenario ends with its checks, and the exit status is 1 if any failed.
+
+    python benchmarks/llm_router_benchmark.py
+    python benchmarks/llm_router_benchmark.py --backends 4 --slow 10 --requests 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from llm_router import LLMRouter  # noqa: E402
+
+MODEL = 'stub:latest'
+
+
+class StubOllama:
+    """An Ollama-like HTTP server on a free local port"""
+
+    def __init__(self, latency: float, models=(MODEL,)):
+        self.latency = latency
+        self.models = list(models)
+        self.failing = False
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status: int, body: bytes, content_type: str = 'application/json'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    self.reply(200, json.dumps({'models': [{'name': name} for name in stub.models]}).encode())
+                else:
+                    self.reply(404, b'{}')
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                stub.requests += 1
+                time.sleep(stub.latency)
+                if stub.failing:
+                    self.reply(500, b'{"error": "stub failure"}')
+                    return
+                words = ['stub', 'reply', 'to', str(len(payload.get('prompt', '')))]
+                if payload.get('stream'):
+                    lines = [json.dumps({'response': word + ' ', 'done': False}) for word in words]
+                    lines.append(json.dumps({'response': '', 'done': True}))
+                    self.reply(200, ('\n'.join(lines) + '\n').encode(), 'application/x-ndjson')
+                else:
+                    self.reply(200, json.dumps({'response': ' '.join(words), 'done': True}).encode())
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(values, q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def run_requests(router: LLMRouter, requests: int, concurrency: int, stream: bool = False, midway=None):
+    """Latencies of the successful requests and the number that failed"""
+    latencies = []
+    failures = []
+
+    def one(i: int):
+        if midway is not None and i == requests // 2:
+            midway()
+        start = time.perf_counter()
+        try:
+            if stream:
+                ''.join(router.generate_stream(MODEL, f'prompt {i}'))
+            else:
+                router.generate(MODEL, f'prompt {i}')
+        except Exception as e:
+            failures.append(e)
+            return
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    return sorted(latencies), len(failures)
+
+
+def check(results, name: str, passed: bool, detail: str):
+    results.append(passed)
+    print(f"  [{'ok' if passed else 'FAILED'}] {name}: {detail}")
+
+
+def new_router(stubs) -> LLMRouter:
+    router = LLMRouter([stub.url for stub in stubs], request_timeout=10, health_timeout=2)
+    router.check_health()
+    return router
+
+
+def scenario_balance(args, results):
+    stubs = [StubOllama(args.latency * (args.slow if i == 0 else 1)) for i in range(args.backends)]
+    router = new_router(stubs)
+    latencies, failures = run_requests(router, args.requests, args.concurrency)
+    print(f"balance: {args.requests} requests, {args.concurrency} at a time; backend 0 is {args.slow:g}x slower")
+    for i, stub in enumerate(stubs):
+        print(f"  backend {i}  {stub.latency * 1000:>6.0f} ms  {stub.requests / args.requests:>6.1%} of requests")
+    print(f"  p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    fair_share = 1 / args.backends
+    check(results, 'no failures', failures == 0, f'{failures} failed')
+    check(results, 'slow backend avoided', stubs[0].requests / args.requests < fair_share / 2,
+          f'{stubs[0].requests / args.requests:.1%} against a fair share of {fair_share:.1%}')
+    for stub in stubs:
+        stub.stop()
+
+
+def scenario_failover(args, results):
+    stubs = [StubOllama(args.latency) for _ in range(args.backends)]
+    stubs[0].failing = True
+    router = new_router(stubs)
+    _, failures = run_requests(router, args.requests // 4, args.concurrency)
+    status = router.get_status()['backends'][0]
+    print(f"failover: backend 0 answers 500 to {args.requests // 4} requests")
+    check(results, 'every request succeeded elsewhere', failures == 0, f'{failures} failed')
+    check(results, 'failing backend ejected', not status['healthy'],
+          f"{stubs[0].requests} requests reached it, healthy={status['healthy']}")
+    check(results, 'ejection stopped traffic', stubs[0].requests <= args.concurrency + router.max_failures,
+          f'{stubs[0].requests} requests at most {args.concurrency} in flight when it was ejected')
+    for stub in stubs:
+        stub.stop()
+
+
+def scenario_down(args, results):
+    stubs = [StubOllama(args.latency) for _ in range(args.backends)]
+    router = new_router(stubs)
+    _, failures = run_requests(router, args.requests // 4, args.concurrency, stream=True,
+                               midway=stubs[0].stop)
+    print(f"down: backend 0 shut down halfway through {args.requests // 4} streamed requests")
+    check(results, 'streams failed over', failures == 0, f'{failures} failed')
+    for stub in stubs[1:]:
+        stub.stop()
+
+
+def scenario_models(args, results):
+    stubs = [StubOllama(args.latency, models=()) if i == 0 else StubOllama(args.latency)
+             for i in range(args.backends)]
+    router = new_router(stubs)
+    _, failures = run_requests(router, args.requests // 4, args.concurrency)
+    print(f"models: backend 0 lists no models; {args.requests // 4} requests for {MODEL}")
+    check(results, 'no requests to the backend without the model', stubs[0].requests == 0,
+          f'{stubs[0].requests} requests reached it, {failures} failed')
+    for stub in stubs:
+        stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--backends', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.01, help='stub latency in seconds')
+    parser.add_argument('--slow', type=float, default=8.0, help='how much slower backend 0 is in `balance`')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--verbose', action='store_true', help="show the router's failure and ejection warnings")
+    args = parser.parse_args()
+    if args.backends < 2:
+        parser.error('--backends must be at least 2')
+    if not args.verbose:
+        logging.getLogger('llm_router').setLevel(logging.ERROR)
+
+    results = []
+    for scenario in (scenario_balance, scenario_failover, scenario_down, scenario_models):
+        scenario(args, results)
+    print(f"{sum(results)} of {len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Per-request logging overhead: synchronous handlers vs. the async pipeline.
+
+Simulates the logging done by a typical app.py request (a few INFO lines,
+one of them carrying the metrics dict) and measures the time spent in the
+calling thread, first with the old basicConfig setup (StreamHandler plus
+FileHandler) and then with log_pipeline.setup_logging().
+
+    python benchmarks/logging_benchmark.py
+    python benchmarks/logging_benchmark.py --requests 50000 --threads 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from log_pipeline import LOG_FORMAT, setup_logging  # noqa: E402
+
+METRICS = {
+    'total_lines': 412, 'function_count': 23, 'class_count': 4,
+    'import_count': 11, 'complexity_score': 37, 'comment_lines': 58
+}
+
+
+def simulated_request(logger: logging.Logger, i: int):
+    logger.info("Analyzing Python code with %s lines", 412)
+    logger.info("Analysis complete: %s functions, %s classes", 23, 4)
+    logger.info("Returning metrics: %s", METRICS)
+    logger.info("Request %d finished", i)
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run(label: str, requests: int, threads: int) -> float:
+    logger = logging.getLogger('benchmark')
+    per_thread = requests // threads
+
+    def worker(offset):
+        for i in range(per_thread):
+            simulated_request(logger, offset + i)
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    per_request_us = elapsed / (per_thread * threads) * 1e6
+    print(f"  {label:<28} {per_request_us:>8.1f} us/request  ({elapsed:.2f}s in request threads)")
+    return per_request_us
+
+
+def drain(pipeline):
+    start = time.perf_counter()
+    pipeline.stop()
+    print(f"    writer drained the backlog {time.perf_counter() - start:.2f}s later")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--sample-every', type=int, default=10,
+                        help='sampling rate for the third run')
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp(prefix='moduro-logbench-')
+    # The console goes to /dev/null so terminal speed does not dominate
+    devnull = open(os.devnull, 'w')
+    real_stderr = sys.stderr
+    sys.stderr = devnull
+    try:
+        print(f"{args.requests} simulated requests on {args.threads} threads")
+
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, handlers=[
+            logging.StreamHandler(devnull),
+            logging.FileHandler(os.path.join(log_dir, 'sync.log'), encoding='utf-8')
+        ])
+        sync = run('sync FileHandler', args.requests, args.threads)
+        reset_root()
+
+        # Size the queue for the whole burst so the numbers include no drops
+        queue_size = args.requests * 4 + 1
+        pipeline = setup_logging(os.path.join(log_dir, 'async.log'), max_queue=queue_size)
+        pipeline_async = run('async pipeline', args.requests, args.threads)
+        drain(pipeline)
+        print(f"    writer: {pipeline.get_metrics()}")
+        reset_root()
+
+        pipeline = setup_logging(os.path.join(log_dir, 'sampled.log'), max_queue=queue_size,
+                                 sample_every=args.sample_every)
+        sampled = run(f'async + 1/{args.sample_every} sampling', args.requests, args.threads)
+        drain(pipeline)
+        print(f"    writer: {pipeline.get_metrics()}")
+        reset_root()
+
+        print()
+        print(f"  speedup: {sync / pipeline_async:.1f}x async, {sync / sampled:.1f}x async + sampling")
+    finally:
+        sys.stderr = real_stderr
+        devnull.close()
+
+
+if __name__ == '__main__':
+    main()
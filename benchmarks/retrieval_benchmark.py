@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Top-k latency of the retrieval index on a synthetic Zipf corpus.
+
+Builds a RetrievalIndex of --chunks chunks of 30-60 words. The words are
+drawn from a --vocab word vocabulary with Zipf-distributed frequencies, the
+way words of real text are. Chunks are added in sources of 1,000. Then it
+times --queries top-k searches of each kind, after one warm-up pass that
+fills the champion lists:
+
+* `rare`: two or three words outside the 1,000 most frequent;
+* `mixed`: one of the 50 most frequent words plus two rarer ones;
+* `common`: three of the 50 most frequent words, whose postings cover a
+  large share of the corpus.
+
+It prints the p50, p95 and max latency of each kind.
+
+Then it checks that a slow query embedding does not block the index. A
+small index with embeddings answers searches while one search waits
+--embed-delay seconds for its query vector. The searches around it should
+still take milliseconds. The exit status is 1 if they do not.
+
+    python benchmarks/retrieval_benchmark.py
+    python benchmarks/retrieval_benchmark.py --chunks 1000000 --queries 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from retrieval_index import STOPWORDS, RetrievalIndex  # noqa: E402
+
+SOURCE_CHUNKS = 1000
+SLOW_MARKER = 'slowquery'
+
+
+def vocabulary(rng: random.Random, size: int):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < size:
+        word = ''.join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        if word not in STOPWORDS:
+            words.add(word)
+    return sorted(words)
+
+
+def build(rng: random.Random, words, chunks: int, **kwargs) -> RetrievalIndex:
+    index = RetrievalIndex(**kwargs)
+    cum_weights = []
+    total = 0.0
+    for rank in range(len(words)):
+        total += 1.0 / (rank + 1)
+        cum_weights.append(total)
+    for start in range(0, chunks, SOURCE_CHUNKS):
+        count = min(SOURCE_CHUNKS, chunks - start)
+        texts = [' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(30, 60)))
+                 for _ in range(count)]
+        index.add_source(f'source-{start // SOURCE_CHUNKS}', texts)
+    return index
+
+
+def queries(rng: random.Random, words, kind: str, count: int):
+    common, rare = words[:50], words[1000:]
+    if kind == 'rare':
+        return [' '.join(rng.sample(rare, rng.randint(2, 3))) for _ in range(count)]
+    if kind == 'mixed':
+        return [' '.join([rng.choice(common)] + rng.sample(rare, 2)) for _ in range(count)]
+    return [' '.join(rng.sample(common, 3)) for _ in range(count)]
+
+
+def percentile(values, q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def time_searches(index: RetrievalIndex, texts, k: int):
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        index.search(text, k)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def hashed_embedding(delay: float):
+    """A 32-dimension bag-of-words vector; queries with SLOW_MARKER take `delay`"""
+    def embed(text: str):
+        if SLOW_MARKER in text:
+            time.sleep(delay)
+        vector = [0.0] * 32
+        for word in text.split():
+            vector[zlib.crc32(word.encode()) % 32] += 1.0
+        return vector
+    return embed
+
+
+def check_slow_embedding(rng: random.Random, words, args) -> bool:
+    index = build(rng, words, 2000, embed_fn=hashed_embedding(args.embed_delay))
+    texts = queries(rng, words, 'mixed', 50)
+    slow = threading.Thread(target=index.search, args=(f'{texts[0]} {SLOW_MARKER}', args.k))
+    slow.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    latencies = []
+    while slow.is_alive() and time.perf_counter() - start < args.embed_delay:
+        latencies += time_searches(index, texts, args.k)
+    slow.join()
+    worst = max(latencies, default=0.0)
+    passed = bool(latencies) and worst < args.embed_delay / 10
+    print(f"{len(latencies):,} searches while one waited {args.embed_delay:g} s for its query vector: "
+          f"max {worst * 1e3:.2f} ms")
+    print(f"  [{'ok' if passed else 'FAILED'}] searches not blocked by a slow query embedding")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--chunks', type=int, default=100000)
+    parser.add_argument('--vocab', type=int, default=50000, help='distinct words')
+    parser.add_argument('--queries', type=int, default=100, help='queries of each kind')
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--embed-delay', type=float, default=1.0,
+                        help='seconds the slow query embedding takes')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.vocab < 2000:
+        parser.error('--vocab must be at least 2000')
+
+    rng = random.Random(args.seed)
+    words = vocabulary(rng, args.vocab)
+    start = time.perf_counter()
+    index = build(rng, words, args.chunks)
+    stats = index.stats()
+    print(f"Indexed {stats['chunks']:,} chunks, {stats['terms']:,} terms in {time.perf_counter() - start:.1f} s")
+    print(f"{'query':<8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for kind in ('rare', 'mixed', 'common'):
+        texts = queries(rng, words, kind, args.queries)
+        time_searches(index, texts, args.k)
+        latencies = time_searches(index, texts, args.k)
+        print(f"{kind:<8}{percentile(latencies, 0.5) * 1e3:>10.2f}{percentile(latencies, 0.95) * 1e3:>10.2f}"
+              f"{latencies[-1] * 1e3:>10.2f}")
+    del index
+    sys.exit(0 if check_slow_embedding(rng, words, args) else 1)
+
+
+if __name__ == '__main__':
+    main()
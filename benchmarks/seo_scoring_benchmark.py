@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Pages per second of SEO scoring: per page against columnar batches.
+
+Generates feature columns for --pages synthetic pages (random error, status,
+meta tags, text length, load time and HSTS mix) and scores them three ways:
+
+* `per page`: SEOAnalyzerManager.calculate_seo_scores on site_data dicts,
+  timed on a sample and extrapolated;
+* `batch`: seo_scoring.score_batch on the columns, with numpy when it is
+  installed;
+* `batch (no numpy)`: the pure-Python column path, always.
+
+Both batch paths are checked against the per-page scores on the sample.
+
+    python benchmarks/seo_scoring_benchmark.py
+    python benchmarks/seo_scoring_benchmark.py --pages 5000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seo_scoring  # noqa: E402
+from seo_ai_tool_backend import SEOAnalyzerManager  # noqa: E402
+
+SAMPLE = 20000
+
+
+def generated_columns(pages: int, seed: int = 0):
+    rng = random.Random(seed)
+    text_lengths = [int(rng.expovariate(1 / 1200)) for _ in range(pages)]
+    return {
+        'error': [rng.random() < 0.05 for _ in range(pages)],
+        'status_code': [rng.choice((200, 200, 200, 200, 301, 404, 500)) for _ in range(pages)],
+        'has_title': [rng.random() < 0.9 for _ in range(pages)],
+        'has_description': [rng.random() < 0.7 for _ in range(pages)],
+        'has_viewport': [rng.random() < 0.8 for _ in range(pages)],
+        'text_length': text_lengths,
+        # Only pages with room for the keyword mention it
+        'keyword': [length >= 7 and rng.random() < 0.2 for length in text_lengths],
+        'load_time': [rng.lognormvariate(0.3, 0.6) for _ in range(pages)],
+        'has_hsts': [rng.random() < 0.5 for _ in range(pages)]
+    }
+
+
+def site_data(columns, i: int):
+    """The site_data dict a crawl would produce for page i"""
+    meta = {name: 'x' for name, present in (('title', columns['has_title'][i]),
+                                            ('description', columns['has_description'][i]),
+                                            ('viewport', columns['has_viewport'][i])) if present}
+    text = ('sample ' if columns['keyword'][i] else 'words! ') * (columns['text_length'][i] // 7)
+    text += 'x' * (columns['text_length'][i] - len(text))
+    page = {'status_code': columns['status_code'][i], 'meta_tags': meta, 'text_content': text,
+            'load_time': columns['load_time'][i],
+            'headers': {'Strict-Transport-Security': 'max-age=63072000'} if columns['has_hsts'][i] else {}}
+    if columns['error'][i]:
+        page['error'] = 'Crawl failed'
+    return page
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--pages', type=int, default=1000000, help='pages to score in a batch')
+    args = parser.parse_args()
+
+    analyzer = SEOAnalyzerManager()
+    columns = generated_columns(args.pages)
+    batch, build_time = timed(analyzer.feature_batch, (), columns)
+    sample = [site_data(columns, i) for i in range(min(SAMPLE, args.pages))]
+    per_page, per_page_time = timed(lambda: [analyzer.calculate_seo_scores(page) for page in sample])
+
+    runs = [('batch (no numpy)', seo_scoring._score_columns)]
+    if seo_scoring.numpy is not None:
+        runs.insert(0, ('batch (numpy)', seo_scoring._score_numpy))
+    print(f"{args.pages:,} pages, features loaded into columns in {build_time:.2f}s")
+    print(f"{'scoring':<20}{'seconds':>10}{'pages/s':>14}")
+    rate = len(sample) / per_page_time
+    print(f"{'per page':<20}{args.pages / rate:>10.2f}{rate:>14,.0f}   (extrapolated from {len(sample):,})")
+    for name, score in runs:
+        scores, elapsed = timed(score, batch.columns, analyzer.rules)
+        mismatches = sum(
+            1 for i, expected in enumerate(per_page)
+            if any(abs(expected[key] - scores[key][i]) > 1e-9 for key in seo_scoring.SCORE_KEYS)
+        )
+        print(f"{name:<20}{elapsed:>10.2f}{args.pages / elapsed:>14,.0f}   {mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()
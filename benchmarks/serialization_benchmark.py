@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Encode time and payload size of the available response serializers.
+
+Builds the response shapes app.py returns (expanded data, expanded code,
+Python analysis) at a few sizes and encodes each one with every encoder that
+serialization.encoders() finds: the stdlib json module always, plus orjson
+and msgpack when installed. The `flask default` row is the configuration
+jsonify() used before FastJSONProvider (stdlib, sorted keys).
+
+It then checks that FastJSONProvider encodes and decodes edge cases (integers
+beyond 64 bits, 1e400, datetimes and Decimals) exactly as the stdlib json
+module does. The exit status is 1 if any check fails.
+
+    python benchmarks/serialization_benchmark.py
+    python benchmarks/serialization_benchmark.py --scale 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+
+from serialization import FastJSONProvider, encoders, to_builtin  # noqa: E402
+
+# Values the provider must encode, and documents it must decode, like the stdlib
+EQUIVALENCE_OBJECTS = [
+    {'n': 2 ** 64},
+    {'n': -2 ** 63 - 1, 'nested': [2 ** 100, 1.5, 'caf\u00e9']},
+    {'when': datetime(2026, 1, 1, 12, 30), 'price': Decimal('1.10')}
+]
+EQUIVALENCE_DOCUMENTS = [
+    '{"n": 1180591620717411303424}',
+    '-9223372036854775809',
+    '18446744073709551615',
+    '[1e400, -Infinity]',
+    '{"x": 0.1, "s": "caf\\u00e9"}'
+]
+
+
+def expanded_data(records: int) -> dict:
+    data = []
+    for i in range(records):
+        value = 100 + i
+        data.append({
+            'id': i, 'name': f'Sample {i}', 'value': value,
+            'category': f'Category_{i % 3 + 1}', 'score': value * 0.1,
+            'status': 'active' if value > 150 else 'pending'
+        })
+    return {'expansion': {'data': data, 'new_features': 3, 'expanded_count': len(data)}}
+
+
+def expanded_code(lines: int) -> dict:
+    code = '\n'.join(f'def function_{i}(value):\n    """Return value {i}."""\n    return value * {i}'
+                     for i in range(lines // 3))
+    return {
+        'expanded_code': code,
+        'metrics': {'original_lines': lines, 'original_chars': len(code), 'new_lines': 40,
+                    'new_chars': 1200, 'total_lines': lines + 40,
+                    'total_chars': len(code) + 1200, 'expansion_rate': 12.5}
+    }
+
+
+def code_analysis(functions: int) -> dict:
+    return {'analysis': {
+        'complexity': functions + functions // 5 * 2,
+        'functions': [{'name': f'function_{i}', 'args': i % 4, 'lineno': i * 3 + 1}
+                      for i in range(functions)],
+        'classes': [{'name': f'Class{i}', 'methods': 5, 'lineno': i * 20}
+                    for i in range(functions // 5)],
+        'imports': [f'package.module_{i}' for i in range(functions // 10)],
+        'suggestions': ['Consider adding docstrings for better documentation'] * 4,
+        'generated_at': datetime.now().isoformat()
+    }}
+
+
+def timed(encode, obj, min_time: float = 0.2):
+    encode(obj)  # warm-up
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        payload = encode(obj)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs, len(payload)
+
+
+def check_equivalence() -> bool:
+    """FastJSONProvider against the stdlib json module on EQUIVALENCE_*"""
+    # The provider only holds a weak reference to its app
+    app = Flask(__name__)
+    provider = FastJSONProvider(app)
+    results = []
+    for obj in EQUIVALENCE_OBJECTS:
+        expected = repr(json.loads(json.dumps(obj, default=to_builtin)))
+        try:
+            actual = repr(json.loads(provider.dumps(obj)))
+        except Exception as e:
+            actual = f'{type(e).__name__}: {e}'
+        results.append((f'encode {obj!r}', actual == expected, actual))
+    for text in EQUIVALENCE_DOCUMENTS:
+        expected = repr(json.loads(text))
+        for document in (text, text.encode('utf-8')):
+            try:
+                actual = repr(provider.loads(document))
+            except Exception as e:
+                actual = f'{type(e).__name__}: {e}'
+            results.append((f'decode {document!r}', actual == expected, actual))
+    for name, passed, actual in results:
+        print(f"  [{'ok' if passed else 'FAILED'}] {name}" + ('' if passed else f': got {actual}'))
+    print(f"{sum(passed for _, passed, _ in results)} of {len(results)} equivalence checks passed")
+    return all(passed for _, passed, _ in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--scale', type=int, default=1, help='multiply every payload size')
+    args = parser.parse_args()
+
+    shapes = []
+    for size in (100, 10000):
+        n = size * args.scale
+        shapes.append((f'expanded_data {n} records', expanded_data(n)))
+        shapes.append((f'expanded_code {n} lines', expanded_code(n)))
+        shapes.append((f'analysis {n} functions', code_analysis(n)))
+
+    candidates = {
+        'flask default': lambda obj: json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    }
+    candidates.update(encoders())
+
+    print(f"{'shape':<32}{'encoder':<15}{'encode ms':>11}{'bytes':>12}{'speedup':>9}")
+    for label, obj in shapes:
+        baseline = None
+        for name, encode in candidates.items():
+            seconds, size = timed(encode, obj)
+            baseline = baseline or seconds
+            print(f"{label:<32}{name:<15}{seconds * 1000:>11.3f}{size:>12}{baseline / seconds:>8.1f}x")
+        print()
+    sys.exit(0 if check_equivalence() else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Requests/sec of the Werkzeug development server vs. the production server.
+
+Starts each server as a subprocess on a free local port, drives it with a
+pool of keep-alive client threads for a fixed duration per endpoint, and
+prints a comparison table.
+
+    python benchmarks/serving_benchmark.py
+    python benchmarks/serving_benchmark.py --app simple_api:app --clients 32 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_CODE = '''
+import os
+
+class Report:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def total(self):
+        return sum(r['value'] for r in self.rows)
+
+def load(path):
+    with open(path) as fh:
+        return [line.split(',') for line in fh]
+'''
+
+ENDPOINTS = [
+    ('GET', '/api/health', None),
+    ('POST', '/api/analyze-python', json.dumps({'code': SAMPLE_CODE})),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+def start_dev_server(target: str, port: int) -> subprocess.Popen:
+    module, _, attr = target.partition(':')
+    # Same settings as `python app.py`, minus the reloader's second process
+    code = (
+        f"import {module}; "
+        f"{module}.{attr or 'app'}.run(host='127.0.0.1', port={port}, debug=True, use_reloader=False)"
+    )
+    return subprocess.Popen([sys.executable, '-c', code], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def start_prod_server(target: str, port: int, workers: int, threads: int) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, 'serve.py', target, '--bind', f'127.0.0.1:{port}',
+                             '--workers', str(workers), '--threads', str(threads)],
+                            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def drive(port: int, method: str, path: str, body, clients: int, duration: float) -> dict:
+    counts = [0] * clients
+    errors = [0] * clients
+    latencies = [[] for _ in range(clients)]
+    stop_at = time.monotonic() + duration
+    headers = {'Content-Type': 'application/json'} if body else {}
+
+    def client(i):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status != 200:
+                    errors[i] += 1
+                if resp.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            except OSError:
+                errors[i] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            latencies[i].append(time.perf_counter() - start)
+            counts[i] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    all_latencies = sorted(l for per_client in latencies for l in per_client)
+    p99 = all_latencies[int(len(all_latencies) * 0.99) - 1] * 1000 if all_latencies else 0
+    return {'rps': sum(counts) / duration, 'errors': sum(errors), 'p99_ms': p99}
+
+
+def benchmark(name: str, proc: subprocess.Popen, port: int, args) -> dict:
+    try:
+        wait_until_ready(port)
+        results = {}
+        for method, path, body in ENDPOINTS:
+            drive(port, method, path, body, args.clients, 1.0)  # warm-up
+            results[path] = drive(port, method, path, body, args.clients, args.duration)
+            r = results[path]
+            print(f"  {name:<6} {method:<4} {path:<22} {r['rps']:>9.1f} req/s  "
+                  f"p99 {r['p99_ms']:>7.1f} ms  errors {r['errors']}")
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--app', default='app:app')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"Benchmarking {args.app}: {args.clients} clients, {args.duration:.0f}s per endpoint")
+    port = free_port()
+    dev = benchmark('dev', start_dev_server(args.app, port), port, args)
+    port = free_port()
+    prod = benchmark('prod', start_prod_server(args.app, port, args.workers, args.threads), port, args)
+
+    print()
+    print(f"{'endpoint':<24}{'dev req/s':>12}{'prod req/s':>12}{'speedup':>10}")
+    for _, path, _ in ENDPOINTS:
+        speedup = prod[path]['rps'] / dev[path]['rps'] if dev[path]['rps'] else float('inf')
+        print(f"{path:<24}{dev[path]['rps']:>12.1f}{prod[path]['rps']:>12.1f}{speedup:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Cold-start time of a Moduro app, with a `-X importtime` breakdown.
+
+Cold start: runs a fresh interpreter with `python -X importtime` that imports
+the app and answers one GET /api/health through the test client. Reports the
+wall time to that first response (median of --runs), the slowest imports
+grouped by top-level package, and whether the deferred dependencies (aiohttp,
+requests, asyncio and the LLM stack) were loaded.
+
+Fork: imports the app once, as serve.py does with preload, then forks
+--workers children. Each child times its first /api/health response from the
+moment of the fork. This is how long a new or recycled gunicorn worker takes
+to become ready.
+
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --app simple_api:app --runs 10 --top 20
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Should stay unloaded until a route needs them
+DEFERRED = ['aiohttp', 'requests', 'asyncio', 'llm_router', 'chat_engine', 'llm_scheduler', 'numpy']
+READY_BUDGET_MS = 100.0
+
+CHILD = '''
+import importlib, json, sys, time
+start = time.perf_counter()
+app = getattr(importlib.import_module({module!r}), {attr!r})
+imported = time.perf_counter()
+status = app.test_client().get('/api/health').status_code
+ready = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'ready_ms': (ready - start) * 1000,
+                  'status': status, 'loaded': [m for m in {deferred!r} if m in sys.modules]}}))
+'''
+
+IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr: str):
+    """(module, self_us, cumulative_us, depth) per line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)),
+                         len(match.group(3)) // 2))
+    return rows
+
+
+def local_modules():
+    return {name[:-3] for name in os.listdir(ROOT) if name.endswith('.py')}
+
+
+def cold_start(target: str, runs: int):
+    module, _, attr = target.partition(':')
+    code = CHILD.format(module=module, attr=attr or 'app', deferred=DEFERRED)
+    results = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                              capture_output=True, text=True, check=True)
+        wall_ms = (time.perf_counter() - started) * 1000
+        summary = json.loads(proc.stdout.strip().splitlines()[-1])
+        summary['wall_ms'] = wall_ms
+        results.append((summary, parse_importtime(proc.stderr)))
+    return results
+
+
+def fork_start(target: str, workers: int):
+    module, _, attr = target.partition(':')
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    app = getattr(__import__(module), attr or 'app')
+    timings = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            status = app.test_client().get('/api/health').status_code
+            os.write(write_fd, json.dumps([(time.perf_counter() - forked) * 1000, status]).encode())
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            timings.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+    return timings
+
+
+def report_cold(results, top: int):
+    summaries = [summary for summary, _ in results]
+    print(f"Cold start over {len(results)} runs (median)")
+    for key, label in (('wall_ms', 'process start to exit'), ('import_ms', 'import app'),
+                       ('ready_ms', 'import + first /api/health')):
+        print(f"  {label:<30}{statistics.median(s[key] for s in summaries):>9.1f} ms")
+    loaded = sorted({m for s in summaries for m in s['loaded']})
+    print(f"  deferred modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+    # Breakdown from the median run, self time summed per top-level package
+    _, rows = sorted(results, key=lambda r: r[0]['ready_ms'])[len(results) // 2]
+    ours = local_modules()
+    packages = {}
+    for name, self_us, _, _ in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    total = sum(packages.values())
+    print(f"\n{'package':<28}{'self ms':>10}{'share':>8}")
+    for package, self_us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+        marker = ' *' if package in ours else ''
+        print(f"{package + marker:<28}{self_us / 1000:>10.1f}{self_us / total:>8.1%}")
+    moduro_us = sum(us for package, us in packages.items() if package in ours)
+    print(f"{'(* Moduro modules, total)':<28}{moduro_us / 1000:>10.1f}{moduro_us / total:>8.1%}")
+
+    print(f"\n{'slowest Moduro imports':<28}{'cumulative ms':>14}")
+    local = [(name, cumulative) for name, _, cumulative, _ in rows if name in ours]
+    for name, cumulative in sorted(local, key=lambda r: -r[1])[:top]:
+        print(f"{name:<28}{cumulative / 1000:>14.1f}")
+
+
+def report_fork(timings):
+    ready = [ms for ms, _ in timings]
+    statuses = sorted({status for _, status in timings})
+    verdict = 'within' if max(ready) < READY_BUDGET_MS else 'OVER'
+    print(f"\nForked workers ({len(timings)}): first /api/health after fork "
+          f"median {statistics.median(ready):.1f} ms, max {max(ready):.1f} ms "
+          f"(status {statuses}; {verdict} the {READY_BUDGET_MS:.0f} ms budget)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--app', default='app:app', help='module:variable of the Flask app')
+    parser.add_argument('--runs', type=int, default=5, help='cold-start runs')
+    parser.add_argument('--workers', type=int, default=5, help='forked workers to time')
+    parser.add_argument('--top', type=int, default=12, help='rows per breakdown table')
+    args = parser.parse_args()
+
+    report_cold(cold_start(args.app, args.runs), args.top)
+    if hasattr(os, 'fork'):
+        report_fork(fork_start(args.app, args.workers))
+
+
+if __name__ == '__main__':
+    main()
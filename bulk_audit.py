@@ -0,0 +1,211 @@
+"""
+Bulk SEO audits: many URLs through a bounded worker pool, results streamed.
+
+A BulkAudit takes its URLs from an async iterator: a parsed sitemap or a
+submitted list. A fixed number of workers audit them concurrently, and each
+result is handed to the consumer as soon as it is ready. Memory stays bounded
+however many URLs there are:
+
+* sitemaps are parsed incrementally while they download (gzip included), and
+  parsed elements are dropped at once;
+* URLs wait in a queue of at most `2 * concurrency` entries, so the sitemap
+  reader pauses while the workers are busy;
+* results wait in a queue of the same size, so the workers pause when the
+  client reads slowly;
+* duplicates are detected with 8-byte hashes, and at most `max_urls` URLs are
+  audited.
+
+Everything runs on the crawler's event loop (see crawler_loop.py). A Flask
+view pulls finished results with `CrawlerLoop.run(audit.next_batch())` and
+writes them out as NDJSON lines.
+"""
+
+import asyncio
+import hashlib
+import logging
+import zlib
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+from xml.etree.ElementTree import XMLPullParser
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_BYTES = 64 * 1024
+# Nested sitemaps followed from sitemap indexes
+MAX_SITEMAPS = 1000
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+async def sitemap_urls(session, sitemap_url: str, timeout: float = 60.0,
+                       user_agent: str = 'ModuroSEOBot/1.0') -> AsyncIterator[str]:
+    """Page URLs of a sitemap, following sitemap indexes, parsed as they download"""
+    import aiohttp
+
+    pending = [sitemap_url]
+    visited = set()
+    while pending:
+        current = pending.pop(0)
+        if current in visited:
+            continue
+        visited.add(current)
+        parser = XMLPullParser(events=('start', 'end'))
+        root = None
+        loc = None
+        decompressor = None
+        async with session.get(current, headers={'User-Agent': user_agent},
+                               timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            response.raise_for_status()
+            first = True
+            while True:
+                chunk = await response.content.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                # .xml.gz sitemaps arrive gzipped without Content-Encoding
+                if first and chunk[:2] == b'\x1f\x8b':
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+                if first:
+                    first = False
+                    if b'<!DOCTYPE' in chunk[:1024].upper():
+                        # Sitemaps have no DTD; refuse entity-expansion bombs
+                        raise ValueError(f"{current} declares a DOCTYPE")
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    if event == 'start':
+                        if root is None:
+                            root = element
+                        continue
+                    name = _local_name(element.tag)
+                    if name == 'loc':
+                        loc = (element.text or '').strip()
+                    elif name in ('url', 'sitemap'):
+                        if loc and name == 'url':
+                            yield loc
+                        elif loc and len(visited) + len(pending) < MAX_SITEMAPS:
+                            pending.append(loc)
+                        loc = None
+                        # Drop parsed entries so a 50,000-URL sitemap is never held
+                        root.clear()
+        parser.close()
+
+
+async def iterate(urls: Iterable[str]) -> AsyncIterator[str]:
+    """A submitted URL list as an async iterator"""
+    for url in urls:
+        yield url
+
+
+class BulkAudit:
+    """Audits URLs from an async iterator with a fixed pool of workers"""
+
+    _DONE = object()
+
+    def __init__(self, urls: AsyncIterator[str], audit: Callable[[str], Awaitable[Dict]],
+                 concurrency: int = 16, max_urls: int = 50000):
+        self.urls = urls
+        self.audit = audit
+        self.concurrency = max(1, concurrency)
+        self.max_urls = max_urls
+        self.submitted = 0
+        self.duplicates = 0
+        self.completed = 0
+        self.failed = 0
+        self.truncated = False
+        self.source_error: Optional[str] = None
+        self._results: Optional[asyncio.Queue] = None
+        self._finished = False
+
+    @staticmethod
+    def _fingerprint(url: str) -> int:
+        return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def _result_queue(self) -> asyncio.Queue:
+        # Created on the crawler loop, by whichever of run() and next() runs first
+        if self._results is None:
+            self._results = asyncio.Queue(maxsize=2 * self.concurrency)
+        return self._results
+
+    async def run(self):
+        """Feed URLs to the workers until the source is exhausted or max_urls is hit"""
+        results = self._result_queue()
+        todo: asyncio.Queue = asyncio.Queue(maxsize=2 * self.concurrency)
+        workers = [asyncio.ensure_future(self._worker(todo, results)) for _ in range(self.concurrency)]
+        seen = set()
+        try:
+            try:
+                async for url in self.urls:
+                    url = url.strip()
+                    if not url.startswith(('http://', 'https://')):
+                        continue
+                    fingerprint = self._fingerprint(url)
+                    if fingerprint in seen:
+                        self.duplicates += 1
+                        continue
+                    if self.submitted >= self.max_urls:
+                        self.truncated = True
+                        break
+                    seen.add(fingerprint)
+                    self.submitted += 1
+                    await todo.put(url)
+            except Exception as e:
+                self.source_error = f"{type(e).__name__}: {e}"
+                logger.warning("Bulk audit URL source failed: %s", e)
+            finally:
+                # Closes the sitemap download when max_urls cut it short
+                aclose = getattr(self.urls, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
+            for _ in workers:
+                await todo.put(None)
+            await asyncio.gather(*workers)
+            await results.put(self._DONE)
+        finally:
+            # Also reached when the consumer went away and cancelled the run
+            for worker in workers:
+                worker.cancel()
+
+    async def _worker(self, todo: asyncio.Queue, results: asyncio.Queue):
+        while True:
+            url = await todo.get()
+            if url is None:
+                return
+            try:
+                result = await self.audit(url)
+            except Exception as e:
+                result = {'url': url, 'error': f"{type(e).__name__}: {e}"}
+            if 'error' in result:
+                self.failed += 1
+            self.completed += 1
+            await results.put(result)
+
+    async def next_batch(self, limit: int = 256) -> List[Dict]:
+        """Results finished so far (waiting for at least one); [] once all are done
+
+        A consumer on another thread collects results in batches: every call
+        from there costs a thread hand-off, and while the loop is busy parsing
+        pages that can take a whole GIL switch interval (5 ms).
+        """
+        results = self._result_queue()
+        if self._finished:
+            return []
+        batch = [await results.get()]
+        while len(batch) < limit and not results.empty():
+            batch.append(results.get_nowait())
+        if batch[-1] is self._DONE:
+            self._finished = True
+            batch.pop()
+        return batch
+
+    def summary(self) -> Dict:
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'duplicates': self.duplicates,
+            'truncated': self.truncated,
+            'source_error': self.source_error
+        }
+
@@ -0,0 +1,247 @@
+"""
+Context-aware chat engine for /api/chat.
+
+Conversations are kept per session in a bounded in-memory store. Each prompt
+is built from the current platform state (dataset analysis, last code
+analysis), chunks retrieved from uploaded material, a rolling summary of
+older turns and the most recent turns that fit in the prompt budget, so
+prompt size stays flat as a conversation grows.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+from semantic_cache import SemanticCache, scope_key
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are the Moduro AI assistant. You help users analyze uploaded data "
+    "and improve Python code on the Moduro platform. Answer concisely and "
+    "refer to the platform state below when it is relevant."
+)
+
+# Appended to a message cut to fit the prompt budget
+TRUNCATED = ' [message truncated]'
+
+
+class Conversation:
+    """Recent turns plus a rolling summary of everything older"""
+
+    def __init__(self, max_turns: int):
+        self.turns: Deque[Dict] = deque()
+        self.max_turns = max_turns
+        self.summary = ''
+        self.updated_at = time.time()
+
+    def add(self, role: str, content: str, summary_chars: int):
+        self.turns.append({'role': role, 'content': content})
+        while len(self.turns) > self.max_turns:
+            self.fold(self.turns.popleft(), summary_chars)
+        self.updated_at = time.time()
+
+    def fold(self, turn: Dict, summary_chars: int):
+        """Fold an evicted turn into the summary, keeping its first sentence"""
+        gist = turn['content'].strip().split('\n', 1)[0]
+        gist = gist.split('. ', 1)[0][:160]
+        line = f"{turn['role']}: {gist}"
+        self.summary = f"{self.summary}\n{line}" if self.summary else line
+        if len(self.summary) > summary_chars:
+            # Drop the oldest summary lines first
+            self.summary = self.summary[-summary_chars:].split('\n', 1)[-1]
+
+
+class ConversationStore:
+    """Bounded LRU store of conversations keyed by session id"""
+
+    def __init__(self, max_sessions: int = 1000, max_turns: int = 40,
+                 summary_chars: int = 1200, session_ttl: float = 3600):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.summary_chars = summary_chars
+        self.session_ttl = session_ttl
+        self._sessions: 'OrderedDict[str, Conversation]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new_session_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def snapshot(self, session_id: str):
+        """Return (summary, turns) for a session without creating it"""
+        with self._lock:
+            conv = self._sessions.get(session_id)
+            if conv is None or time.time() - conv.updated_at > self.session_ttl:
+                return '', []
+            self._sessions.move_to_end(session_id)
+            return conv.summary, list(conv.turns)
+
+    def append(self, session_id: str, role: str, content: str):
+        with self._lock:
+            conv = self._sessions.get(session_id)
+            if conv is None or time.time() - conv.updated_at > self.session_ttl:
+                conv = Conversation(self.max_turns)
+                self._sessions[session_id] = conv
+            self._sessions.move_to_end(session_id)
+            conv.add(role, content, self.summary_chars)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'max_turns': self.max_turns
+            }
+
+
+def summarize_platform_state(state: Dict) -> str:
+    """Render the platform state as a short block of prompt text"""
+    lines = []
+    records = state.get('records', 0)
+    lines.append(f"Dataset: {records} records loaded" if records else "Dataset: none uploaded")
+
+    analysis = state.get('analysis') or {}
+    if analysis:
+        insights = '; '.join(analysis.get('insights', [])[:3])
+        lines.append(f"Data analysis: {analysis.get('total_records', 0)} records. {insights}")
+
+    code = state.get('code_analysis') or {}
+    if code:
+        functions = ', '.join(f['name'] for f in code.get('functions', [])[:10])
+        classes = ', '.join(c['name'] for c in code.get('classes', [])[:10])
+        lines.append(
+            f"Last code analysis: complexity {code.get('complexity', 0)}; "
+            f"functions: {functions or 'none'}; classes: {classes or 'none'}"
+        )
+    return '\n'.join(lines)
+
+
+class ChatEngine:
+    """Builds bounded prompts from conversation memory and platform state"""
+
+    def __init__(self, generate_stream: Callable[[str, str], Iterator[str]],
+                 model: str,
+                 context_provider: Callable[[], Dict],
+                 store: Optional[ConversationStore] = None,
+                 max_prompt_chars: int = 6000,
+                 retriever: Optional[Callable[[str], List[Dict]]] = None,
+                 retrieval_chars: int = 2000,
+                 cache: Optional[SemanticCache] = None):
+        self.generate_stream = generate_stream
+        self.model = model
+        self.context_provider = context_provider
+        self.store = store or ConversationStore()
+        self.max_prompt_chars = max_prompt_chars
+        self.retriever = retriever
+        self.retrieval_chars = retrieval_chars
+        self.cache = cache
+
+    def retrieve_context(self, message: str) -> List[str]:
+        """Top retrieved chunks for the message, within retrieval_chars"""
+        if self.retriever is None:
+            return []
+        try:
+            hits = self.retriever(message)
+        except Exception as e:
+            logger.warning("Retrieval failed: %s", e)
+            return []
+        lines = []
+        budget = self.retrieval_chars
+        for hit in hits:
+            text = f"[{hit['source']}]\n{hit['text']}"[:budget]
+            if len(text) < 40:
+                break
+            lines.append(text)
+            budget -= len(text) + 1
+        return lines
+
+    def build_prompt(self, session_id: str, message: str) -> str:
+        """Prompt of at most max_prompt_chars
+
+        The message gets up to half the budget and is cut beyond that. Then
+        come the system prompt and platform state, the retrieved chunks, the
+        summary and the recent turns, each only while it still fits.
+        """
+        summary, turns = self.store.snapshot(session_id)
+        limit = self.max_prompt_chars // 2
+        if len(message) > limit:
+            message = message[:limit - len(TRUNCATED)] + TRUNCATED if limit > len(TRUNCATED) else message[:limit]
+        footer = f"user: {message}\nassistant:"
+        # One line is kept for the blank line closing the header
+        budget = self.max_prompt_chars - len(footer) - 1
+
+        header: List[str] = []
+        base = [SYSTEM_PROMPT, '', 'Platform state:', summarize_platform_state(self.context_provider())]
+        for line in base:
+            if budget < 1:
+                break
+            line = line[:budget - 1]
+            header.append(line)
+            budget -= len(line) + 1
+        intro = ['', 'Relevant material from uploaded data and code:']
+        for chunk in self.retrieve_context(message):
+            lines = [chunk] if intro is None else intro + [chunk]
+            size = sum(len(line) + 1 for line in lines)
+            if size > budget:
+                break
+            header += lines
+            budget -= size
+            intro = None
+        if summary:
+            lines = ['', 'Earlier in this conversation:', summary]
+            size = sum(len(line) + 1 for line in lines)
+            if size <= budget:
+                header += lines
+                budget -= size
+        header.append('')
+
+        recent: List[str] = []
+        # Walk back from the newest turn until the budget is spent
+        for turn in reversed(turns):
+            line = f"{turn['role']}: {turn['content']}"
+            if len(line) + 1 > budget:
+                break
+            recent.append(line)
+            budget -= len(line) + 1
+        recent.reverse()
+        return '\n'.join(header + recent + [footer])
+
+    def stream_reply(self, session_id: str, message: str) -> Iterator[str]:
+        """Yield reply tokens; the turn pair is stored once the reply completes
+
+        Only opening messages use the answer cache: a later reply depends on
+        the conversation so far, which belongs to one session. A failed or
+        abandoned generation raises or stops before anything is cached, so
+        the caller's offline fallback never is, and neither is an empty reply.
+        """
+        scope = None
+        summary, turns = self.store.snapshot(session_id)
+        if self.cache is not None and not summary and not turns:
+            # Answers are only reused while the platform state is unchanged
+            scope = scope_key(self.model, summarize_platform_state(self.context_provider()))
+            cached = self.cache.lookup(scope, message)
+            if cached is not None:
+                yield cached
+                self.store.append(session_id, 'user', message)
+                self.store.append(session_id, 'assistant', cached)
+                return
+
+        start = time.monotonic()
+        prompt = self.build_prompt(session_id, message)
+        tokens = []
+        for token in self.generate_stream(self.model, prompt):
+            tokens.append(token)
+            yield token
+        reply = ''.join(tokens)
+        if scope is not None and reply.strip():
+            self.cache.store(scope, message, reply, time.monotonic() - start)
+        self.store.append(session_id, 'user', message)
+        self.store.append(session_id, 'assistant', reply)
+
+    def reply(self, session_id: str, message: str) -> str:
+        return ''.join(self.stream_reply(session_id, message))
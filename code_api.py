@@ -0,0 +1,211 @@
+"""
+Code-analysis subsystem: Python code analysis and expansion.
+"""
+
+import ast
+import logging
+import os
+import traceback
+
+from flask import Blueprint, jsonify
+
+from engine import engine
+from request_limits import body_limit, read_json_body
+from retrieval_index import chunk_code
+
+logger = logging.getLogger(__name__)
+
+blueprint = Blueprint('code', __name__)
+state = engine.state
+
+MAX_CODE_BYTES = int(os.environ.get('MODURO_MAX_CODE_BYTES', 2 * 1024 * 1024))
+
+
+@blueprint.route('/api/analyze-python', methods=['POST'])
+@body_limit(MAX_CODE_BYTES)
+def analyze_python_code():
+    logger.info("Python code analysis requested")
+    data = read_json_body()
+    try:
+        code = data.get('code', '')
+        
+        logger.info("Analyzing code (%s characters)", len(code))
+        
+        if not code.strip():
+            logger.warning("Empty code provided for analysis")
+            return jsonify({
+                'analysis': {
+                    'complexity': 0,
+                    'functions': [],
+                    'classes': [],
+                    'imports': [],
+                    'suggestions': ['Please provide code to analyze']
+                }
+            })
+        
+        # Parse Python code
+        try:
+            with engine.tracer.span('parse', **{'code.chars': len(code)}):
+                tree = ast.parse(code)
+            logger.info("Code parsed successfully")
+        except SyntaxError as e:
+            logger.warning("Syntax error in code: %s", e)
+            return jsonify({
+                'analysis': {
+                    'complexity': 0,
+                    'functions': [],
+                    'classes': [],
+                    'imports': [],
+                    'suggestions': [f'Syntax error: {str(e)}']
+                }
+            })
+        
+        # Analyze code structure
+        with engine.tracer.span('analyze'):
+            functions = []
+            classes = []
+            imports = []
+        
+            for node in ast.walk(tree):
+                if isinstance(node, ast.FunctionDef):
+                    functions.append({
+                        'name': node.name,
+                        'args': len(node.args.args),
+                        'lineno': node.lineno
+                    })
+                elif isinstance(node, ast.ClassDef):
+                    classes.append({
+                        'name': node.name,
+                        'methods': len([n for n in node.body if isinstance(n, ast.FunctionDef)]),
+                        'lineno': node.lineno
+                    })
+                elif isinstance(node, ast.Import):
+                    for alias in node.names:
+                        imports.append(alias.name)
+                elif isinstance(node, ast.ImportFrom):
+                    module = node.module or ''
+                    for alias in node.names:
+                        imports.append(f"{module}.{alias.name}")
+        
+        complexity = len(functions) + len(classes) * 2
+        
+        analysis = {
+            'complexity': complexity,
+            'functions': functions,
+            'classes': classes,
+            'imports': imports,
+            'suggestions': [
+                f'Found {len(functions)} functions and {len(classes)} classes',
+                f'Code complexity score: {complexity}',
+                'Consider adding docstrings for better documentation',
+                'Use type hints to improve code clarity'
+            ]
+        }
+        
+        state.code_analysis_results = analysis
+        with engine.tracer.span('index'):
+            engine.retrieval_index.add_source(f"code:{data.get('filename') or 'editor'}", chunk_code(code))
+        
+        logger.info("Code analysis completed: %s functions, %s classes, complexity %s", len(functions), len(classes), complexity)
+        
+        with engine.tracer.span('serialize'):
+            return jsonify({'analysis': analysis})
+        
+    except Exception as e:
+        logger.error("Code analysis error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Code analysis failed'}), 500
+
+@blueprint.route('/api/expand-python', methods=['POST'])
+@body_limit(MAX_CODE_BYTES)
+@engine.admission.limit(rate=2, burst=5, max_concurrent=4)
+def expand_python_code():
+    logger.info("Python code expansion requested")
+    data = read_json_body()
+    try:
+        code = data.get('code', '')
+        
+        logger.info("Expanding code (%s characters)", len(code))
+        
+        if not code.strip():
+            logger.warning("Empty code provided for expansion")
+            return jsonify({
+                'expanded_code': '',
+                'metrics': {
+                    'original_lines': 0,
+                    'original_chars': 0,
+                    'new_lines': 0,
+                    'new_chars': 0,
+                    'total_lines': 0,
+                    'total_chars': 0,
+                    'expansion_rate': 0
+                }
+            })
+        
+        # Simulate AI code expansion
+        original_lines = len(code.split('\n'))
+        original_chars = len(code)
+        
+        # Add documentation, error handling, and type hints
+        expanded_code = f'''"""
+Enhanced version of the provided code with additional features.
+Generated by Moduro AI Platform.
+"""
+
+{code}
+
+# Additional utility functions
+def validate_input(data):
+    """Validate input data."""
+    if not data:
+        raise ValueError("Data cannot be empty")
+    return True
+
+def process_result(result):
+    """Process and format the result."""
+    if isinstance(result, (list, tuple)):
+        return [str(item) for item in result]
+    return str(result)
+
+# Error handling wrapper
+def safe_execute(func, *args, **kwargs):
+    """Safely execute a function with error handling."""
+    try:
+        return func(*args, **kwargs)
+    except Exception as exc:
+        print(f"Error executing {{func.__name__}}: {{exc}}")
+        return None
+'''
+        
+        new_lines = len(expanded_code.split('\n')) - original_lines
+        new_chars = len(expanded_code) - original_chars
+        total_lines = original_lines + new_lines
+        total_chars = original_chars + new_chars
+        expansion_rate = (new_chars / original_chars * 100) if original_chars > 0 else 0
+        
+        expansion_metrics = {
+            'original_lines': original_lines,
+            'original_chars': original_chars,
+            'new_lines': new_lines,
+            'new_chars': new_chars,
+            'total_lines': total_lines,
+            'total_chars': total_chars,
+            'expansion_rate': round(expansion_rate, 2)
+        }
+        
+        state.code_expansion_results = expanded_code
+        state.metrics['total_lines'] += total_lines
+        state.metrics['total_chars'] += total_chars
+        state.metrics['expansions'] += 1
+        
+        logger.info("Code expansion completed: +%s lines, +%s chars, %.1f%% expansion", new_lines, new_chars, expansion_rate)
+        
+        return jsonify({
+            'expanded_code': expanded_code,
+            'metrics': expansion_metrics
+        })
+        
+    except Exception as e:
+        logger.error("Code expansion error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Code expansion failed'}), 500
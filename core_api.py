@@ -0,0 +1,92 @@
+"""
+Core routes mounted in every Moduro app: health, module registry, platform
+metrics and the metrics of the shared engine services.
+"""
+
+import logging
+import traceback
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify
+
+from engine import engine
+
+logger = logging.getLogger(__name__)
+
+blueprint = Blueprint('core', __name__)
+
+
+@blueprint.route('/api/health')
+@engine.response_cache.cached(ttl=1.0)
+def health_check():
+    logger.info("Health check requested")
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'version': '1.0.0'
+    })
+
+@blueprint.route('/api/modules')
+@engine.response_cache.cached('modules')
+def get_modules():
+    logger.info("Modules request")
+    try:
+        logger.info("Returning %s modules", len(engine.state.modules))
+        return jsonify({'modules': engine.state.modules})
+        
+    except Exception as e:
+        logger.error("Modules error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Failed to get modules'}), 500
+
+@blueprint.route('/api/execute', methods=['POST'])
+def execute_function():
+    logger.info("Function execution requested")
+    try:
+        data = request.get_json()
+        function_name = data.get('function', '')
+        params = data.get('params', {})
+        
+        logger.info("Executing function: %s with params: %s", function_name, params)
+        
+        # Simulate function execution
+        result = {
+            'function': function_name,
+            'status': 'success',
+            'message': f'Function {function_name} executed successfully',
+            'result': f'Simulated result for {function_name}',
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        logger.info("Function %s executed successfully", function_name)
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error("Function execution error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Function execution failed'}), 500
+
+@blueprint.route('/api/metrics')
+def get_metrics():
+    logger.info("Metrics request")
+    try:
+        logger.info("Returning metrics: %s", engine.state.metrics)
+        return jsonify(engine.state.metrics)
+        
+    except Exception as e:
+        logger.error("Metrics error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Failed to get metrics'}), 500
+
+@blueprint.route('/api/logging')
+def logging_metrics():
+    return jsonify({**engine.log_pipeline.get_metrics(), 'tracing': engine.tracer.get_metrics()})
+
+@blueprint.route('/api/admission')
+def admission_metrics():
+    return jsonify(engine.admission.get_metrics())
+
+@blueprint.route('/api/response-cache')
+def response_cache_metrics():
+    return jsonify(engine.response_cache.get_metrics())
@@ -0,0 +1,384 @@
+"""
+Disk cache of crawled pages with HTTP conditional revalidation.
+
+Each cached URL is two files under the cache directory, named by a hash of
+the URL:
+
+* `<hash>.json`: status, final URL, response headers, validators (ETag,
+  Last-Modified), freshness lifetime, fetch time and the measured ttfb and
+  load time;
+* `<hash>.body`: the response body, zlib-compressed.
+
+An in-memory index of the metadata answers lookups without touching disk. The
+body is only read for a page that is actually served from the cache. The
+index is loaded from the directory on start-up. An entry missing from it is
+looked up on disk as well, so pre-fork workers sharing one directory see each
+other's entries. Files are written to a temporary name and renamed into place.
+The directory must belong to the current user and not be writable by others,
+who could otherwise plant entries; by default it is a per-user cache directory.
+When the bodies exceed `max_bytes`, the least recently used entries are
+evicted.
+
+Freshness follows RFC 9111 for a private cache:
+
+* `no-store` responses are never stored;
+* `no-cache` responses are stored but revalidated on every use;
+* `max-age`, or else `Expires` minus `Date`, gives the freshness lifetime,
+  less any `Age` the response already had;
+* without either, 10% of the time since `Last-Modified` is used (at most a
+  day), or `default_ttl`.
+
+A fresh entry is served without a request. A stale one is revalidated with
+If-None-Match / If-Modified-Since. A 304 refreshes its metadata and the cached
+body is served.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_SECONDS = 24 * 3600
+# Only complete, successful responses are worth keeping
+CACHEABLE_STATUSES = frozenset([200, 203])
+
+
+def default_directory() -> str:
+    """Per-user cache directory: under $XDG_CACHE_HOME, %LOCALAPPDATA% or ~/.cache"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+    if not base:
+        home = os.path.expanduser('~')
+        if home == '~':
+            # No home directory; fall back to one temp directory per user
+            uid = os.getuid() if hasattr(os, 'getuid') else 'user'
+            return os.path.join(tempfile.gettempdir(), f'moduro-crawl-cache-{uid}')
+        base = os.path.join(home, '.cache')
+    return os.path.join(base, 'moduro', 'crawl')
+
+
+def ensure_private_directory(directory: str):
+    """Create `directory` for this user only; refuse one that others own or can write to"""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return
+    st = os.stat(directory)
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{directory} belongs to uid {st.st_uid}, not to this user")
+    if st.st_mode & 0o022:
+        raise PermissionError(f"{directory} is writable by other users (mode {st.st_mode & 0o777:o})")
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Cache-Control directives, lowercased, with their values if any"""
+    directives = {}
+    for part in value.split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness(headers: Dict[str, str], default_ttl: float = 0.0) -> Optional[float]:
+    """Seconds a response stays fresh from now; None when it must not be stored"""
+    lower = {k.lower(): v for k, v in headers.items()}
+    cc = parse_cache_control(lower.get('cache-control', ''))
+    if 'no-store' in cc:
+        return None
+    if 'no-cache' in cc:
+        return 0.0
+    age = _seconds(lower.get('age')) or 0
+    max_age = _seconds(cc.get('max-age'))
+    if max_age is not None:
+        return max(0.0, max_age - age)
+    date = _http_date(lower.get('date')) or time.time()
+    expires = lower.get('expires')
+    if expires is not None:
+        # An invalid Expires, such as "0", means already expired
+        expires_at = _http_date(expires)
+        return max(0.0, expires_at - date - age) if expires_at is not None else 0.0
+    last_modified = _http_date(lower.get('last-modified'))
+    if last_modified is not None and last_modified < date:
+        return min(HEURISTIC_MAX_SECONDS, (date - last_modified) * HEURISTIC_FRACTION)
+    return default_ttl
+
+
+class CacheEntry:
+    """Metadata of one cached response; the body stays on disk"""
+
+    __slots__ = ('url', 'key', 'status', 'final_url', 'headers', 'etag', 'last_modified',
+                 'fetched_at', 'lifetime', 'ttfb', 'load_time', 'size', 'stored_bytes')
+
+    def __init__(self, url: str, key: str, status: int, final_url: str, headers: Dict[str, str],
+                 fetched_at: float, lifetime: float, ttfb: Optional[float], load_time: Optional[float],
+                 size: int, stored_bytes: int):
+        self.url = url
+        self.key = key
+        self.status = status
+        self.final_url = final_url
+        self.headers = headers
+        lower = {k.lower(): v for k, v in headers.items()}
+        self.etag = lower.get('etag')
+        self.last_modified = lower.get('last-modified')
+        self.fetched_at = fetched_at
+        self.lifetime = lifetime
+        self.ttfb = ttfb
+        self.load_time = load_time
+        self.size = size
+        self.stored_bytes = stored_bytes
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.fetched_at < self.lifetime
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__
+                if name not in ('etag', 'last_modified')}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CacheEntry':
+        return cls(**data)
+
+
+class CrawlCache:
+    """Compressed page bodies on disk behind an in-memory metadata index"""
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024,
+                 default_ttl: float = 0.0, compress_level: int = 6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.compress_level = compress_level
+        ensure_private_directory(directory)
+        self._index: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.changed = 0
+        self.misses = 0
+        self.stores = 0
+        self.uncacheable = 0
+        self.evictions = 0
+        self._load_index()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _load_index(self):
+        entries = []
+        for item in os.scandir(self.directory):
+            if not item.name.endswith('.json'):
+                continue
+            entry = self._read_meta(item.path)
+            if entry is not None:
+                entries.append(entry)
+        # Least recently fetched first, so eviction starts with them
+        for entry in sorted(entries, key=lambda e: e.fetched_at):
+            self._index[entry.url] = entry
+            self._bytes += entry.stored_bytes
+        if entries:
+            logger.info("Crawl cache: %s entries (%.1f MB) in %s", len(entries),
+                        self._bytes / 1e6, self.directory)
+
+    @staticmethod
+    def _read_meta(path: str) -> Optional[CacheEntry]:
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                return CacheEntry.from_dict(json.load(fh))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _write(self, path: str, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Metadata for `url`, fresh or stale; None when nothing is cached"""
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is not None:
+                self._index.move_to_end(url)
+                return entry
+        # Possibly stored by another worker sharing the directory
+        entry = self._read_meta(self._path(self.key(url), '.json'))
+        if entry is None or entry.url != url:
+            return None
+        with self._lock:
+            if url not in self._index:
+                self._bytes += entry.stored_bytes
+            self._index[url] = entry
+        return entry
+
+    def body(self, entry: CacheEntry) -> Optional[bytes]:
+        """Decompressed body of an entry; None if its file has gone"""
+        try:
+            with open(self._path(entry.key, '.body'), 'rb') as fh:
+                return zlib.decompress(fh.read())
+        except (OSError, zlib.error):
+            self.discard(entry.url)
+            return None
+
+    def store(self, url: str, status: int, final_url: str, headers: Dict[str, str], body: bytes,
+              ttfb: Optional[float], load_time: Optional[float], complete: bool = True) -> Optional[CacheEntry]:
+        """Cache a full response if its status and Cache-Control allow it
+
+        A body cut off before its end (`complete` False) is never cached.
+        """
+        lifetime = freshness(headers, self.default_ttl) if status in CACHEABLE_STATUSES and complete else None
+        if lifetime is None:
+            with self._lock:
+                self.uncacheable += 1
+            self.discard(url)
+            return None
+        key = self.key(url)
+        compressed = zlib.compress(body, self.compress_level)
+        entry = CacheEntry(url, key, status, final_url, headers, time.time(), lifetime,
+                           ttfb, load_time, len(body), len(compressed))
+        try:
+            self._write(self._path(key, '.body'), compressed)
+            self._write(self._path(key, '.json'), json.dumps(entry.to_dict()).encode('utf-8'))
+        except OSError as e:
+            logger.warning("Crawl cache write failed for %s: %s", url, e)
+            return None
+        with self._lock:
+            previous = self._index.pop(url, None)
+            if previous is not None:
+                self._bytes -= previous.stored_bytes
+            self._index[url] = entry
+            self._bytes += entry.stored_bytes
+            self.stores += 1
+        self._evict()
+        return entry
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str]) -> CacheEntry:
+        """Apply a 304's headers to an entry and restart its freshness"""
+        merged = dict(entry.headers)
+        lower = {k.lower(): k for k in merged}
+        for name, value in headers.items():
+            merged[lower.get(name.lower(), name)] = value
+        lifetime = freshness(merged, self.default_ttl)
+        refreshed = CacheEntry(entry.url, entry.key, entry.status, entry.final_url, merged,
+                               time.time(), lifetime or 0.0, entry.ttfb, entry.load_time,
+                               entry.size, entry.stored_bytes)
+        try:
+            self._write(self._path(entry.key, '.json'), json.dumps(refreshed.to_dict()).encode('utf-8'))
+        except OSError as e:
+            logger.warning("Crawl cache update failed for %s: %s", entry.url, e)
+        with self._lock:
+            if entry.url in self._index:
+                self._index[entry.url] = refreshed
+        return refreshed
+
+    def record(self, outcome: str):
+        """Count a lookup outcome: 'hits', 'revalidated', 'changed' or 'misses'"""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def discard(self, url: str):
+        with self._lock:
+            entry = self._index.pop(url, None)
+            if entry is not None:
+                self._bytes -= entry.stored_bytes
+        key = entry.key if entry is not None else self.key(url)
+        for suffix in ('.json', '.body'):
+            try:
+                os.unlink(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._bytes <= self.max_bytes or not self._index:
+                    return
+                url, entry = self._index.popitem(last=False)
+                self._bytes -= entry.stored_bytes
+                self.evictions += 1
+            for suffix in ('.json', '.body'):
+                try:
+                    os.unlink(self._path(entry.key, suffix))
+                except OSError:
+                    pass
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.revalidated + self.changed + self.misses
+            return {
+                'directory': self.directory,
+                'entries': len(self._index),
+                'stored_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'changed': self.changed,
+                'misses': self.misses,
+                # Lookups answered without downloading the body again
+                'hit_rate': round((self.hits + self.revalidated) / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'uncacheable': self.uncacheable,
+                'evictions': self.evictions
+            }
+
+
+def crawl_cache_from_env() -> Optional[CrawlCache]:
+    """CrawlCache configured by MODURO_CRAWL_CACHE_* variables; None when disabled"""
+    if os.environ.get('MODURO_CRAWL_CACHE', '1').lower() in ('0', 'false', 'no'):
+        return None
+    directory = os.environ.get('MODURO_CRAWL_CACHE_DIR') or default_directory()
+    try:
+        return CrawlCache(
+            directory,
+            max_bytes=int(float(os.environ.get('MODURO_CRAWL_CACHE_MB', 512)) * 1024 * 1024),
+            default_ttl=float(os.environ.get('MODURO_CRAWL_CACHE_TTL', 0))
+        )
+    except OSError as e:
+        logger.warning("Crawl cache disabled, %s is not usable: %s", directory, e)
+        return None
@@ -0,0 +1,218 @@
+"""
+Long-lived event loop and HTTP session for the SEO crawler.
+
+Flask runs async views through asgiref, which creates a new event loop for
+every request. An aiohttp session is bound to the loop it was created on, so
+a session created inside one request is dead in the next. It also never gets
+closed. The crawler therefore owns one event loop in a dedicated thread, and
+one ClientSession on that loop, for the life of the process.
+
+Callers on any thread hand it coroutines:
+
+* `submit(coro)` returns a concurrent.futures.Future (plain threads);
+* `run(coro, timeout)` blocks for the result (sync Flask views);
+* `await call(coro)` awaits the result from another event loop (async Flask
+  views). On the crawler loop itself it simply awaits the coroutine.
+
+The TCPConnector is tuned for crawling: a total and a per-host connection cap,
+a DNS cache with a TTL, and idle keep-alive so that pages of one site reuse
+connections. Request, connection and DNS counters from an aiohttp TraceConfig
+show how often connections are reused.
+
+The loop starts on first use. Under the pre-fork server a worker therefore
+starts its own loop after the fork. A loop inherited from a master that had
+already started one is discarded in the child.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlerLoop:
+    """Event loop thread owning the crawler's ClientSession"""
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 8, dns_cache_ttl: int = 300,
+                 keepalive_timeout: float = 30.0, connect_timeout: float = 10.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.session = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._counters = dict.fromkeys(
+            ('requests', 'request_errors', 'connections_created', 'connections_reused',
+             'connection_queued', 'dns_cache_hits', 'dns_cache_misses', 'submitted'), 0)
+        if hasattr(os, 'register_at_fork'):
+            # The loop thread does not survive fork; the child starts its own
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.shutdown)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the loop thread and open the session; no-op when running"""
+        if self.running:
+            return
+        with self._lock:
+            if self.running:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            failure = []
+
+            def run():
+                asyncio.set_event_loop(loop)
+                try:
+                    self.session = loop.run_until_complete(self._open_session())
+                except Exception as e:
+                    failure.append(e)
+                    ready.set()
+                    return
+                ready.set()
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name='crawler-loop', daemon=True)
+            thread.start()
+            ready.wait()
+            if failure:
+                loop.close()
+                raise failure[0]
+            self._loop, self._thread = loop, thread
+            self._started_at = time.time()
+            logger.info("Crawler loop started (limit %s, %s per host, DNS TTL %ss, keep-alive %ss)",
+                        self.limit, self.limit_per_host, self.dns_cache_ttl, self.keepalive_timeout)
+
+    async def _open_session(self):
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout),
+            trace_configs=[self._trace_config()]
+        )
+
+    def _trace_config(self):
+        import aiohttp
+
+        counters = self._counters
+
+        def counting(key):
+            async def hook(session, context, params):
+                counters[key] += 1
+            return hook
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(counting('requests'))
+        trace.on_request_exception.append(counting('request_errors'))
+        trace.on_connection_create_end.append(counting('connections_created'))
+        trace.on_connection_reuseconn.append(counting('connections_reused'))
+        trace.on_connection_queued_start.append(counting('connection_queued'))
+        trace.on_dns_cache_hit.append(counting('dns_cache_hits'))
+        trace.on_dns_cache_miss.append(counting('dns_cache_misses'))
+        return trace
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedule a coroutine on the crawler loop from any thread"""
+        self.start()
+        self._counters['submitted'] += 1
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None):
+        """Run a coroutine on the crawler loop and block for its result"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def call(self, coro: Awaitable):
+        """Await a coroutine on the crawler loop from any event loop"""
+        if self.running and asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def shutdown(self, timeout: float = 5.0):
+        """Close the session, stop the loop and join its thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or thread is None or not thread.is_alive():
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout)
+            except Exception as e:
+                logger.warning("Crawler session did not close cleanly: %s", e)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+            self._loop = self._thread = self.session = None
+            logger.info("Crawler loop stopped")
+
+    async def _close(self):
+        # Cancel crawls still in flight, then close the connection pool
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._loop = self._thread = self.session = None
+        self._counters.update(dict.fromkeys(self._counters, 0))
+
+    def get_metrics(self) -> Dict:
+        counters = dict(self._counters)
+        opened = counters['connections_created'] + counters['connections_reused']
+        metrics = {
+            'running': self.running,
+            'uptime': round(time.time() - self._started_at, 1) if self.running else 0.0,
+            'connector': {
+                'limit': self.limit,
+                'limit_per_host': self.limit_per_host,
+                'dns_cache_ttl': self.dns_cache_ttl,
+                'keepalive_timeout': self.keepalive_timeout
+            },
+            **counters,
+            'connection_reuse_rate': round(counters['connections_reused'] / opened, 4) if opened else 0.0
+        }
+        session = self.session
+        if session is not None:
+            connector = session.connector
+            # Idle keep-alive connections waiting in the pool, per host
+            idle = getattr(connector, '_conns', {})
+            metrics['idle_connections'] = sum(len(conns) for conns in idle.values())
+            metrics['acquired_connections'] = len(getattr(connector, '_acquired', ()))
+        return metrics
+
+
+def crawler_loop_from_env() -> CrawlerLoop:
+    """CrawlerLoop configured by MODURO_CRAWL_* environment variables"""
+    return CrawlerLoop(
+        limit=int(os.environ.get('MODURO_CRAWL_CONNECTIONS', 100)),
+        limit_per_host=int(os.environ.get('MODURO_CRAWL_PER_HOST', 8)),
+        dns_cache_ttl=int(os.environ.get('MODURO_CRAWL_DNS_TTL', 300)),
+        keepalive_timeout=float(os.environ.get('MODURO_CRAWL_KEEPALIVE', 30.0))
+    )
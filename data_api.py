@@ -0,0 +1,158 @@
+"""
+Data subsystem: dataset upload, analysis and expansion.
+"""
+
+import logging
+import os
+import traceback
+
+from flask import Blueprint, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from engine import engine
+from request_limits import body_limit
+from retrieval_index import chunk_records
+
+logger = logging.getLogger(__name__)
+
+blueprint = Blueprint('data', __name__)
+state = engine.state
+
+# Uploads are spooled to disk past 1 MB, so this only bounds disk use
+MAX_UPLOAD_BYTES = int(os.environ.get('MODURO_MAX_UPLOAD_BYTES', 100 * 1024 * 1024))
+
+
+@blueprint.route('/api/upload', methods=['POST'])
+@body_limit(MAX_UPLOAD_BYTES)
+def upload_data():
+    logger.info("Data upload requested")
+    try:
+        if 'file' not in request.files:
+            logger.warning("No file in upload request")
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            logger.warning("Empty filename in upload")
+            return jsonify({'error': 'No file selected'}), 400
+        
+        logger.info("Processing file: %s", file.filename)
+        
+        # Simulate data processing
+        sample_data = [
+            {'id': 1, 'name': 'Sample 1', 'value': 100},
+            {'id': 2, 'name': 'Sample 2', 'value': 200},
+            {'id': 3, 'name': 'Sample 3', 'value': 300}
+        ]
+        
+        state.data_store = sample_data
+        engine.response_cache.invalidate('dataset')
+        engine.retrieval_index.add_source(f"dataset:{file.filename}", chunk_records(sample_data))
+        
+        logger.info("Upload successful, %s records processed", len(sample_data))
+        
+        return jsonify({
+            'data': sample_data,
+            'records': len(sample_data),
+            'message': 'Data uploaded successfully'
+        })
+        
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        logger.error("Upload error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Upload failed'}), 500
+
+@blueprint.route('/api/analyze', methods=['POST'])
+def analyze_data():
+    logger.info("Data analysis requested")
+    try:
+        if not state.data_store:
+            logger.warning("No data available for analysis")
+            return analysis_response({
+                'total_records': 0,
+                'patterns': [],
+                'insights': ['No data available for analysis'],
+                'recommendations': ['Upload data to begin analysis']
+            })
+        
+        logger.info("Analyzing %s records", len(state.data_store))
+        
+        # Simulate AI analysis
+        analysis = {
+            'total_records': len(state.data_store),
+            'patterns': [
+                {'type': 'numeric', 'field': 'value', 'trend': 'increasing'},
+                {'type': 'categorical', 'field': 'name', 'unique_values': 3}
+            ],
+            'insights': [
+                'Data shows consistent value progression',
+                'All records have unique identifiers',
+                'Numeric values range from 100 to 300'
+            ],
+            'recommendations': [
+                'Consider adding more diverse data points',
+                'Implement data validation for numeric fields',
+                'Add timestamp tracking for temporal analysis'
+            ]
+        }
+        
+        # Updated outside the cached response so cache hits update it too
+        state.analysis_results = analysis
+        logger.info("Analysis completed successfully")
+        
+        return analysis_response(analysis)
+        
+    except Exception as e:
+        logger.error("Analysis error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Analysis failed'}), 500
+
+@engine.response_cache.cached('dataset')
+def analysis_response(analysis):
+    """Serialized analysis, reused until the dataset changes"""
+    return jsonify({'analysis': analysis})
+
+@blueprint.route('/api/expand', methods=['POST'])
+def expand_data():
+    logger.info("Data expansion requested")
+    try:
+        if not state.data_store:
+            logger.warning("No data available for expansion")
+            return jsonify({
+                'expansion': {
+                    'data': [],
+                    'new_features': 0,
+                    'expanded_count': 0
+                }
+            })
+        
+        logger.info("Expanding %s records", len(state.data_store))
+        
+        # Simulate AI expansion
+        expanded_data = []
+        for i, record in enumerate(state.data_store):
+            expanded_record = {
+                **record,
+                'category': f'Category_{i % 3 + 1}',
+                'score': record['value'] * 0.1,
+                'status': 'active' if record['value'] > 150 else 'pending'
+            }
+            expanded_data.append(expanded_record)
+        
+        expansion = {
+            'data': expanded_data,
+            'new_features': 3,
+            'expanded_count': len(expanded_data)
+        }
+        
+        state.expansion_results = expansion
+        logger.info("Expansion completed: %s records, %s new features", len(expanded_data), expansion['new_features'])
+        
+        return jsonify({'expansion': expansion})
+        
+    except Exception as e:
+        logger.error("Expansion error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Expansion failed'}), 500
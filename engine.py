@@ -0,0 +1,173 @@
+"""
+Shared engine behind every Moduro subsystem.
+
+One Engine exists per process and every app built by app_factory.create_app()
+uses it. Logging, tracing, the response cache, the admission limiter, the
+retrieval index, the platform state (uploaded data, analysis results,
+metrics, module registry) and the LLM stack are therefore created once,
+however many subsystems are mounted.
+
+The LLM stack (router, scheduler, semantic cache, chat engine) is only built
+on first use, so processes that do not mount the LLM subsystem never open
+connections to Ollama. Under the pre-fork server this also means each worker
+builds its own pools after the fork.
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from admission import controller_from_env
+from log_pipeline import setup_logging
+from response_cache import ResponseCache
+from retrieval_index import RetrievalIndex
+from tracing import RequestIdFilter, tracer_from_env
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_URL = "http://localhost:11434"
+# Comma-separated pool of inference boxes; defaults to the single local instance
+OLLAMA_URLS = [u.strip() for u in os.environ.get('OLLAMA_URLS', OLLAMA_URL).split(',') if u.strip()]
+OLLAMA_TIMEOUT = 300
+
+CHAT_MODEL = os.environ.get('MODURO_CHAT_MODEL', 'deepseek-coder:7b')
+# Optional local embedding model (e.g. nomic-embed-text) for hybrid retrieval
+EMBED_MODEL = os.environ.get('MODURO_EMBED_MODEL', '')
+
+DEFAULT_MODULES = [
+    {
+        'name': 'data_expansion',
+        'description': 'AI-driven data analysis and expansion',
+        'status': 'active',
+        'functions': ['expand_data', 'analyze_data']
+    },
+    {
+        'name': 'code_analysis',
+        'description': 'Python code analysis and enhancement',
+        'status': 'active',
+        'functions': ['analyze_python', 'expand_python']
+    }
+]
+
+
+class PlatformState:
+    """In-memory results shared by the data, code and LLM subsystems"""
+
+    def __init__(self):
+        self.data_store: List[Dict] = []
+        self.analysis_results: Dict = {}
+        self.expansion_results: Dict = {}
+        self.code_analysis_results: Dict = {}
+        self.code_expansion_results = {}
+        self.metrics = {
+            'total_lines': 0,
+            'total_chars': 0,
+            'expansions': 0
+        }
+        # Module registry served by /api/modules
+        self.modules: List[Dict] = [dict(m) for m in DEFAULT_MODULES]
+
+    def summary(self) -> Dict:
+        """Context handed to the chat engine"""
+        return {
+            'records': len(self.data_store),
+            'analysis': self.analysis_results,
+            'code_analysis': self.code_analysis_results
+        }
+
+
+class LLMServices:
+    """Router, scheduler, semantic cache and chat engine, built together"""
+
+    def __init__(self, retrieval_index: RetrievalIndex, state: PlatformState):
+        from chat_engine import ChatEngine, ConversationStore
+        from llm_router import LLMRouter
+        from llm_scheduler import ModelScheduler
+        from semantic_cache import SemanticCache
+
+        self.router = LLMRouter(OLLAMA_URLS, request_timeout=OLLAMA_TIMEOUT)
+        self.router.start_health_checks()
+
+        # Optional near-duplicate prompt cache in front of the LLM path
+        self.semantic_cache = SemanticCache(
+            threshold=float(os.environ.get('MODURO_SEMANTIC_CACHE_THRESHOLD', 0.9)),
+            max_entries=int(os.environ.get('MODURO_SEMANTIC_CACHE_SIZE', 5000))
+        ) if os.environ.get('MODURO_SEMANTIC_CACHE', '').lower() in ('1', 'true', 'yes') else None
+
+        self.scheduler = ModelScheduler(
+            self.router.generate,
+            max_batch_size=int(os.environ.get('MODURO_LLM_BATCH_SIZE', 8)),
+            default_concurrency=int(os.environ.get('MODURO_LLM_CONCURRENCY', 4)),
+            max_loaded_models=int(os.environ.get('MODURO_LLM_MAX_LOADED', 1)),
+            stream_fn=self.router.generate_stream
+        )
+
+        # Chat goes through the scheduler, batched and counted with /api/compare
+        self.chat_engine = ChatEngine(
+            self.scheduler.submit_stream,
+            CHAT_MODEL,
+            state.summary,
+            ConversationStore(
+                max_sessions=int(os.environ.get('MODURO_CHAT_MAX_SESSIONS', 1000)),
+                max_turns=int(os.environ.get('MODURO_CHAT_MAX_TURNS', 40))
+            ),
+            max_prompt_chars=int(os.environ.get('MODURO_CHAT_PROMPT_CHARS', 6000)),
+            retriever=lambda query: retrieval_index.search(query, k=4),
+            cache=self.semantic_cache
+        )
+
+    def shutdown(self):
+        self.scheduler.shutdown(wait=False)
+        self.router.stop()
+
+
+class Engine:
+    """Process-wide services shared by every mounted subsystem"""
+
+    def __init__(self, log_file: Optional[str] = 'moduro.log'):
+        # Records are queued and written by a background thread
+        self.log_pipeline = setup_logging(log_file, level=logging.INFO)
+        # Request IDs always; per-stage spans only when MODURO_TRACING is set
+        self.tracer = tracer_from_env()
+        self.log_pipeline.add_filter(RequestIdFilter())
+        # Serialized responses of read-mostly endpoints, invalidated by tag
+        self.response_cache = ResponseCache()
+        # Per-client rate limits and load shedding, shared across worker processes
+        self.admission = controller_from_env()
+        self.state = PlatformState()
+        self.retrieval_index = RetrievalIndex(
+            embed_fn=(lambda text: self.llm.router.embed(EMBED_MODEL, text)) if EMBED_MODEL else None
+        )
+        self._llm: Optional[LLMServices] = None
+        self._lock = threading.Lock()
+        self._shutdown_hooks: List[Callable[[], None]] = []
+
+    @property
+    def llm(self) -> LLMServices:
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    self._llm = LLMServices(self.retrieval_index, self.state)
+        return self._llm
+
+    def register_module(self, module: Dict):
+        self.state.modules.append(module)
+        self.response_cache.invalidate('modules')
+
+    def on_shutdown(self, hook: Callable[[], None]):
+        """Run `hook` when the engine shuts down, e.g. to stop a subsystem's threads"""
+        self._shutdown_hooks.append(hook)
+
+    def shutdown(self):
+        """Stop background LLM machinery and subsystem threads so a worker exits promptly"""
+        for hook in reversed(self._shutdown_hooks):
+            try:
+                hook()
+            except Exception as e:
+                logger.warning("Shutdown hook %r failed: %s", hook, e)
+        if self._llm is not None:
+            self._llm.shutdown()
+
+
+engine = Engine()
@@ -0,0 +1,359 @@
+"""
+Single-pass HTML extraction for SEO analysis.
+
+HTMLExtractor scans markup once, left to right, with a single tag regex. It
+keeps only the fields the SEO tool reports; no DOM is built. Input can be fed
+in chunks as it arrives from the network. A tag cut off at a chunk boundary is
+kept back until the next chunk completes it. So is an open comment or raw-text
+element; while it stays open, each new chunk is only searched for its end, so
+a long script arriving in many chunks is not rescanned for each one. A tag
+never runs past the next `<`, so markup full of unterminated tags costs one
+short scan per `<` rather than one to the end of the page.
+
+Extracted per page:
+
+* title, meta tags (name/property/http-equiv -> content) and charset
+* canonical URL, hreflang alternates and the <base href> used for resolving
+* headings h1-h6 in document order
+* links, resolved against the base, with their rel values and anchor text
+* images with resolved src and alt text (None when the attribute is missing)
+* structured data: parsed JSON-LD blocks and microdata itemtypes
+* visible text, whitespace-collapsed, without script/style/template content
+"""
+
+import html
+import json
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+# One token per match. Raw-text elements (script, style, title, textarea) match
+# whole, up to their end tag; until that end tag has arrived they match as a
+# plain start tag. A comment with no end yet matches to the end of the data
+# as `open_comment`. No tag runs past the next `<`, not even inside a quoted
+# value (which templating engines escape as &lt; anyway): a failed match costs
+# one short scan instead of one to the end of the data, and a tag cut off at
+# the end of a chunk always starts at its last `<`.
+_ATTRS = r'(?:[^<>"\']|"[^<"]*"|\'[^<\']*\')*'
+_TOKEN_RE = re.compile(
+    r'<(?:'
+    r'!--(?:.*?--\s*>|(?P<open_comment>.*\Z))'
+    r'|(?P<raw>script|style|title|textarea)(?=[\s/>])'
+    rf'(?P<raw_attrs>{_ATTRS})>(?P<raw_body>.*?)</(?P=raw)\s*>'
+    rf'|(?P<closing>/?)(?P<tag>[a-z][^\s/<>]*)(?P<attrs>{_ATTRS})>'
+    r'|[!?][^<>]*>'
+    r')',
+    re.DOTALL | re.IGNORECASE
+)
+_ATTR_RE = re.compile(r'''([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+
+_RAW = frozenset(['script', 'style', 'title', 'textarea'])
+# End of an open comment or raw-text element, and the part of it before any
+# whitespace, which is what can be cut off at the end of a chunk. A held-back
+# tag can only complete once a `>` arrives.
+_COMMENT_END = (re.compile(r'--\s*>'), '--')
+_RAW_ENDS = {tag: (re.compile(rf'</{tag}\s*>', re.IGNORECASE), f'</{tag}') for tag in _RAW}
+_TAG_END = (re.compile('>'), '')
+_HEADINGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+
+# What a tag means for extraction; tags not listed are block elements, which
+# only separate words of the visible text
+_BLOCK, _INLINE, _HIDDEN, _READ, _READ_INLINE = range(5)
+_KINDS = {tag: _INLINE for tag in (
+    'abbr', 'b', 'bdi', 'bdo', 'cite', 'code', 'data', 'dfn', 'em', 'i', 'kbd', 'mark', 'q', 's',
+    'samp', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u', 'var', 'wbr', 'font', 'label')}
+# Content never rendered as page text
+_KINDS.update({tag: _HIDDEN for tag in ('template', 'noscript', 'svg')})
+# Tags whose attributes we read
+_KINDS.update({tag: _READ for tag in ('img', 'meta', 'link', 'base', 'html')})
+_KINDS.update({tag: _READ for tag in _HEADINGS})
+_KINDS['a'] = _READ_INLINE
+
+
+def _attrs(text: str) -> Dict[str, str]:
+    attrs = {}
+    for name, dq, sq, bare in _ATTR_RE.findall(text):
+        name = name.lower()
+        if name not in attrs:
+            value = dq or sq or bare
+            attrs[name] = html.unescape(value) if '&' in value else value
+    return attrs
+
+
+def _overlap(text: str, marker: str) -> str:
+    """Tail of `text` that could be the start of an end `marker` plus whitespace"""
+    stripped = len(text.rstrip())
+    start = stripped - len(marker)
+    if stripped < len(text) and start >= 0 and text[start:stripped].lower() == marker:
+        return text[start:]
+    return text[len(text) - len(marker):]
+
+
+def _collapse(text: str) -> str:
+    if '&' in text:
+        text = html.unescape(text)
+    return ' '.join(text.split())
+
+
+class PageExtract:
+    """Everything HTMLExtractor pulled out of one page"""
+
+    __slots__ = ('base_url', 'title', 'meta', 'charset', 'lang', 'canonical', 'hreflang',
+                 'headings', 'links', 'images', 'json_ld', 'microdata', 'text', 'bytes_parsed')
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.title: Optional[str] = None
+        self.meta: Dict[str, str] = {}
+        self.charset: Optional[str] = None
+        self.lang: Optional[str] = None
+        self.canonical: Optional[str] = None
+        self.hreflang: Dict[str, str] = {}
+        self.headings: List[Dict] = []
+        self.links: List[Dict] = []
+        self.images: List[Dict] = []
+        self.json_ld: List = []
+        self.microdata: List[str] = []
+        self.text = ''
+        self.bytes_parsed = 0
+
+    def link_urls(self) -> List[str]:
+        return [link['url'] for link in self.links]
+
+    def to_dict(self) -> Dict:
+        return {
+            'title': self.title,
+            'meta': self.meta,
+            'charset': self.charset,
+            'lang': self.lang,
+            'canonical': self.canonical,
+            'hreflang': self.hreflang,
+            'headings': self.headings,
+            'links': self.links,
+            'images': self.images,
+            'structured_data': {'json_ld': self.json_ld, 'microdata': self.microdata},
+            'text': self.text
+        }
+
+
+class HTMLExtractor:
+    """Incremental single-pass extractor; feed() chunks, then close()"""
+
+    def __init__(self, base_url: str = ''):
+        self.result = PageExtract(base_url)
+        self._set_base(base_url)
+        # Data held while a tag, comment or raw-text element is open, its end,
+        # and the searched tail that may hold part of that end
+        self._held: List[str] = []
+        self._end = None
+        self._overlap = ''
+        self._text: List[str] = []
+        self._hidden = 0
+        self._heading = None  # (level, index into _text)
+        self._anchor = None   # (link dict, index into _text)
+
+    def feed(self, chunk: str):
+        self.result.bytes_parsed += len(chunk)
+        if self._end is not None:
+            # The open token can only end in the new data, or straddle its
+            # start; the held data is scanned again once, when it ends
+            self._held.append(chunk)
+            end_re, marker = self._end
+            window = self._overlap + chunk
+            if not end_re.search(window):
+                self._overlap = _overlap(window, marker)
+                return
+            self._end = None
+            data = ''.join(self._held)
+            self._held = []
+        else:
+            data = chunk
+        tail = self._scan(data, final=False)
+        if tail:
+            self._held = [tail]
+
+    def close(self) -> PageExtract:
+        buffer = ''.join(self._held)
+        self._end = None
+        self._held = []
+        if buffer:
+            self._scan(buffer, final=True)
+        if self._anchor is not None:
+            self._end_anchor()
+        self.result.text = _collapse(''.join(self._text))
+        return self.result
+
+    def _set_base(self, base: str):
+        self._base = base
+        parts = urlsplit(base)
+        self._origin = f"{parts.scheme}://{parts.netloc}" if parts.scheme and parts.netloc else ''
+
+    def _resolve(self, url: str) -> str:
+        url = url.strip()
+        # urljoin costs ~50us; absolute and root-relative URLs without dot
+        # segments, the bulk of links on most pages, resolve by concatenation
+        if url.startswith(('http://', 'https://')) and '/.' not in url:
+            return url
+        if self._origin and url.startswith('/') and not url.startswith('//') and '/.' not in url:
+            return self._origin + url
+        return urljoin(self._base, url) if self._base else url
+
+    def _scan(self, data: str, final: bool) -> str:
+        """Process complete tokens in `data`; return the unprocessed tail"""
+        pos = 0
+        append = self._text.append
+        kinds = _KINDS
+        for match in _TOKEN_RE.finditer(data):
+            start = match.start()
+            if start > pos and not self._hidden:
+                append(data[pos:start])
+            pos = match.end()
+            closing, name, attr_text, raw = match.group('closing', 'tag', 'attrs', 'raw')
+            if raw is not None:
+                self._raw_element(raw.lower(), match.group('raw_attrs'), match.group('raw_body'))
+                continue
+            if name is None:
+                if not final and match.group('open_comment') is not None:
+                    self._open(_COMMENT_END, match.group('open_comment'))
+                    return data[start:]
+                continue
+            tag = name.lower()
+            if tag in _RAW:
+                # Raw-text element whose end tag has not arrived (or never will)
+                if not final:
+                    self._open(_RAW_ENDS[tag], data[pos:])
+                    return data[start:]
+                self._raw_element(tag, attr_text, data[pos:])
+                pos = len(data)
+                break
+            kind = kinds.get(tag, _BLOCK)
+            if closing:
+                if kind == _INLINE:
+                    continue
+                if kind == _BLOCK:
+                    append(' ')
+                else:
+                    self._end_tag(tag, kind)
+            elif kind == _INLINE:
+                continue
+            elif kind == _BLOCK:
+                append(' ')
+                if 'itemtype' in attr_text:
+                    self._microdata(attr_text)
+            else:
+                self._start_tag(tag, kind, attr_text)
+        # Hold back a possibly incomplete tag at the end of the chunk
+        tail = data[pos:]
+        if not final:
+            lt = tail.rfind('<')
+            if lt != -1:
+                if lt and not self._hidden:
+                    append(tail[:lt])
+                self._open(_TAG_END, '')
+                return tail[lt:]
+        if tail and not self._hidden:
+            append(tail)
+        return ''
+
+    def _open(self, end, searched: str):
+        """Hold data back until `end`, already searched for in `searched`"""
+        self._end = end
+        self._overlap = _overlap(searched, end[1])
+
+    def _microdata(self, attr_text: str):
+        itemtype = _attrs(attr_text).get('itemtype')
+        if itemtype:
+            self.result.microdata.extend(itemtype.split())
+
+    def _start_tag(self, tag: str, kind: int, attr_text: str):
+        if kind != _READ_INLINE:
+            self._text.append(' ')
+        if kind == _HIDDEN:
+            if not attr_text.rstrip().endswith('/'):
+                self._hidden += 1
+            return
+        if 'itemtype' in attr_text:
+            self._microdata(attr_text)
+        attrs = _attrs(attr_text)
+        result = self.result
+        if tag == 'a':
+            href = attrs.get('href')
+            if href is None or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                return
+            if self._anchor is not None:
+                self._end_anchor()
+            link = {'url': self._resolve(href), 'rel': attrs.get('rel', '').lower().split(), 'text': ''}
+            result.links.append(link)
+            self._anchor = (link, len(self._text))
+        elif tag == 'img':
+            src = attrs.get('src') or attrs.get('data-src')
+            if src:
+                result.images.append({'src': self._resolve(src), 'alt': attrs.get('alt'),
+                                      'width': attrs.get('width'), 'height': attrs.get('height'),
+                                      'loading': attrs.get('loading')})
+        elif tag in _HEADINGS:
+            self._heading = (int(tag[1]), len(self._text))
+        elif tag == 'meta':
+            content = attrs.get('content')
+            key = attrs.get('name') or attrs.get('property') or attrs.get('http-equiv')
+            if key and content is not None:
+                result.meta[key.lower()] = content.strip()
+            elif 'charset' in attrs:
+                result.charset = attrs['charset']
+        elif tag == 'link':
+            rel = attrs.get('rel', '').lower().split()
+            href = attrs.get('href')
+            if not href:
+                return
+            if 'canonical' in rel:
+                result.canonical = self._resolve(href)
+            elif 'alternate' in rel and attrs.get('hreflang'):
+                result.hreflang[attrs['hreflang'].lower()] = self._resolve(href)
+        elif tag == 'base':
+            if attrs.get('href'):
+                self._set_base(self._resolve(attrs['href']))
+                result.base_url = self._base
+        elif tag == 'html':
+            result.lang = attrs.get('lang')
+
+    def _end_tag(self, tag: str, kind: int):
+        if kind == _HIDDEN:
+            if self._hidden:
+                self._hidden -= 1
+            return
+        if tag == 'a':
+            if self._anchor is not None:
+                self._end_anchor()
+            return
+        if tag in _HEADINGS and self._heading is not None:
+            level, index = self._heading
+            self.result.headings.append({'level': level, 'text': _collapse(''.join(self._text[index:]))})
+            self._heading = None
+        self._text.append(' ')
+
+    def _end_anchor(self):
+        link, index = self._anchor
+        link['text'] = _collapse(''.join(self._text[index:]))
+        self._anchor = None
+
+    def _raw_element(self, tag: str, attr_text: str, content: str):
+        if tag == 'title':
+            # The first <title> is the page's; later ones belong to inline SVG
+            if self.result.title is None:
+                self.result.title = _collapse(content)
+        elif tag == 'textarea':
+            if not self._hidden:
+                self._text.append(' ' + content + ' ')
+        elif tag == 'script' and 'ld+json' in attr_text and \
+                _attrs(attr_text).get('type', '').lower() == 'application/ld+json':
+            try:
+                self.result.json_ld.append(json.loads(content))
+            except ValueError:
+                self.result.json_ld.append({'error': 'invalid JSON-LD'})
+
+
+def extract_page(markup: str, base_url: str = '') -> PageExtract:
+    """Extract everything from a complete document in one pass"""
+    extractor = HTMLExtractor(base_url)
+    extractor.feed(markup)
+    return extractor.close()
@@ -0,0 +1,130 @@
+"""
+LLM subsystem: chat, multi-model comparison and the Ollama backend pool.
+
+The router, scheduler, semantic cache and chat engine live on engine.llm and
+are built on the first request that needs them.
+"""
+
+import json
+import logging
+import random
+import time
+import traceback
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+
+from engine import CHAT_MODEL, OLLAMA_TIMEOUT, engine
+from semantic_cache import scope_key
+
+logger = logging.getLogger(__name__)
+
+blueprint = Blueprint('llm', __name__)
+
+@blueprint.route('/api/chat', methods=['POST'])
+def chat():
+    logger.info("Chat message received")
+    try:
+        data = request.get_json()
+        message = data.get('message', '')
+        session_id = data.get('session_id') or engine.llm.chat_engine.store.new_session_id()
+        
+        logger.info("Processing chat message for session %s: %s...", session_id, message[:50])
+        
+        if data.get('stream'):
+            def generate():
+                try:
+                    for token in engine.llm.chat_engine.stream_reply(session_id, message):
+                        yield json.dumps({'session_id': session_id, 'token': token}) + '\n'
+                except Exception as e:
+                    logger.error("Chat stream error: %s", e)
+                    yield json.dumps({'session_id': session_id, 'token': offline_chat_response()}) + '\n'
+                yield json.dumps({'session_id': session_id, 'done': True}) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        try:
+            with engine.tracer.span('llm', **{'llm.model': CHAT_MODEL}):
+                response = engine.llm.chat_engine.reply(session_id, message)
+        except Exception as e:
+            # Keep the assistant usable when no LLM backend is reachable
+            logger.warning("LLM unavailable, using offline response: %s", e)
+            response = offline_chat_response()
+        
+        logger.info("AI response: %s", response[:100])
+        
+        return jsonify({'response': response, 'session_id': session_id})
+        
+    except Exception as e:
+        logger.error("Chat error: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
+        return jsonify({'error': 'Chat failed'}), 500
+
+OFFLINE_CHAT_RESPONSES = [
+    "I'm here to help you with data analysis and code expansion!",
+    "You can upload data for analysis or write Python code for enhancement.",
+    "The platform supports both data expansion and code analysis features.",
+    "Try uploading some data or writing code to see the AI in action!",
+    "I can help analyze your data patterns and suggest improvements."
+]
+
+def offline_chat_response():
+    return random.choice(OFFLINE_CHAT_RESPONSES)
+
+@blueprint.route('/api/models')
+@engine.response_cache.cached(version_fn=lambda: tuple(engine.llm.router.list_models()))
+def list_models():
+    try:
+        return jsonify({'models': engine.llm.router.list_models()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@blueprint.route('/api/compare', methods=['POST'])
+def compare_models():
+    data = request.json
+    if data is None:
+        return jsonify({'error': 'Invalid JSON data'}), 400
+    
+    prompt = data.get('prompt', '')
+    models = data.get('models', ['deepseek-coder:7b'])
+    results = {}
+    semantic_cache = engine.llm.semantic_cache
+    if semantic_cache is not None:
+        with engine.tracer.span('cache.lookup'):
+            for model in models:
+                cached = semantic_cache.lookup(scope_key(model), prompt)
+                if cached is not None:
+                    results[model] = cached
+    
+    # Queue every model up front so the scheduler can group them with other
+    # callers' requests for the same model before we block on any result.
+    start = time.monotonic()
+    futures = {model: engine.llm.scheduler.submit(model, prompt) for model in models if model not in results}
+    for model, future in futures.items():
+        try:
+            with engine.tracer.span('llm', **{'llm.model': model}):
+                results[model] = future.result(timeout=OLLAMA_TIMEOUT)
+        except Exception as e:
+            results[model] = f"Error: {str(e)}"
+            continue
+        if semantic_cache is not None:
+            semantic_cache.store(scope_key(model), prompt, results[model], time.monotonic() - start)
+    with engine.tracer.span('serialize'):
+        return jsonify({'results': results})
+
+@blueprint.route('/api/scheduler')
+def scheduler_metrics():
+    return jsonify(engine.llm.scheduler.get_metrics())
+
+@blueprint.route('/api/semantic-cache')
+def semantic_cache_metrics():
+    semantic_cache = engine.llm.semantic_cache
+    if semantic_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **semantic_cache.get_metrics()})
+
+@blueprint.route('/api/index')
+def index_stats():
+    return jsonify(engine.retrieval_index.stats())
+
+@blueprint.route('/api/backends')
+def backend_status():
+    return jsonify(engine.llm.router.get_status())
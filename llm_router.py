@@ -0,0 +1,316 @@
+"""
+Load-balancing router over a pool of Ollama backends.
+
+Each backend is polled for the models it has available. Generation calls are
+routed to a healthy backend that serves the requested model, picked by
+power-of-two-choices on (in-flight requests x observed latency). Backends that
+fail repeatedly are ejected for a cool-down period and re-admitted once a
+health check succeeds again.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class NoBackendAvailable(Exception):
+    """Raised when no healthy backend can serve a request"""
+
+
+class OllamaBackend:
+    """Routing state for a single Ollama instance"""
+
+    def __init__(self, url: str, latency_alpha: float = 0.2):
+        self.url = url.rstrip('/')
+        self.session = requests.Session()
+        self.models = set()
+        self.in_flight = 0
+        self.latency = None
+        self.latency_alpha = latency_alpha
+        self.consecutive_failures = 0
+        self.total_requests = 0
+        self.total_failures = 0
+        self.ejected_until = 0.0
+        self.last_checked = None
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def load_score(self, prior: float) -> float:
+        """Expected wait in seconds: the requests in flight plus this one, times latency
+
+        An unmeasured backend is scored with `prior`, so the score is in the
+        same unit for every backend.
+        """
+        latency = self.latency if self.latency is not None else prior
+        return (self.in_flight + 1) * latency
+
+    def record_success(self, elapsed: float):
+        self.consecutive_failures = 0
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += self.latency_alpha * (elapsed - self.latency)
+
+    def to_dict(self) -> Dict:
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'models': sorted(self.models),
+            'in_flight': self.in_flight,
+            'latency_ms': round(self.latency * 1000, 2) if self.latency is not None else None,
+            'requests': self.total_requests,
+            'failures': self.total_failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_checked': self.last_checked
+        }
+
+
+class LLMRouter:
+    """Routes generation requests across Ollama backends"""
+
+    def __init__(self, backend_urls: List[str],
+                 request_timeout: float = 300,
+                 health_timeout: float = 2.0,
+                 health_interval: float = 15.0,
+                 max_failures: int = 3,
+                 ejection_time: float = 30.0):
+        if not backend_urls:
+            raise ValueError("At least one backend URL is required")
+        self.backends = [OllamaBackend(url) for url in backend_urls]
+        self.request_timeout = request_timeout
+        self.health_timeout = health_timeout
+        self.health_interval = health_interval
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # The health thread and any lock it held stay behind in the parent
+        self._lock = threading.Lock()
+        for backend in self.backends:
+            backend.in_flight = 0
+        if self._health_thread is not None and not self._stop.is_set():
+            self._health_thread = None
+            self.start_health_checks()
+
+    def start_health_checks(self):
+        """Poll every backend in a background thread"""
+        if self._health_thread is not None:
+            return
+        self._health_thread = threading.Thread(target=self._health_loop, name='llm-router-health', daemon=True)
+        self._health_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _health_loop(self):
+        self.check_health()
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def check_health(self):
+        """Refresh model lists; failing backends are ejected, recovered ones re-admitted"""
+        for backend in self.backends:
+            try:
+                resp = backend.session.get(f"{backend.url}/api/tags", timeout=self.health_timeout)
+                resp.raise_for_status()
+                models = {m['name'] for m in resp.json().get('models', [])}
+                with self._lock:
+                    backend.models = models
+                    backend.consecutive_failures = 0
+                    backend.ejected_until = 0.0
+                    backend.last_checked = time.time()
+            except Exception as e:
+                logger.warning("Health check failed for %s: %s", backend.url, e)
+                with self._lock:
+                    backend.last_checked = time.time()
+                    self._eject(backend)
+
+    def _eject(self, backend: OllamaBackend):
+        backend.ejected_until = time.monotonic() + self.ejection_time
+        logger.warning("Ejecting backend %s for %.0fs", backend.url, self.ejection_time)
+
+    def _record_failure(self, backend: OllamaBackend):
+        with self._lock:
+            backend.in_flight -= 1
+            backend.total_failures += 1
+            backend.consecutive_failures += 1
+            if backend.consecutive_failures >= self.max_failures:
+                self._eject(backend)
+
+    def select(self, model: str, exclude=()) -> OllamaBackend:
+        """Power-of-two-choices among healthy backends serving the model"""
+        with self._lock:
+            healthy = [b for b in self.backends if b.healthy and b not in exclude]
+            # A backend not health-checked yet has not reported its models, so
+            # it may serve any; one that was checked only serves what it listed.
+            candidates = [b for b in healthy if model in b.models or b.last_checked is None]
+            if not candidates:
+                raise NoBackendAvailable(f"No healthy backend serves model {model}")
+            if len(candidates) == 1:
+                chosen = candidates[0]
+            else:
+                first, second = random.sample(candidates, 2)
+                # Unmeasured backends are priced at the fastest measured
+                # latency, so they win ties and get probed and measured
+                measured = [b.latency for b in candidates if b.latency is not None]
+                prior = min(measured) if measured else 1.0
+                first_score, second_score = first.load_score(prior), second.load_score(prior)
+                if first_score == second_score and second.latency is None:
+                    chosen = second
+                else:
+                    chosen = first if first_score <= second_score else second
+            chosen.in_flight += 1
+            chosen.total_requests += 1
+            return chosen
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict] = None) -> str:
+        """Run a non-streaming generation, retrying on another backend on failure"""
+        tried = []
+        last_error = None
+        for _ in range(len(self.backends)):
+            try:
+                backend = self.select(model, exclude=tried)
+            except NoBackendAvailable:
+                break
+            tried.append(backend)
+            start = time.monotonic()
+            try:
+                resp = backend.session.post(f"{backend.url}/api/generate", json={
+                    "model": model,
+                    "prompt": prompt,
+                    "stream": False,
+                    **(options or {})
+                }, timeout=self.request_timeout)
+                resp.raise_for_status()
+                response = resp.json().get('response', '')
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code < 500:
+                    # Client errors (unknown model, bad options) are not the
+                    # backend's fault and would fail the same way elsewhere.
+                    with self._lock:
+                        backend.in_flight -= 1
+                    raise
+                last_error = e
+                logger.warning("Generation on %s failed: %s", backend.url, e)
+                self._record_failure(backend)
+                continue
+            except Exception as e:
+                last_error = e
+                logger.warning("Generation on %s failed: %s", backend.url, e)
+                self._record_failure(backend)
+                continue
+            with self._lock:
+                backend.in_flight -= 1
+                backend.record_success(time.monotonic() - start)
+            return response
+        if last_error is not None:
+            raise last_error
+        raise NoBackendAvailable(f"No healthy backend serves model {model}")
+
+    def generate_stream(self, model: str, prompt: str, options: Optional[Dict] = None) -> Iterator[str]:
+        """Yield response tokens as Ollama streams them
+
+        Fails over to another backend only until the first token has been
+        yielded; after that an error is raised to the caller. Latency is
+        recorded as time to first token.
+        """
+        tried = []
+        last_error = None
+        for _ in range(len(self.backends)):
+            try:
+                backend = self.select(model, exclude=tried)
+            except NoBackendAvailable:
+                break
+            tried.append(backend)
+            start = time.monotonic()
+            first_token = True
+            try:
+                with backend.session.post(f"{backend.url}/api/generate", json={
+                    "model": model,
+                    "prompt": prompt,
+                    "stream": True,
+                    **(options or {})
+                }, timeout=self.request_timeout, stream=True) as resp:
+                    resp.raise_for_status()
+                    for line in resp.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get('error'):
+                            raise RuntimeError(chunk['error'])
+                        token = chunk.get('response', '')
+                        if token:
+                            if first_token:
+                                first_token = False
+                                with self._lock:
+                                    backend.record_success(time.monotonic() - start)
+                            yield token
+                        if chunk.get('done'):
+                            break
+            except GeneratorExit:
+                # Client went away mid-stream
+                with self._lock:
+                    backend.in_flight -= 1
+                raise
+            except Exception as e:
+                logger.warning("Streaming generation on %s failed: %s", backend.url, e)
+                if not first_token:
+                    with self._lock:
+                        backend.in_flight -= 1
+                    raise
+                self._record_failure(backend)
+                last_error = e
+                continue
+            with self._lock:
+                backend.in_flight -= 1
+            return
+        if last_error is not None:
+            raise last_error
+        raise NoBackendAvailable(f"No healthy backend serves model {model}")
+
+    def embed(self, model: str, text: str) -> List[float]:
+        """Embedding vector for text from a backend serving the model"""
+        backend = self.select(model)
+        start = time.monotonic()
+        try:
+            resp = backend.session.post(f"{backend.url}/api/embeddings", json={
+                "model": model,
+                "prompt": text
+            }, timeout=self.request_timeout)
+            resp.raise_for_status()
+            embedding = resp.json().get('embedding', [])
+        except Exception:
+            self._record_failure(backend)
+            raise
+        with self._lock:
+            backend.in_flight -= 1
+            backend.record_success(time.monotonic() - start)
+        return embedding
+
+    def list_models(self) -> List[str]:
+        """Union of models across healthy backends"""
+        with self._lock:
+            models = set()
+            for backend in self.backends:
+                if backend.healthy:
+                    models |= backend.models
+            return sorted(models)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {'backends': [b.to_dict() for b in self.backends]}
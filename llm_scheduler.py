@@ -0,0 +1,301 @@
+"""
+Model-aware request scheduler for local LLM inference.
+
+Ollama keeps a small number of models resident in memory and has to unload
+one before it can load another. When many callers push prompts for different
+models at the same time the backend spends most of its time swapping. The
+ModelScheduler queues requests per model, dispatches them in batches that
+target the currently loaded model, and only swaps once the loaded model's
+queue is drained (or another model's oldest request has waited too long).
+
+Streamed requests (`submit_stream()`) are queued and batched the same way.
+They hold their slot until the stream ends, and their tokens are handed to
+the caller as the backend produces them.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Ends the token queue of a streamed request
+_END_OF_STREAM = object()
+
+
+class InferenceRequest:
+    """A single queued generation request"""
+
+    __slots__ = ('model', 'prompt', 'options', 'future', 'enqueued_at', 'tokens', 'abandoned')
+
+    def __init__(self, model: str, prompt: str, options: Optional[Dict] = None, stream: bool = False):
+        self.model = model
+        self.prompt = prompt
+        self.options = options or {}
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        # Tokens of a streamed request, then _END_OF_STREAM or the error
+        self.tokens: Optional[queue.Queue] = queue.Queue() if stream else None
+        self.abandoned = False
+
+
+class ModelStats:
+    """Per-model counters exported through get_metrics()"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, wait: float):
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def to_dict(self) -> Dict:
+        dispatched = self.completed + self.failed
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'batches': self.batches,
+            'avg_wait_ms': round(self.total_wait / dispatched * 1000, 2) if dispatched else 0,
+            'max_wait_ms': round(self.max_wait * 1000, 2)
+        }
+
+
+class ModelScheduler:
+    """Queues LLM requests per model and batches them to minimize model swaps"""
+
+    def __init__(self, generate_fn: Callable[[str, str, Dict], str],
+                 max_batch_size: int = 8,
+                 default_concurrency: int = 4,
+                 model_concurrency: Optional[Dict[str, int]] = None,
+                 max_loaded_models: int = 1,
+                 max_wait: float = 10.0,
+                 stream_fn: Optional[Callable[[str, str, Dict], Iterator[str]]] = None):
+        self.generate_fn = generate_fn
+        self.stream_fn = stream_fn
+        self.max_batch_size = max_batch_size
+        self.default_concurrency = default_concurrency
+        self.model_concurrency = dict(model_concurrency or {})
+        self.max_loaded_models = max_loaded_models
+        self.max_wait = max_wait
+
+        self._queues: Dict[str, Deque[InferenceRequest]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._loaded: 'OrderedDict[str, None]' = OrderedDict()
+        self._stats: Dict[str, ModelStats] = {}
+        self._swaps = 0
+        self._cond = threading.Condition()
+        self._running = True
+        self._start_threads()
+        if hasattr(os, 'register_at_fork'):
+            # Threads do not survive fork; pre-fork servers load the app in
+            # the master, so each worker needs its own dispatcher and pool.
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start_threads(self):
+        worker_count = max(1, self.default_concurrency * self.max_loaded_models)
+        if self.model_concurrency:
+            worker_count = max(worker_count, max(self.model_concurrency.values()) * self.max_loaded_models)
+        self._pool = ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix='llm-worker')
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='llm-scheduler', daemon=True)
+        self._dispatcher.start()
+
+    def _after_fork(self):
+        self._cond = threading.Condition()
+        self._queues = {}
+        self._in_flight = {}
+        if self._running:
+            self._start_threads()
+
+    def submit(self, model: str, prompt: str, options: Optional[Dict] = None) -> Future:
+        """Queue a prompt for the given model and return a Future for the response"""
+        return self._enqueue(InferenceRequest(model, prompt, options)).future
+
+    def submit_stream(self, model: str, prompt: str, options: Optional[Dict] = None) -> Iterator[str]:
+        """Queue a prompt like submit() and yield its tokens as they are generated
+
+        Closing the iterator early stops the generation and frees the slot.
+        """
+        if self.stream_fn is None:
+            raise RuntimeError('Scheduler was built without a stream_fn')
+        req = self._enqueue(InferenceRequest(model, prompt, options, stream=True))
+        try:
+            while True:
+                item = req.tokens.get()
+                if item is _END_OF_STREAM:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Still queued: dropped unrun; streaming: stopped at the next token
+            req.abandoned = True
+            req.future.cancel()
+
+    def _enqueue(self, req: InferenceRequest) -> InferenceRequest:
+        model = req.model
+        with self._cond:
+            if not self._running:
+                raise RuntimeError('Scheduler has been shut down')
+            self._queues.setdefault(model, deque()).append(req)
+            self._stats.setdefault(model, ModelStats()).submitted += 1
+            self._cond.notify_all()
+        return req
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                 timeout: Optional[float] = None) -> str:
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(model, prompt, options).result(timeout=timeout)
+
+    def concurrency_limit(self, model: str) -> int:
+        return self.model_concurrency.get(model, self.default_concurrency)
+
+    def _oldest_wait(self, model: str, now: float) -> float:
+        queue = self._queues.get(model)
+        return now - queue[0].enqueued_at if queue else 0.0
+
+    def _pick_model(self) -> Optional[str]:
+        """Choose the next model to dispatch for; caller holds the lock"""
+        now = time.monotonic()
+        pending = [m for m, q in self._queues.items() if q]
+        if not pending:
+            return None
+
+        # A non-resident model that has waited too long blocks new batches for
+        # resident models so they drain and free a slot for the swap.
+        starving = [m for m in pending
+                    if m not in self._loaded and self._oldest_wait(m, now) > self.max_wait]
+
+        if not starving:
+            # Prefer resident models, most recently used first
+            for model in reversed(self._loaded):
+                if self._queues.get(model) and self._in_flight.get(model, 0) < self.concurrency_limit(model):
+                    return model
+
+        candidates = starving or [m for m in pending if m not in self._loaded]
+        if not candidates:
+            return None
+
+        # Swap to the model with the most queued work, oldest head breaks ties
+        target = max(candidates, key=lambda m: (len(self._queues[m]), self._oldest_wait(m, now)))
+        if len(self._loaded) >= self.max_loaded_models:
+            evictable = [m for m in self._loaded if self._in_flight.get(m, 0) == 0]
+            if not evictable:
+                return None
+            del self._loaded[evictable[0]]
+        self._loaded[target] = None
+        self._swaps += 1
+        logger.info("Scheduling model swap to %s (swap #%d)", target, self._swaps)
+        return target
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                model = None
+                while self._running:
+                    model = self._pick_model()
+                    if model is not None:
+                        break
+                    self._cond.wait(timeout=0.5)
+                if not self._running:
+                    return
+
+                self._loaded.move_to_end(model)
+                slots = self.concurrency_limit(model) - self._in_flight.get(model, 0)
+                queue = self._queues[model]
+                batch: List[InferenceRequest] = []
+                while queue and len(batch) < min(self.max_batch_size, slots):
+                    batch.append(queue.popleft())
+                self._in_flight[model] = self._in_flight.get(model, 0) + len(batch)
+                stats = self._stats[model]
+                stats.batches += 1
+                now = time.monotonic()
+                for req in batch:
+                    stats.record_wait(now - req.enqueued_at)
+
+            for req in batch:
+                self._pool.submit(self._run, req)
+
+    def _run(self, req: InferenceRequest):
+        if not req.future.set_running_or_notify_cancel():
+            self._finish(req.model, failed=True)
+            return
+        try:
+            if req.tokens is None:
+                result = self.generate_fn(req.model, req.prompt, req.options)
+            else:
+                result = self._stream(req)
+        except Exception as e:
+            self._finish(req.model, failed=True)
+            req.future.set_exception(e)
+            if req.tokens is not None:
+                req.tokens.put(e)
+        else:
+            self._finish(req.model, failed=False)
+            req.future.set_result(result)
+            if req.tokens is not None:
+                req.tokens.put(_END_OF_STREAM)
+
+    def _stream(self, req: InferenceRequest) -> str:
+        """Run a streamed request, handing its tokens over; returns the full text"""
+        tokens = []
+        stream = self.stream_fn(req.model, req.prompt, req.options)
+        try:
+            for token in stream:
+                if req.abandoned:
+                    break
+                tokens.append(token)
+                req.tokens.put(token)
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+        return ''.join(tokens)
+
+    def _finish(self, model: str, failed: bool):
+        with self._cond:
+            self._in_flight[model] -= 1
+            stats = self._stats[model]
+            if failed:
+                stats.failed += 1
+            else:
+                stats.completed += 1
+            self._cond.notify_all()
+
+    def get_metrics(self) -> Dict:
+        """Queue depth, wait times and swap count for tuning"""
+        with self._cond:
+            return {
+                'loaded_models': list(self._loaded),
+                'swaps': self._swaps,
+                'queue_depth': {m: len(q) for m, q in self._queues.items()},
+                'in_flight': dict(self._in_flight),
+                'models': {m: s.to_dict() for m, s in self._stats.items()}
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop dispatching and fail any requests still queued"""
+        with self._cond:
+            self._running = False
+            pending = [req for q in self._queues.values() for req in q]
+            for q in self._queues.values():
+                q.clear()
+            self._cond.notify_all()
+        for req in pending:
+            if req.future.set_running_or_notify_cancel():
+                error = RuntimeError('Scheduler shut down')
+                req.future.set_exception(error)
+                if req.tokens is not None:
+                    req.tokens.put(error)
+        self._pool.shutdown(wait=wait)
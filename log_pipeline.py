@@ -0,0 +1,316 @@
+"""
+Asynchronous, buffered logging for the Moduro servers.
+
+Request threads only put the LogRecord on a bounded in-memory queue. A
+background writer thread drains the queue in batches, formats the records
+and writes them to the console and a size-rotated log file, flushing once
+per batch. Messages stay in lazy %-style form until the writer formats them,
+and a per-call-site sampler can thin out high-volume INFO lines before they
+are even queued. If the queue is full, records are dropped and counted
+rather than blocking the request.
+
+Forked workers share the log file. One process at a time writes a batch and
+rotates the file once it is full; the others reopen the new file instead of
+rotating again.
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # No fork without it, so only one process writes the file
+    fcntl = None
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None))
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra` fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every `every` INFO/DEBUG records per call site
+
+    Warnings and errors always pass. Sampling is counter-based per
+    (pathname, lineno), so a rare line is never starved by a noisy one.
+    """
+
+    def __init__(self, every: int = 1):
+        super().__init__()
+        self.every = max(1, every)
+        self._counters: Dict[tuple, int] = {}
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every == 1 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        # Racy increments only make sampling slightly uneven; no lock needed
+        count = self._counters.get(key, 0)
+        self._counters[key] = count + 1
+        if count % self.every == 0:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers formatting to the writer thread"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Tracebacks reference live frames; render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if record.args and not all(isinstance(a, _IMMUTABLE_ARGS) for a in _iter_args(record.args)):
+            # Mutable args (dicts, lists) could change before the writer gets
+            # to them, so snapshot the message in the caller's thread.
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _iter_args(args):
+    return args.values() if isinstance(args, dict) else args
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that forked workers can write and rotate together
+
+    Batches are written under a record lock on a temporary file created
+    before the fork, so only one process writes or rotates at a time. The
+    file is rotated by its size on disk, not by one worker's position in it.
+    Before writing, a worker reopens the file if another one rotated it.
+    """
+
+    def __init__(self, filename: str, maxBytes: int = 0, backupCount: int = 0, encoding: Optional[str] = None):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        self._shared_lock = tempfile.TemporaryFile() if fcntl is not None else None
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Hold the file for one batch: reopen it if rotated, rotate it after if full"""
+        if self._shared_lock is not None:
+            fcntl.lockf(self._shared_lock.fileno(), fcntl.LOCK_EX)
+        try:
+            if self._rotated():
+                if self.stream is not None:
+                    self.stream.close()
+                self.stream = self._open()
+            yield
+            self.flush()
+            if self.maxBytes and os.fstat(self.stream.fileno()).st_size >= self.maxBytes:
+                self.doRollover()
+        finally:
+            if self._shared_lock is not None:
+                fcntl.lockf(self._shared_lock.fileno(), fcntl.LOCK_UN)
+
+    def _rotated(self) -> bool:
+        """Whether the file at our path is no longer the one we have open"""
+        if self.stream is None:
+            return True
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self.stream.fileno())
+        return (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+
+
+class BatchWriter:
+    """Drains the log queue in batches and writes them to the real handlers"""
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler],
+                 batch_size: int = 256, flush_interval: float = 0.5):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._stop = object()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(self._stop, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = self._stop in batch
+            self._write([r for r in batch if r is not self._stop])
+            if stopping:
+                return
+
+    def _write(self, records: List[logging.LogRecord]):
+        if not records:
+            return
+        for handler in self.handlers:
+            # Each handler writes without flushing; flush once per batch.
+            # emit() would flush every record, so its level and filter checks
+            # are applied here.
+            with handler.lock:
+                try:
+                    with handler.batch() if isinstance(handler, SharedRotatingFileHandler) \
+                            else contextlib.nullcontext():
+                        for record in records:
+                            if record.levelno < handler.level or not handler.filter(record):
+                                continue
+                            try:
+                                handler.stream.write(handler.format(record) + handler.terminator)
+                            except Exception:
+                                handler.handleError(record)
+                        handler.flush()
+                except Exception:
+                    handler.handleError(records[-1])
+        self.written += len(records)
+
+
+class LogPipeline:
+    """Owns the queue, the queue handler and the writer thread"""
+
+    def __init__(self, handlers: List[logging.Handler], max_queue: int = 10000,
+                 sample_every: int = 1, batch_size: int = 256, flush_interval: float = 0.5):
+        self.handlers = handlers
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sampler = SamplingFilter(sample_every)
+        self.filters: List[logging.Filter] = [self.sampler]
+        self._start()
+        if hasattr(os, 'register_at_fork'):
+            # The writer thread does not survive fork; give each child its own
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.stop)
+
+    def _start(self):
+        self.queue = queue.Queue(self.max_queue)
+        self.handler = AsyncQueueHandler(self.queue)
+        for log_filter in self.filters:
+            self.handler.addFilter(log_filter)
+        self.writer = BatchWriter(self.queue, self.handlers, self.batch_size, self.flush_interval)
+        self.writer.start()
+
+    def _after_fork(self):
+        root = logging.getLogger()
+        old_handler = self.handler
+        for handler in self.handlers:
+            handler.createLock()
+        self._start()
+        if old_handler in root.handlers:
+            root.removeHandler(old_handler)
+            root.addHandler(self.handler)
+
+    def add_filter(self, log_filter: logging.Filter):
+        """Add a filter that runs in the logging thread, before the record is queued"""
+        self.filters.append(log_filter)
+        self.handler.addFilter(log_filter)
+
+    def stop(self):
+        self.writer.stop()
+
+    def get_metrics(self) -> Dict:
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.writer.written,
+            'dropped': self.handler.dropped,
+            'sampled_out': self.sampler.sampled_out
+        }
+
+
+def setup_logging(log_file: Optional[str] = None, level: int = logging.INFO,
+                  max_bytes: Optional[int] = None, backup_count: Optional[int] = None,
+                  sample_every: Optional[int] = None, max_queue: Optional[int] = None,
+                  log_format: Optional[str] = None) -> LogPipeline:
+    """Route the root logger through an asynchronous LogPipeline
+
+    Settings fall back to MODURO_LOG_MAX_BYTES (default 10 MB),
+    MODURO_LOG_BACKUPS (5), MODURO_LOG_SAMPLE_EVERY (1, no sampling),
+    MODURO_LOG_QUEUE_SIZE (10000 records) and MODURO_LOG_FORMAT
+    ('text' or 'json').
+    """
+    if max_bytes is None:
+        max_bytes = int(os.environ.get('MODURO_LOG_MAX_BYTES', 10 * 1024 * 1024))
+    if backup_count is None:
+        backup_count = int(os.environ.get('MODURO_LOG_BACKUPS', 5))
+    if sample_every is None:
+        sample_every = int(os.environ.get('MODURO_LOG_SAMPLE_EVERY', 1))
+    if max_queue is None:
+        max_queue = int(os.environ.get('MODURO_LOG_QUEUE_SIZE', 10000))
+    if log_format is None:
+        log_format = os.environ.get('MODURO_LOG_FORMAT', 'text')
+
+    formatter = JsonFormatter() if log_format == 'json' else logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(SharedRotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    pipeline = LogPipeline(handlers, max_queue=max_queue, sample_every=sample_every)
+    root = logging.getLogger()
+    # Like basicConfig(force=True): anything already on root would write
+    # synchronously and duplicate the console output
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    root.addHandler(pipeline.handler)
+    return pipeline
@@ -0,0 +1,103 @@
+"""
+Per-route request body limits for the Moduro Flask apps.
+
+Routes declare their own maximum body size with @body_limit(n). Other routes
+get app.config['MAX_CONTENT_LENGTH']. The limit is enforced in three places:
+
+* before the handler runs, a Content-Length over the limit is answered with
+  413 without reading the body;
+* bodies without a Content-Length (chunked uploads) are cut off by Werkzeug
+  once they exceed the limit;
+* multipart file parts are written to a SpooledTemporaryFile, which moves to
+  disk once it grows past `spool_threshold`, so an upload does not have to
+  fit in RAM.
+
+read_json_body() decodes a JSON object body from the input stream in chunks,
+without keeping a cached copy of the raw bytes alongside the decoded object
+the way request.get_json() does. A body that is missing, malformed or not an
+object raises BadRequest, which the app answers with a JSON 400.
+"""
+
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+
+from flask import Request, current_app, jsonify, request
+from werkzeug.exceptions import BadRequest
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 64 * 1024
+
+
+def body_limit(max_bytes: int):
+    """Decorator setting the maximum request body size of a view"""
+    def decorator(view):
+        view.max_body_bytes = max_bytes
+        return view
+    return decorator
+
+
+class LimitedRequest(Request):
+    """Request whose size limit comes from the matched view"""
+
+    spool_threshold = 1024 * 1024
+    # Non-file form fields are held in memory; cap them separately
+    max_form_memory_size = 1024 * 1024
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        view = current_app.view_functions.get(self.endpoint) if self.endpoint else None
+        limit = getattr(view, 'max_body_bytes', None)
+        return limit if limit is not None else current_app.config['MAX_CONTENT_LENGTH']
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=self.spool_threshold)
+
+
+def read_json_body() -> Dict[str, Any]:
+    """Decode the JSON object body, reading the input stream in chunks"""
+    if not request.is_json:
+        raise BadRequest('Expected a JSON body')
+    buffer = bytearray()
+    stream = request.stream
+    while True:
+        chunk = stream.read(READ_CHUNK)
+        if not chunk:
+            break
+        buffer += chunk
+    if not buffer:
+        raise BadRequest('Empty JSON body')
+    try:
+        data = current_app.json.loads(buffer)
+    except ValueError as e:
+        raise BadRequest(f'Invalid JSON body: {e}') from e
+    if not isinstance(data, dict):
+        raise BadRequest('Expected a JSON object')
+    return data
+
+
+def init_app(app, default_max_bytes: int):
+    """Install LimitedRequest, the early Content-Length check and a JSON 413"""
+    app.request_class = LimitedRequest
+    if app.config.get('MAX_CONTENT_LENGTH') is None:
+        app.config['MAX_CONTENT_LENGTH'] = default_max_bytes
+
+    @app.before_request
+    def _reject_oversized():
+        limit = request.max_content_length
+        if limit is not None and request.content_length is not None and request.content_length > limit:
+            return _too_large(limit)
+        return None
+
+    @app.errorhandler(413)
+    def _request_too_large(error):
+        return _too_large(request.max_content_length)
+
+
+def _too_large(limit: Optional[int]):
+    logger.warning("Rejected %s %s: body of %s bytes exceeds %s",
+                   request.method, request.path, request.content_length, limit)
+    response = jsonify({'error': 'Request body too large', 'max_bytes': limit})
+    response.status_code = 413
+    return response
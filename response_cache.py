@@ -0,0 +1,139 @@
+"""
+Response cache for read-mostly API endpoints.
+
+A cached view runs once per version of the data it depends on. The response
+body is stored as serialized bytes with a strong ETag, and later requests
+reuse it without recomputing or re-serializing. GET requests carrying a
+matching If-None-Match (or a current If-Modified-Since) get a 304.
+
+Versions come from named tags: a view cached with the 'dataset' tag is
+recomputed after invalidate('dataset') is called. Views can also pass
+`version_fn` for state they read from elsewhere, and `ttl` for payloads that
+go stale over time, such as timestamps.
+
+Entries are also keyed by the negotiated format (JSON or MessagePack), and
+every response carries Vary: Accept so shared caches keep them apart too.
+A cached view only runs on a miss, so it must not change state; side
+effects belong in the route around it.
+"""
+
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from flask import make_response, request
+
+from serialization import wants_msgpack
+
+
+class CachedResponse:
+    """Serialized body plus the validators sent with it"""
+
+    __slots__ = ('version', 'body', 'mimetype', 'etag', 'last_modified', 'expires_at')
+
+    def __init__(self, version, body: bytes, mimetype: str, last_modified: datetime,
+                 expires_at: Optional[float]):
+        self.version = version
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Caches serialized 200 responses per endpoint, keyed by data version"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, CachedResponse]' = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def invalidate(self, *tags: str):
+        """Mark everything that depends on these tags as stale"""
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def cached(self, *tags: str, version_fn: Optional[Callable[[], object]] = None,
+               ttl: Optional[float] = None):
+        """Decorator for a Flask view whose output depends only on `tags`"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (request.endpoint, request.query_string, tuple(sorted(kwargs.items())), wants_msgpack())
+                with self._lock:
+                    version = tuple(self._versions.get(tag, 0) for tag in tags)
+                if version_fn is not None:
+                    version += (version_fn(),)
+
+                entry = self._lookup(key, version)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    entry = self._store(key, version, response, ttl)
+                return self._respond(entry)
+            return wrapper
+        return decorator
+
+    def _lookup(self, key: tuple, version: tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version or \
+                    (entry.expires_at is not None and time.monotonic() >= entry.expires_at):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _store(self, key: tuple, version: tuple, response, ttl: Optional[float]) -> CachedResponse:
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        expires_at = time.monotonic() + ttl if ttl else None
+        entry = CachedResponse(version, response.get_data(), response.mimetype, now, expires_at)
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None and previous.etag == entry.etag:
+                # Recomputed to the same bytes; clients' copies are still current
+                entry.last_modified = previous.last_modified
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _respond(self, entry: CachedResponse):
+        response = make_response(entry.body)
+        response.mimetype = entry.mimetype
+        response.set_etag(entry.etag)
+        response.last_modified = entry.last_modified
+        # Browsers may keep the body but must revalidate before using it
+        response.cache_control.no_cache = True
+        response.vary.add('Accept')
+        if request.method in ('GET', 'HEAD'):
+            response.make_conditional(request)
+            if response.status_code == 304:
+                with self._lock:
+                    self.not_modified += 1
+        return response
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'not_modified': self.not_modified,
+                'versions': dict(self._versions)
+            }
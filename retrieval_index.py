@@ -0,0 +1,344 @@
+"""
+Local retrieval over uploaded datasets and analyzed Python code.
+
+Material is split into chunks (groups of records for datasets, one chunk per
+top-level function or class for code) and indexed in an in-memory BM25
+inverted index. Postings are compact parallel arrays per term, and queries
+are scored term-at-a-time with MaxScore pruning: once the top-k threshold
+exceeds what the remaining low-idf terms could add, those terms only update
+documents already in the candidate set. Terms that occur in a large share of
+chunks are dropped from queries that have rarer terms, and long postings
+admit new candidates only from a cached list of their highest-impact entries
+(champion lists). Together these keep top-k retrieval to milliseconds on
+large indexes; benchmarks/retrieval_benchmark.py measures it.
+
+Re-ingesting a source replaces its previous chunks, so the index updates
+incrementally as /api/upload and /api/analyze-python see new material. If an
+embedding function is configured, BM25 candidates are re-ranked by cosine
+similarity against their stored vectors.
+"""
+
+import ast
+import heapq
+import json
+import logging
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'[a-z0-9_]+')
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have i in is it its of on or that the '
+    'this to was were will with you your me my we our what how can do does'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; snake_case identifiers also yield their parts"""
+    tokens = []
+    for tok in TOKEN_RE.findall(text.lower()):
+        if tok in STOPWORDS:
+            continue
+        tokens.append(tok)
+        if '_' in tok:
+            tokens.extend(part for part in tok.split('_') if part and part not in STOPWORDS)
+    return tokens
+
+
+def chunk_records(records: Sequence[Dict], records_per_chunk: int = 20) -> List[str]:
+    """Serialize dataset records into groups of key: value lines"""
+    chunks = []
+    for start in range(0, len(records), records_per_chunk):
+        lines = []
+        for record in records[start:start + records_per_chunk]:
+            if isinstance(record, dict):
+                lines.append(', '.join(f"{k}: {v}" for k, v in record.items()))
+            else:
+                lines.append(json.dumps(record, default=str))
+        chunks.append('\n'.join(lines))
+    return chunks
+
+
+def chunk_code(code: str, max_lines: int = 60) -> List[str]:
+    """One chunk per top-level def/class; module-level code and oversize
+    bodies fall back to fixed windows of lines"""
+    lines = code.split('\n')
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        tree = None
+
+    spans = []
+    if tree is not None:
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = node.lineno - 1
+                if getattr(node, 'decorator_list', None):
+                    start = min(d.lineno for d in node.decorator_list) - 1
+                end = getattr(node, 'end_lineno', None) or start + 1
+                spans.append((start, end))
+
+    chunks = []
+    covered = 0
+    for start, end in spans + [(len(lines), len(lines))]:
+        if start > covered:
+            # Module-level code between definitions
+            for window in range(covered, start, max_lines):
+                text = '\n'.join(lines[window:min(start, window + max_lines)]).strip()
+                if text:
+                    chunks.append(text)
+        for window in range(start, end, max_lines):
+            text = '\n'.join(lines[window:min(end, window + max_lines)]).strip()
+            if text:
+                chunks.append(text)
+        covered = max(covered, end)
+    return chunks
+
+
+class Postings:
+    """Doc ids and term frequencies for one term, as compact arrays"""
+
+    __slots__ = ('doc_ids', 'tfs', 'champions', 'champions_df')
+
+    def __init__(self):
+        self.doc_ids = array('I')
+        self.tfs = array('H')
+        # Highest-impact (doc_id, tf) pairs, rebuilt when the postings grow
+        self.champions = None
+        self.champions_df = 0
+
+
+class RetrievalIndex:
+    """Incremental BM25 index with optional embedding re-rank"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75,
+                 embed_fn: Optional[Callable[[str], List[float]]] = None,
+                 vector_weight: float = 0.5,
+                 rerank_depth: int = 50,
+                 max_df_ratio: float = 0.4,
+                 champion_size: int = 2000):
+        self.k1 = k1
+        self.b = b
+        self.max_df_ratio = max_df_ratio
+        self.champion_size = champion_size
+        self.embed_fn = embed_fn
+        self.vector_weight = vector_weight
+        self.rerank_depth = rerank_depth
+
+        self._postings: Dict[str, Postings] = {}
+        self._doc_len = array('I')
+        self._doc_text: List[Optional[str]] = []
+        self._doc_source: List[Optional[str]] = []
+        self._vectors: Dict[int, List[float]] = {}
+        self._sources: Dict[str, List[int]] = {}
+        self._deleted = set()
+        self._compacted = 0
+        self._total_len = 0
+        self._lock = threading.RLock()
+
+    @property
+    def live_chunks(self) -> int:
+        return len(self._doc_len) - len(self._deleted) - self._compacted
+
+    def add_source(self, source_id: str, chunks: Sequence[str]):
+        """Index chunks for a source, replacing anything indexed under it before"""
+        vectors = {}
+        if self.embed_fn is not None:
+            for i, text in enumerate(chunks):
+                try:
+                    vectors[i] = normalize(self.embed_fn(text))
+                except Exception as e:
+                    logger.warning("Embedding failed for %s chunk %d: %s", source_id, i, e)
+
+        with self._lock:
+            self.remove_source(source_id)
+            doc_ids = []
+            for i, text in enumerate(chunks):
+                doc_id = len(self._doc_len)
+                counts: Dict[str, int] = {}
+                for tok in tokenize(text):
+                    counts[tok] = counts.get(tok, 0) + 1
+                for tok, tf in counts.items():
+                    postings = self._postings.get(tok)
+                    if postings is None:
+                        postings = self._postings[tok] = Postings()
+                    postings.doc_ids.append(doc_id)
+                    postings.tfs.append(min(tf, 0xFFFF))
+                length = sum(counts.values())
+                self._doc_len.append(length)
+                self._doc_text.append(text)
+                self._doc_source.append(source_id)
+                self._total_len += length
+                if i in vectors:
+                    self._vectors[doc_id] = vectors[i]
+                doc_ids.append(doc_id)
+            self._sources[source_id] = doc_ids
+            if len(self._deleted) > max(1000, len(self._doc_len) // 4):
+                self._compact()
+        logger.info("Indexed %d chunks for %s", len(chunks), source_id)
+
+    def remove_source(self, source_id: str):
+        with self._lock:
+            for doc_id in self._sources.pop(source_id, []):
+                self._deleted.add(doc_id)
+                self._total_len -= self._doc_len[doc_id]
+                self._doc_text[doc_id] = None
+                self._doc_source[doc_id] = None
+                self._vectors.pop(doc_id, None)
+
+    def _compact(self):
+        """Drop deleted doc ids from postings; ids themselves are not reused"""
+        deleted = self._deleted
+        for tok in list(self._postings):
+            postings = self._postings[tok]
+            keep = [i for i, d in enumerate(postings.doc_ids) if d not in deleted]
+            if not keep:
+                del self._postings[tok]
+            elif len(keep) < len(postings.doc_ids):
+                fresh = Postings()
+                fresh.doc_ids = array('I', (postings.doc_ids[i] for i in keep))
+                fresh.tfs = array('H', (postings.tfs[i] for i in keep))
+                self._postings[tok] = fresh
+        for doc_id in deleted:
+            self._doc_len[doc_id] = 0
+        self._compacted += len(deleted)
+        self._deleted = set()
+
+    def search(self, query: str, k: int = 5) -> List[Dict]:
+        """Top-k chunks for a query, best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        # The query embedding may be a slow remote call; it must not hold
+        # the lock that every other search and upload waits on.
+        qvec = None
+        if self.embed_fn is not None and self._vectors:
+            try:
+                qvec = normalize(self.embed_fn(query))
+            except Exception as e:
+                logger.warning("Query embedding failed, using BM25 order: %s", e)
+        with self._lock:
+            n_docs = self.live_chunks
+            if n_docs == 0:
+                return []
+            avg_len = self._total_len / n_docs
+            k1, b = self.k1, self.b
+            depth = max(k, self.rerank_depth if self._vectors else k)
+
+            weighted = []
+            for tok in terms:
+                postings = self._postings.get(tok)
+                if postings is None:
+                    continue
+                df = len(postings.doc_ids)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                weighted.append((idf, postings))
+            # Rare terms first so the candidate set forms early
+            weighted.sort(key=lambda item: item[0], reverse=True)
+            # Terms in a large share of chunks carry almost no idf; treat them
+            # as stopwords unless the query has nothing rarer.
+            max_df = self.max_df_ratio * n_docs
+            selective = [item for item in weighted if len(item[1].doc_ids) <= max_df]
+            weighted = selective or weighted[:1]
+
+            # The max BM25 contribution of a term is idf * (k1 + 1)
+            remaining = [idf * (k1 + 1) for idf, _ in weighted]
+            for i in range(len(remaining) - 2, -1, -1):
+                remaining[i] += remaining[i + 1]
+
+            scores: Dict[int, float] = {}
+            doc_len = self._doc_len
+            deleted = self._deleted
+            for i, (idf, postings) in enumerate(weighted):
+                doc_ids, tfs = postings.doc_ids, postings.tfs
+                pruned = False
+                if len(scores) >= depth:
+                    threshold = heapq.nlargest(depth, scores.values())[-1]
+                    # No unseen doc can reach the top-k any more
+                    pruned = remaining[i] < threshold
+                long_list = 0 < self.champion_size < len(doc_ids)
+
+                if not pruned and not long_list:
+                    for doc_id, tf in zip(doc_ids, tfs):
+                        if doc_id in deleted:
+                            continue
+                        norm = k1 * (1 - b + b * doc_len[doc_id] / avg_len)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+                    continue
+
+                # Exact contribution for existing candidates; doc ids are
+                # appended in increasing order, so bisect finds their tf.
+                existing = list(scores)
+                for doc_id in existing:
+                    pos = bisect_left(doc_ids, doc_id)
+                    if pos < len(doc_ids) and doc_ids[pos] == doc_id:
+                        tf = tfs[pos]
+                        norm = k1 * (1 - b + b * doc_len[doc_id] / avg_len)
+                        scores[doc_id] += idf * tf * (k1 + 1) / (tf + norm)
+                if pruned:
+                    continue
+
+                # Long postings only admit new candidates from their
+                # highest-impact entries instead of being scanned in full.
+                for doc_id, tf in self._champions(postings, avg_len):
+                    if doc_id in deleted or doc_id in scores:
+                        continue
+                    norm = k1 * (1 - b + b * doc_len[doc_id] / avg_len)
+                    scores[doc_id] = idf * tf * (k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(depth, scores.items(), key=lambda item: item[1])
+            if qvec is None:
+                top = top[:k]
+            # Copied out so the re-rank runs after the lock is released
+            docs = {doc_id: (self._doc_source[doc_id], self._doc_text[doc_id], self._vectors.get(doc_id))
+                    for doc_id, _ in top}
+        if qvec is not None and top:
+            top = rerank(qvec, top, {doc_id: doc[2] for doc_id, doc in docs.items()}, self.vector_weight)
+        return [
+            {'source': docs[doc_id][0], 'text': docs[doc_id][1], 'score': round(score, 4)}
+            for doc_id, score in top[:k]
+        ]
+
+    def _champions(self, postings: Postings, avg_len: float):
+        if postings.champions is None or postings.champions_df != len(postings.doc_ids):
+            k1, b = self.k1, self.b
+            doc_len = self._doc_len
+            postings.champions = heapq.nlargest(
+                self.champion_size,
+                zip(postings.doc_ids, postings.tfs),
+                key=lambda item: item[1] / (item[1] + k1 * (1 - b + b * doc_len[item[0]] / avg_len))
+            )
+            postings.champions_df = len(postings.doc_ids)
+        return postings.champions
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'chunks': self.live_chunks,
+                'sources': len(self._sources),
+                'terms': len(self._postings),
+                'embeddings': len(self._vectors)
+            }
+
+
+def normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def rerank(qvec: List[float], top, vectors: Dict[int, Optional[List[float]]], vector_weight: float):
+    """BM25 candidates re-ordered by a blend of normalized score and cosine similarity"""
+    best = top[0][1] or 1.0
+    blended = []
+    for doc_id, score in top:
+        vec = vectors.get(doc_id)
+        cosine = sum(a * b for a, b in zip(qvec, vec)) if vec else 0.0
+        blended.append((doc_id, (1 - vector_weight) * score / best + vector_weight * cosine))
+    blended.sort(key=lambda item: item[1], reverse=True)
+    return blended
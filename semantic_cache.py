@@ -0,0 +1,174 @@
+"""
+Semantic deduplication cache for chat and generation prompts.
+
+Prompts are embedded locally into sparse hashed feature vectors (stemmed
+content words plus character trigrams), so no model call is needed to look
+one up. Entries are found through an inverted index over those features and
+a cached response is returned when cosine similarity clears the threshold.
+Entries are scoped (model, platform-state version, ...) so an answer is only
+reused where it would still be valid.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset(
+    'a an and are as at be by can could do does for from how i in is it its me '
+    'my of on or our please the this to us we what with would you your'.split()
+)
+
+FEATURE_DIM = 1 << 20
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping so analyze/analyzing/analyzes collapse"""
+    for suffix in ('ing', 'ed', 'es', 'e', 's'):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _feature(token: str) -> int:
+    digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % FEATURE_DIM
+
+
+def content_words(text: str) -> List[str]:
+    return [stem(w) for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def embed(words: List[str]) -> Dict[int, float]:
+    """Sparse, L2-normalized hashed embedding of a prompt's content words"""
+    weights: Dict[int, float] = {}
+    for word in words:
+        key = _feature('w:' + word)
+        weights[key] = weights.get(key, 0.0) + 1.0
+        # Character trigrams make the match tolerant of typos and inflections
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            key = _feature('c:' + padded[i:i + 3])
+            weights[key] = weights.get(key, 0.0) + 0.25
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return {k: w / norm for k, w in weights.items()}
+
+
+class CacheEntry:
+    """A cached prompt/response pair"""
+
+    __slots__ = ('scope', 'vector', 'response', 'latency', 'created_at', 'hits')
+
+    def __init__(self, scope: str, vector: Dict[int, float], response: str, latency: float):
+        self.scope = scope
+        self.vector = vector
+        self.response = response
+        self.latency = latency
+        self.created_at = time.monotonic()
+        self.hits = 0
+
+
+class SemanticCache:
+    """Returns stored responses for prompts similar to ones seen recently"""
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 5000,
+                 ttl: float = 3600, min_words: int = 2):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_words = min_words
+
+        self._entries: 'OrderedDict[int, CacheEntry]' = OrderedDict()
+        self._index: Dict[Tuple[str, int], set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.time_saved = 0.0
+
+    def lookup(self, scope: str, prompt: str) -> Optional[str]:
+        """Cached response for a similar prompt in the same scope, or None"""
+        start = time.monotonic()
+        words = content_words(prompt)
+        with self._lock:
+            self.lookups += 1
+        # Very short prompts ("yes", "more") depend on context; never reuse
+        if len(words) < self.min_words:
+            return None
+        vector = embed(words)
+        with self._lock:
+            candidates: Dict[int, float] = {}
+            for key, weight in vector.items():
+                for entry_id in self._index.get((scope, key), ()):
+                    candidates[entry_id] = candidates.get(entry_id, 0.0) + weight * self._entries[entry_id].vector[key]
+            if not candidates:
+                return None
+
+            entry_id, similarity = max(candidates.items(), key=lambda item: item[1])
+            entry = self._entries[entry_id]
+            if similarity < self.threshold:
+                return None
+            if time.monotonic() - entry.created_at > self.ttl:
+                self._remove(entry_id)
+                return None
+
+            self._entries.move_to_end(entry_id)
+            entry.hits += 1
+            self.hits += 1
+            self.time_saved += max(0.0, entry.latency - (time.monotonic() - start))
+            logger.info("Semantic cache hit (similarity %.3f) in scope %s", similarity, scope)
+            return entry.response
+
+    def store(self, scope: str, prompt: str, response: str, latency: float):
+        """Remember a response together with how long it took to produce"""
+        words = content_words(prompt)
+        if len(words) < self.min_words:
+            return
+        vector = embed(words)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = CacheEntry(scope, vector, response, latency)
+            for key in vector:
+                self._index.setdefault((scope, key), set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for key in entry.vector:
+            ids = self._index.get((entry.scope, key))
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._index[(entry.scope, key)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else 0,
+                'time_saved_ms': round(self.time_saved * 1000, 2),
+                'threshold': self.threshold
+            }
+
+
+def scope_key(*parts: str) -> str:
+    """Compact scope id from arbitrary strings (model name, context text, ...)"""
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()[:16]
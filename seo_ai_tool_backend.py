@@ -13,29 +13,67 @@ This backend implements:
 - Auto-scaling infrastructure
 """
 
-from flask import Flask, request, jsonify, render_template
-from flask_cors import CORS
-import requests
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import heapq
 import json
 import time
 import logging
+import os
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Any, Dict, Iterable, List, Sequence
 import random
-import asyncio
-import aiohttp
 from dataclasses import dataclass
 from enum import Enum
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from engine import engine
+from html_extract import PageExtract, extract_page
+from request_limits import body_limit, read_json_body
 
-app = Flask(__name__)
-CORS(app)
+# Mounted by app_factory.create_app(); logging, rate limits and the health
+# route come from the shared engine and core blueprint
+blueprint = Blueprint('seo', __name__)
+
+# Round trip of the simulated AI providers, in seconds
+PROVIDER_LATENCY = float(os.environ.get('MODURO_SEO_PROVIDER_LATENCY', 1.0))
+
+# AI analysis: providers in order of preference, how they are called (single,
+# hedged or ensemble), per-call timeout, the hedge delay used until a provider's
+# p95 latency is known, and the delay of the local 'stub' provider
+AI_PROVIDERS = os.environ.get('MODURO_SEO_PROVIDERS', '')
+AI_MODE = os.environ.get('MODURO_SEO_AI_MODE', 'hedged')
+AI_PROVIDER_TIMEOUT = float(os.environ.get('MODURO_SEO_PROVIDER_TIMEOUT', 20.0))
+AI_HEDGE_DELAY = float(os.environ.get('MODURO_SEO_HEDGE_DELAY', 2.0))
+AI_STUB_LATENCY = float(os.environ.get('MODURO_SEO_STUB_LATENCY', 0.05))
+
+# Provider routing: 'adaptive' (observed latency, errors and cost) or 'static'
+# (configured order); per-call costs as name=cost pairs, seconds of latency one
+# unit of cost is worth, share of calls that explore another provider, and
+# how long a provider failing 3 times in a row is ejected
+AI_ROUTING = os.environ.get('MODURO_SEO_ROUTING', 'adaptive')
+AI_PROVIDER_COSTS = os.environ.get('MODURO_SEO_PROVIDER_COSTS', '')
+AI_COST_WEIGHT = float(os.environ.get('MODURO_SEO_COST_WEIGHT', 1.0))
+AI_EXPLORE = float(os.environ.get('MODURO_SEO_EXPLORE', 0.05))
+AI_EJECTION_TIME = float(os.environ.get('MODURO_SEO_PROVIDER_EJECTION', 30.0))
+
+# Bulk audits: URLs per request and concurrent page audits per request
+BULK_MAX_URLS = int(os.environ.get('MODURO_BULK_MAX_URLS', 50000))
+BULK_CONCURRENCY = int(os.environ.get('MODURO_BULK_CONCURRENCY', 16))
+
+# Body size of a columnar batch sent to /api/seo-scores
+SCORE_BATCH_MAX_BYTES = int(os.environ.get('MODURO_SEO_SCORES_MAX_BYTES', 16 * 1024 * 1024))
+
+# Per-stage audit timeouts in seconds; a stage that overruns leaves a partial audit
+AUDIT_STAGE_TIMEOUTS = {
+    stage: float(os.environ.get(f'MODURO_AUDIT_TIMEOUT_{stage.upper()}', default))
+    for stage, default in (('crawl', 20.0), ('ai_analysis', 30.0), ('competitors', 15.0))
+}
+
+async def simulated_latency(seconds: float):
+    """Stand-in for a provider round trip"""
+    # Imported here so mounting the blueprint does not load asyncio
+    import asyncio
+    await asyncio.sleep(seconds)
 
 class AIProvider(Enum):
     OPENAI = "openai"
@@ -60,23 +98,76 @@ class AIProviderManager:
     """Manages multiple AI providers for SEO analysis"""
     
     def __init__(self):
+        from ai_providers import MODES, ProviderPool, RoutingPolicy, StubProvider, parse_costs
+        from analysis_cache import analysis_cache_from_env
         self.providers = {
             AIProvider.OPENAI: self.openai_analyze,
             AIProvider.ANTHROPIC: self.anthropic_analyze,
             AIProvider.GOOGLE: self.google_analyze,
             AIProvider.HUGGINGFACE: self.huggingface_analyze
         }
-        self.current_provider = AIProvider.OPENAI
+        # First in the default order; the routing policy decides from there
+        self.preferred_provider = AIProvider.OPENAI
+        available = {provider.value: analyze for provider, analyze in self.providers.items()}
+        # Answers locally from the crawled page, for tests and offline use
+        available['stub'] = StubProvider(latency=AI_STUB_LATENCY)
+        order = [self.preferred_provider.value] + [name for name in available
+                                                   if name not in (self.preferred_provider.value, 'stub')]
+        if AI_PROVIDERS:
+            order = [name.strip() for name in AI_PROVIDERS.split(',') if name.strip()]
+        unknown = [name for name in order if name not in available]
+        if unknown:
+            raise ValueError(f"Unknown AI providers in MODURO_SEO_PROVIDERS: {', '.join(unknown)}")
+        if AI_MODE not in MODES:
+            raise ValueError(f"MODURO_SEO_AI_MODE must be one of {', '.join(MODES)}")
+        self.mode = AI_MODE
+        policy = RoutingPolicy(order, strategy=AI_ROUTING, costs=parse_costs(AI_PROVIDER_COSTS),
+                               cost_weight=AI_COST_WEIGHT, explore=AI_EXPLORE, ejection_time=AI_EJECTION_TIME)
+        # Single, hedged or ensemble execution and per-provider latency histograms (see ai_providers.py)
+        self.pool = ProviderPool({name: available[name] for name in order}, timeout=AI_PROVIDER_TIMEOUT,
+                                 hedge_delay=AI_HEDGE_DELAY, policy=policy)
+        # Analyses of pages with the same content, by fingerprint (see analysis_cache.py)
+        self.cache = analysis_cache_from_env()
     
-    async def analyze_seo(self, site_data: Dict) -> Dict:
-        """Analyze SEO using current AI provider"""
-        provider_func = self.providers[self.current_provider]
-        return await provider_func(site_data)
+    @property
+    def current_provider(self):
+        """The provider the routing policy ranks first right now"""
+        name = self.pool.policy.get_state()['ranking'][0]
+        return AIProvider(name) if name in {provider.value for provider in AIProvider} else name
+    
+    async def analyze_seo(self, site_data: Dict, mode: str = None) -> Dict:
+        """Analyze SEO with the configured providers, by default in MODURO_SEO_AI_MODE
+        
+        A page with the same or nearly the same content as one analyzed before
+        gets the stored analysis, without calling any provider.
+        """
+        mode = mode or self.mode
+        if self.cache is None or 'error' in site_data:
+            return await self.pool.analyze(site_data, mode)
+        from analysis_cache import page_key
+        scope, fingerprint = page_key(site_data, mode)
+        cached = self.cache.lookup(scope, fingerprint)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        analysis = await self.pool.analyze(site_data, mode)
+        analysis['ai']['cached'] = False
+        self.cache.store(scope, fingerprint, analysis, time.perf_counter() - start)
+        return analysis
+    
+    def get_metrics(self) -> Dict:
+        metrics = {'mode': self.mode, **self.pool.get_metrics()}
+        if self.cache is not None:
+            metrics['cache'] = self.cache.get_metrics()
+        return metrics
+    
+    def get_routing_state(self) -> Dict:
+        return self.pool.policy.get_state()
     
     async def openai_analyze(self, site_data: Dict) -> Dict:
         """Analyze using OpenAI"""
         # Simulate OpenAI analysis
-        await asyncio.sleep(1)
+        await simulated_latency(PROVIDER_LATENCY)
         return {
             'score': random.uniform(70, 95),
             'recommendations': [
@@ -94,7 +185,7 @@ class AIProviderManager:
     
     async def anthropic_analyze(self, site_data: Dict) -> Dict:
         """Analyze using Anthropic Claude"""
-        await asyncio.sleep(1)
+        await simulated_latency(PROVIDER_LATENCY)
         return {
             'score': random.uniform(75, 98),
             'recommendations': [
@@ -112,7 +203,7 @@ class AIProviderManager:
     
     async def google_analyze(self, site_data: Dict) -> Dict:
         """Analyze using Google Gemini"""
-        await asyncio.sleep(1)
+        await simulated_latency(PROVIDER_LATENCY)
         return {
             'score': random.uniform(80, 99),
             'recommendations': [
@@ -130,7 +221,7 @@ class AIProviderManager:
     
     async def huggingface_analyze(self, site_data: Dict) -> Dict:
         """Analyze using Hugging Face models"""
-        await asyncio.sleep(1)
+        await simulated_latency(PROVIDER_LATENCY)
         return {
             'score': random.uniform(65, 90),
             'recommendations': [
@@ -150,168 +241,282 @@ class WebCrawlerManager:
     """Manages web crawling for SEO analysis"""
     
     def __init__(self):
-        self.session = None
+        # asyncio and aiohttp are only imported once the SEO services are built
+        from crawl_cache import crawl_cache_from_env
+        from crawler_loop import crawler_loop_from_env
+        # One event loop thread and pooled session for every crawl (see crawler_loop.py)
+        self.loop = crawler_loop_from_env()
+        engine.on_shutdown(self.loop.shutdown)
+        # Pages kept on disk and revalidated on re-audits (see crawl_cache.py)
+        self.cache = crawl_cache_from_env()
+        # Site crawl budgets and politeness (see site_crawler.py)
+        self.max_pages = int(os.environ.get('MODURO_CRAWL_MAX_PAGES', 500))
+        self.max_depth = int(os.environ.get('MODURO_CRAWL_MAX_DEPTH', 3))
+        self.concurrency = int(os.environ.get('MODURO_CRAWL_CONCURRENCY', 64))
+        self.per_host_concurrency = int(os.environ.get('MODURO_CRAWL_PER_HOST', 8))
+        self.crawl_delay = float(os.environ.get('MODURO_CRAWL_DELAY', 0.0))
+    
+    def get_session(self):
+        """The crawler loop's session; only usable from coroutines run on that loop"""
+        # aiohttp takes ~0.2s to import (it builds SSL contexts), so only the
+        # first crawl pays for it
+        self.loop.start()
+        return self.loop.session
+    
+    def site_crawler(self, **options):
+        """SiteCrawler on the shared session with this manager's budgets
+
+        Its coroutines must run on the crawler loop: await them through
+        `self.loop.call()`.
+        """
+        from site_crawler import SiteCrawler
+        settings = {
+            'max_pages': self.max_pages,
+            'max_depth': self.max_depth,
+            'concurrency': self.concurrency,
+            'per_host_concurrency': self.per_host_concurrency,
+            'crawl_delay': self.crawl_delay,
+            'cache': self.cache
+        }
+        settings.update(options)
+        return SiteCrawler(self.get_session(), **settings)
     
     async def crawl_comprehensive(self, url: str) -> Dict:
         """Crawl website comprehensively for SEO analysis"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-        
-        try:
-            async with self.session.get(url) as response:
-                html = await response.text()
-                
-                return {
-                    'url': url,
-                    'status_code': response.status,
-                    'html': html,
-                    'headers': dict(response.headers),
-                    'load_time': random.uniform(0.5, 3.0),
-                    'page_size': len(html),
-                    'meta_tags': self.extract_meta_tags(html),
-                    'links': self.extract_links(html),
-                    'images': self.extract_images(html),
-                    'text_content': self.extract_text_content(html)
-                }
-        except Exception as e:
-            logging.error(f"Crawling error: {e}")
-            return {'error': str(e)}
-    
-    def extract_meta_tags(self, html: str) -> Dict:
-        """Extract meta tags from HTML"""
-        # Simulate meta tag extraction
+        # A single audited page is fetched directly, without the robots.txt check
+        crawler = self.site_crawler(respect_robots=False, keep_html=True)
+        page = await self.loop.call(crawler.fetch(url))
+        return self.site_data(url, page)
+    
+    def site_data(self, url: str, page) -> Dict:
+        """What the analyzers need from one fetched page"""
+        if page.error is not None:
+            logging.error(f"Crawling error: {page.error}")
+            return {'error': page.error}
+        
+        # The body was parsed while it downloaded; nothing is parsed again here
+        extract = page.extract or extract_page(page.html or '', page.final_url)
+        return {
+            'url': url,
+            'status_code': page.status,
+            'html': page.html or '',
+            'headers': page.headers,
+            'load_time': page.load_time,
+            'ttfb': page.ttfb,
+            'page_size': page.size,
+            'cache': page.cache,
+            'meta_tags': self.meta_tags(extract),
+            'links': extract.link_urls(),
+            'images': [{'src': image['src'], 'alt': image['alt']} for image in extract.images],
+            'text_content': extract.text,
+            'canonical': extract.canonical,
+            'hreflang': extract.hreflang,
+            'headings': extract.headings,
+            'structured_data': {'json_ld': extract.json_ld, 'microdata': extract.microdata}
+        }
+    
+    async def bulk_audit_page(self, crawler, analyzer: 'SEOAnalyzerManager', rollup: 'SiteRollup',
+                              url: str) -> Dict:
+        """Crawl and score one URL of a bulk audit; runs on the crawler loop"""
+        site_data = self.site_data(url, await crawler.fetch(url))
+        scores = analyzer.calculate_seo_scores(site_data)
+        issues = analyzer.page_issues(site_data)
+        rollup.add(url, site_data, scores, issues)
         return {
-            'title': 'Sample Page Title',
-            'description': 'Sample meta description',
-            'keywords': 'sample, keywords',
-            'robots': 'index, follow',
-            'viewport': 'width=device-width, initial-scale=1'
+            'url': url,
+            'status_code': site_data.get('status_code'),
+            'scores': scores,
+            'issues': issues,
+            'load_time': site_data.get('load_time'),
+            'page_size': site_data.get('page_size'),
+            'cache': site_data.get('cache'),
+            **({'error': site_data['error']} if 'error' in site_data else {})
         }
     
-    def extract_links(self, html: str) -> List[str]:
+    def get_metrics(self) -> Dict:
+        return {**self.loop.get_metrics(), 'cache': self.cache.get_metrics() if self.cache else None}
+    
+    @staticmethod
+    def meta_tags(extract: PageExtract) -> Dict:
+        """Title plus every named meta tag of an extracted page"""
+        tags = dict(extract.meta)
+        tags['title'] = extract.title
+        return tags
+    
+    def extract_meta_tags(self, html: str, base_url: str = '') -> Dict:
+        """Extract meta tags from HTML"""
+        return self.meta_tags(extract_page(html, base_url))
+    
+    def extract_links(self, html: str, base_url: str = '') -> List[str]:
         """Extract links from HTML"""
-        # Simulate link extraction
-        return [
-            'https://example.com/page1',
-            'https://example.com/page2',
-            'https://external.com/link'
-        ]
+        return extract_page(html, base_url).link_urls()
     
-    def extract_images(self, html: str) -> List[Dict]:
+    def extract_images(self, html: str, base_url: str = '') -> List[Dict]:
         """Extract images from HTML"""
-        # Simulate image extraction
-        return [
-            {'src': '/image1.jpg', 'alt': 'Sample image 1'},
-            {'src': '/image2.jpg', 'alt': 'Sample image 2'}
-        ]
+        return [{'src': image['src'], 'alt': image['alt']}
+                for image in extract_page(html, base_url).images]
     
     def extract_text_content(self, html: str) -> str:
         """Extract text content from HTML"""
-        # Simulate text extraction
-        return "Sample page content with relevant keywords and information about the topic."
+        return extract_page(html).text
 
 class SEOAnalyzerManager:
-    """Manages SEO analysis and scoring"""
+    """Manages SEO analysis and scoring
+
+    Scores come from seo_scoring: `score_batch()` scores many pages' features
+    column-wise and the per-page methods run the same column expressions on
+    one page, so both follow the same ScoringRules (MODURO_SEO_SCORING_RULES).
+    """
     
     def __init__(self):
-        self.scoring_weights = {
-            'technical': 0.3,
-            'content': 0.25,
-            'mobile': 0.2,
-            'speed': 0.15,
-            'security': 0.1
-        }
+        from seo_scoring import scoring_rules_from_env
+        self.rules = scoring_rules_from_env()
+        self.scoring_weights = self.rules.weights
+    
+    def feature_batch(self, pages: Iterable[Dict] = (), columns: Dict[str, Sequence] = None):
+        """Columnar scoring features from site_data dicts and/or feature columns"""
+        from seo_scoring import FeatureBatch
+        batch = FeatureBatch(columns, keywords=self.rules.keywords)
+        batch.extend(pages)
+        return batch
+    
+    def score_batch(self, batch) -> Dict[str, Sequence[float]]:
+        """Sub-scores and overall score of every page of a FeatureBatch, as columns"""
+        from seo_scoring import score_batch
+        return score_batch(batch, self.rules)
     
     def calculate_seo_scores(self, site_data: Dict) -> Dict:
         """Calculate comprehensive SEO scores"""
-        scores = {
-            'technical_score': self.calculate_technical_score(site_data),
-            'content_score': self.calculate_content_score(site_data),
-            'mobile_score': self.calculate_mobile_score(site_data),
-            'speed_score': self.calculate_speed_score(site_data),
-            'security_score': self.calculate_security_score(site_data),
-            'overall_score': 0
-        }
-        
-        # Calculate weighted overall score
-        overall_score = sum(
-            scores[key] * self.scoring_weights[key.split('_')[0]]
-            for key in scores.keys()
-            if key != 'overall_score'
-        )
-        
-        scores['overall_score'] = overall_score
-        return scores
+        from seo_scoring import score_page
+        return score_page(site_data, self.rules)
     
     def calculate_technical_score(self, site_data: Dict) -> float:
         """Calculate technical SEO score"""
-        score = 100
-        
-        # Check for technical issues
-        if 'error' in site_data:
-            score -= 30
-        
-        if site_data.get('status_code', 200) != 200:
-            score -= 20
-        
-        # Check meta tags
-        meta_tags = site_data.get('meta_tags', {})
-        if not meta_tags.get('title'):
-            score -= 10
-        if not meta_tags.get('description'):
-            score -= 10
-        
-        return max(0, score)
+        return self.calculate_seo_scores(site_data)['technical_score']
     
     def calculate_content_score(self, site_data: Dict) -> float:
         """Calculate content SEO score"""
-        score = 100
-        text_content = site_data.get('text_content', '')
-        
-        # Check content length
-        if len(text_content) < 300:
-            score -= 20
-        elif len(text_content) > 2000:
-            score += 10
-        
-        # Check for keywords (simplified)
-        if 'sample' in text_content.lower():
-            score += 5
-        
-        return max(0, min(100, score))
+        return self.calculate_seo_scores(site_data)['content_score']
     
     def calculate_mobile_score(self, site_data: Dict) -> float:
         """Calculate mobile optimization score"""
-        score = 100
-        meta_tags = site_data.get('meta_tags', {})
-        
-        if not meta_tags.get('viewport'):
-            score -= 30
-        
-        return max(0, score)
+        return self.calculate_seo_scores(site_data)['mobile_score']
     
     def calculate_speed_score(self, site_data: Dict) -> float:
         """Calculate page speed score"""
-        load_time = site_data.get('load_time', 3.0)
-        
-        if load_time < 1.0:
-            return 100
-        elif load_time < 2.0:
-            return 90
-        elif load_time < 3.0:
-            return 70
-        else:
-            return 50
+        return self.calculate_seo_scores(site_data)['speed_score']
+    
+    def page_issues(self, site_data: Dict) -> List[str]:
+        """Problems behind the score deductions, as short labels"""
+        if 'error' in site_data:
+            return ['unreachable']
+        issues = []
+        if site_data.get('status_code', 200) != 200:
+            issues.append(f"status_{site_data.get('status_code')}")
+        meta_tags = site_data.get('meta_tags', {})
+        if not meta_tags.get('title'):
+            issues.append('missing_title')
+        if not meta_tags.get('description'):
+            issues.append('missing_description')
+        if not meta_tags.get('viewport'):
+            issues.append('missing_viewport')
+        if len(site_data.get('text_content', '')) < self.rules.content['thin_below']:
+            issues.append('thin_content')
+        # Slower than every scoring band
+        if self.rules.speed_limits and (site_data.get('load_time') or 0) >= self.rules.speed_limits[-1]:
+            issues.append('slow_page')
+        if not any(name.lower() == 'strict-transport-security' for name in site_data.get('headers', {})):
+            issues.append('missing_hsts')
+        return issues
+    
+    def site_rollup(self, worst_pages: int = 10) -> 'SiteRollup':
+        """Accumulator for a site-level summary of many page audits"""
+        return SiteRollup(self.scoring_weights, worst_pages)
     
     def calculate_security_score(self, site_data: Dict) -> float:
         """Calculate security score"""
-        score = 100
-        headers = site_data.get('headers', {})
+        return self.calculate_seo_scores(site_data)['security_score']
+
+class SiteRollup:
+    """Site-level summary built one page at a time in constant memory
+
+    Averages and counts are running totals, load-time percentiles come from
+    a fixed-size reservoir sample and only the `worst_pages` lowest-scoring
+    pages are kept.
+    """
+    
+    RESERVOIR_SIZE = 1024
+    
+    def __init__(self, scoring_weights: Dict[str, float], worst_pages: int = 10):
+        self.score_keys = [f'{name}_score' for name in scoring_weights] + ['overall_score']
+        self.worst_pages = worst_pages
+        self.pages = 0
+        self.errors = 0
+        self.score_totals = dict.fromkeys(self.score_keys, 0.0)
+        self.score_histogram = [0] * 10
+        self.status_codes: Dict[str, int] = {}
+        self.issues: Dict[str, int] = {}
+        self.bytes = 0
+        self.cache: Dict[str, int] = {}
+        self._load_times: List[float] = []
+        self._load_samples = 0
+        self._random = random.Random(0)
+        self._worst: List = []  # max-heap by score via negation: (-score, url)
+    
+    def add(self, url: str, site_data: Dict, scores: Dict, issues: List[str]):
+        self.pages += 1
+        for issue in issues:
+            self.issues[issue] = self.issues.get(issue, 0) + 1
+        if 'error' in site_data:
+            self.errors += 1
+            return
+        status = str(site_data.get('status_code'))
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        if site_data.get('cache'):
+            self.cache[site_data['cache']] = self.cache.get(site_data['cache'], 0) + 1
+        self.bytes += site_data.get('page_size') or 0
+        for key in self.score_keys:
+            self.score_totals[key] += scores.get(key, 0)
+        overall = scores.get('overall_score', 0)
+        self.score_histogram[min(9, max(0, int(overall // 10)))] += 1
+        load_time = site_data.get('load_time')
+        if load_time is not None:
+            # Reservoir sampling keeps a uniform sample of every load time seen
+            self._load_samples += 1
+            if len(self._load_times) < self.RESERVOIR_SIZE:
+                self._load_times.append(load_time)
+            else:
+                slot = self._random.randrange(self._load_samples)
+                if slot < self.RESERVOIR_SIZE:
+                    self._load_times[slot] = load_time
+        entry = (-overall, url)
+        if len(self._worst) < self.worst_pages:
+            heapq.heappush(self._worst, entry)
+        elif entry > self._worst[0]:
+            heapq.heapreplace(self._worst, entry)
+    
+    def summary(self) -> Dict:
+        scored = self.pages - self.errors
+        load_times = sorted(self._load_times)
         
-        if not headers.get('Strict-Transport-Security'):
-            score -= 20
+        def percentile(q: float):
+            return round(load_times[min(len(load_times) - 1, int(q * len(load_times)))], 4) if load_times else None
         
-        return max(0, score)
+        return {
+            'pages': self.pages,
+            'errors': self.errors,
+            'average_scores': {key: round(total / scored, 2) if scored else None
+                               for key, total in self.score_totals.items()},
+            'overall_score_histogram': {f'{10 * i}-{10 * i + 9}': count
+                                        for i, count in enumerate(self.score_histogram)},
+            'status_codes': self.status_codes,
+            'issues': dict(sorted(self.issues.items(), key=lambda kv: -kv[1])),
+            'load_time_p50': percentile(0.5),
+            'load_time_p95': percentile(0.95),
+            'bytes': self.bytes,
+            'cache': self.cache,
+            'worst_pages': [{'url': url, 'overall_score': -score} for score, url in sorted(self._worst, reverse=True)]
+        }
 
 class CompetitorAnalyzer:
     """Analyzes competitors for SEO insights"""
@@ -370,24 +575,30 @@ class RevenueTracker:
             'churn_rate': self.churn_rate
         }
 
-# Initialize managers
-ai_manager = AIProviderManager()
-crawler_manager = WebCrawlerManager()
-analyzer_manager = SEOAnalyzerManager()
-competitor_analyzer = CompetitorAnalyzer()
-revenue_tracker = RevenueTracker()
+class SEOServices:
+    """The managers behind the SEO routes, built together on first use"""
 
-@app.route('/api/health')
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0',
-        'mode': 'hyper_aggressive'
-    })
+    def __init__(self):
+        self.ai_manager = AIProviderManager()
+        self.crawler_manager = WebCrawlerManager()
+        self.analyzer_manager = SEOAnalyzerManager()
+        self.competitor_analyzer = CompetitorAnalyzer()
+        self.revenue_tracker = RevenueTracker()
+
+_services = None
+_services_lock = threading.Lock()
+
+def services() -> SEOServices:
+    """Process-wide SEOServices; nothing is built until an SEO route runs"""
+    global _services
+    if _services is None:
+        with _services_lock:
+            if _services is None:
+                _services = SEOServices()
+    return _services
 
-@app.route('/api/seo-audit', methods=['POST'])
+@blueprint.route('/api/seo-audit', methods=['POST'])
+@engine.admission.limit(rate=0.5, burst=3, max_concurrent=8, max_wait=5.0)
 async def seo_audit():
     """Perform comprehensive SEO audit"""
     try:
@@ -397,24 +608,14 @@ async def seo_audit():
         if not url:
             return jsonify({'error': 'URL is required'}), 400
         
-        # 1. Crawl website
-        site_data = await crawler_manager.crawl_comprehensive(url)
+        from ai_providers import MODES
+        ai_mode = data.get('ai_mode')
+        if ai_mode is not None and ai_mode not in MODES:
+            return jsonify({'error': f"ai_mode must be one of {', '.join(MODES)}"}), 400
         
-        # 2. Analyze with AI
-        ai_analysis = await ai_manager.analyze_seo(site_data)
-        
-        # 3. Calculate scores
-        scores = analyzer_manager.calculate_seo_scores(site_data)
-        
-        # 4. Analyze competitors
-        competitor_data = await competitor_analyzer.analyze_competitors(url)
-        
-        # 5. Generate recommendations
-        recommendations = ai_analysis.get('recommendations', [])
-        technical_issues = ai_analysis.get('technical_issues', [])
-        
-        # 6. Create action items
-        action_items = generate_action_items(recommendations, technical_issues)
+        seo = services()
+        run = await build_audit_pipeline(seo, url, ai_mode).run()
+        scores = run['scores']
         
         result = SEOAuditResult(
             url=url,
@@ -423,9 +624,9 @@ async def seo_audit():
             content_score=scores['content_score'],
             mobile_score=scores['mobile_score'],
             speed_score=scores['speed_score'],
-            recommendations=recommendations,
-            competitor_analysis=competitor_data,
-            action_items=action_items,
+            recommendations=run['ai_analysis'].get('recommendations', []),
+            competitor_analysis=run['competitors'],
+            action_items=run['action_items'],
             timestamp=datetime.now()
         )
         
@@ -441,13 +642,124 @@ async def seo_audit():
                 'competitor_analysis': result.competitor_analysis,
                 'action_items': result.action_items,
                 'timestamp': result.timestamp.isoformat()
-            }
+            },
+            'ai': run['ai_analysis'].get('ai'),
+            'pipeline': run.to_dict()
         })
         
     except Exception as e:
         logging.error(f"SEO audit error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@blueprint.route('/api/seo-audit/bulk', methods=['POST'])
+@engine.admission.limit(rate=0.05, burst=2)
+def bulk_seo_audit():
+    """Audit a sitemap or URL list; one NDJSON line per page, then the site rollup"""
+    data = read_json_body()
+    sitemap = data.get('sitemap')
+    urls = data.get('urls')
+    if not sitemap and not isinstance(urls, list):
+        return jsonify({'error': 'Provide a sitemap URL or a urls list'}), 400
+    try:
+        concurrency = max(1, min(int(data.get('concurrency', BULK_CONCURRENCY)), BULK_CONCURRENCY))
+        max_urls = max(1, min(int(data.get('max_urls', BULK_MAX_URLS)), BULK_MAX_URLS))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'concurrency and max_urls must be integers'}), 400
+    
+    from bulk_audit import BulkAudit, iterate, sitemap_urls
+    seo = services()
+    crawler_manager = seo.crawler_manager
+    # One crawler for the whole job, so its per-host limits and delay apply across pages
+    crawler = crawler_manager.site_crawler(respect_robots=False)
+    rollup = seo.analyzer_manager.site_rollup()
+    source = sitemap_urls(crawler_manager.get_session(), sitemap, user_agent=crawler.user_agent) \
+        if sitemap else iterate(url for url in urls if isinstance(url, str))
+    job = BulkAudit(
+        source,
+        lambda url: crawler_manager.bulk_audit_page(crawler, seo.analyzer_manager, rollup, url),
+        concurrency=concurrency,
+        max_urls=max_urls
+    )
+    logging.info(f"Bulk audit of {sitemap or f'{len(urls)} URLs'} with {concurrency} workers")
+    
+    def generate():
+        running = crawler_manager.loop.submit(job.run())
+        try:
+            while True:
+                batch = crawler_manager.loop.run(job.next_batch())
+                if not batch:
+                    break
+                yield ''.join(json.dumps(result) + '\n' for result in batch)
+            yield json.dumps({'rollup': rollup.summary(), 'job': job.summary(), 'done': True}) + '\n'
+        finally:
+            # Stops the workers if the client disconnects mid-stream
+            running.cancel()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@blueprint.route('/api/seo-scores', methods=['POST'])
+@body_limit(SCORE_BATCH_MAX_BYTES)
+@engine.admission.limit(rate=2, burst=5, max_concurrent=4)
+def score_pages():
+    """Score many pages from columnar features: {"columns": {"status_code": [...], ...}}"""
+    data = read_json_body()
+    columns = data.get('columns')
+    if not isinstance(columns, dict) or not all(isinstance(values, list) for values in columns.values()):
+        return jsonify({'error': 'Provide columns as a mapping of feature name to list'}), 400
+    analyzer = services().analyzer_manager
+    try:
+        batch = analyzer.feature_batch(columns=columns)
+    except (TypeError, ValueError, OverflowError) as e:
+        return jsonify({'error': f'Invalid feature columns: {e}'}), 400
+    start = time.perf_counter()
+    scores = analyzer.score_batch(batch)
+    elapsed = time.perf_counter() - start
+    return jsonify({
+        'pages': len(batch),
+        'scores': {key: column.tolist() for key, column in scores.items()},
+        'scoring_time': round(elapsed, 6)
+    })
+
+@blueprint.route('/api/seo-scores/rules', methods=['GET'])
+def scoring_rules():
+    """Weights, deductions and thresholds in effect"""
+    return jsonify(services().analyzer_manager.rules.to_dict())
+
+@blueprint.route('/api/seo-providers', methods=['GET'])
+def ai_provider_metrics():
+    """AI provider mode, order, call counts, per-provider latency histograms and analysis cache hits"""
+    return jsonify(services().ai_manager.get_metrics())
+
+@blueprint.route('/api/seo-providers/routing', methods=['GET'])
+def ai_provider_routing():
+    """Routing strategy, current ranking and each provider's rolling latency, errors and cost"""
+    return jsonify(services().ai_manager.get_routing_state())
+
+def build_audit_pipeline(seo: SEOServices, url: str, ai_mode: str = None):
+    """The audit as a stage graph
+
+    The crawl feeds the AI analysis (and through it the action items) and the
+    scores. Competitor research needs only the URL, so it runs alongside.
+    """
+    from audit_pipeline import AuditPipeline, Stage
+    
+    def action_items(inputs: Dict) -> List[str]:
+        analysis = inputs['ai_analysis']
+        return generate_action_items(analysis.get('recommendations', []), analysis.get('technical_issues', []))
+    
+    return AuditPipeline([
+        Stage('crawl', lambda inputs: seo.crawler_manager.crawl_comprehensive(url),
+              timeout=AUDIT_STAGE_TIMEOUTS['crawl'], default={'url': url, 'error': 'Crawl did not complete'}),
+        Stage('competitors', lambda inputs: seo.competitor_analyzer.analyze_competitors(url),
+              timeout=AUDIT_STAGE_TIMEOUTS['competitors'], default={}),
+        Stage('ai_analysis', lambda inputs: seo.ai_manager.analyze_seo(inputs['crawl'], ai_mode), after=['crawl'],
+              timeout=AUDIT_STAGE_TIMEOUTS['ai_analysis'], default={}),
+        Stage('scores', lambda inputs: seo.analyzer_manager.calculate_seo_scores(inputs['crawl']), after=['crawl'],
+              default=dict.fromkeys(('technical_score', 'content_score', 'mobile_score', 'speed_score',
+                                     'security_score', 'overall_score'), 0)),
+        Stage('action_items', action_items, after=['ai_analysis'], default=[])
+    ])
+
 def generate_action_items(recommendations: List[str], technical_issues: List[str]) -> List[str]:
     """Generate actionable items from analysis"""
     action_items = []
@@ -469,13 +781,18 @@ def generate_action_items(recommendations: List[str], technical_issues: List[str
         *low_priority
     ]
 
-@app.route('/api/revenue')
+@blueprint.route('/api/revenue')
 def get_revenue_metrics():
     """Get current revenue metrics"""
-    metrics = revenue_tracker.update_metrics()
+    metrics = services().revenue_tracker.update_metrics()
     return jsonify(metrics)
 
-@app.route('/api/performance')
+@blueprint.route('/api/crawler')
+def crawler_metrics():
+    """Crawler loop state, connection reuse and crawl cache hit rate"""
+    return jsonify(services().crawler_manager.get_metrics())
+
+@blueprint.route('/api/performance')
 def get_performance_metrics():
     """Get performance metrics"""
     return jsonify({
@@ -487,16 +804,16 @@ def get_performance_metrics():
         'error_rate': random.uniform(0.01, 0.05)
     })
 
-@app.route('/api/competitors/<path:url>')
+@blueprint.route('/api/competitors/<path:url>')
 async def analyze_competitors_endpoint(url):
     """Analyze competitors for a given URL"""
     try:
-        competitor_data = await competitor_analyzer.analyze_competitors(url)
+        competitor_data = await services().competitor_analyzer.analyze_competitors(url)
         return jsonify({'competitor_analysis': competitor_data})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/content-optimization', methods=['POST'])
+@blueprint.route('/api/content-optimization', methods=['POST'])
 def content_optimization():
     """Optimize content for SEO"""
     try:
@@ -517,7 +834,7 @@ def content_optimization():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/technical-seo', methods=['POST'])
+@blueprint.route('/api/technical-seo', methods=['POST'])
 def technical_seo_analysis():
     """Perform technical SEO analysis"""
     try:
@@ -544,7 +861,7 @@ def technical_seo_analysis():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/keyword-research', methods=['POST'])
+@blueprint.route('/api/keyword-research', methods=['POST'])
 def keyword_research():
     """Perform keyword research"""
     try:
@@ -563,7 +880,7 @@ def keyword_research():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/backlink-analysis', methods=['POST'])
+@blueprint.route('/api/backlink-analysis', methods=['POST'])
 def backlink_analysis():
     """Analyze backlinks"""
     try:
@@ -585,14 +902,10 @@ def backlink_analysis():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/')
-def index():
-    """Serve the main application"""
-    return render_template('index.html')
-
 if __name__ == '__main__':
     logging.info("🚀 STARTING HYPER-AGGRESSIVE SEO AI TOOL BACKEND")
     logging.info("🎯 TARGET: $100K MRR in 12 weeks")
     logging.info("⚡ MODE: MAXIMUM VELOCITY")
     
-    app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
+    from app_factory import create_app
+    create_app(['seo']).run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+Columnar SEO scoring.
+
+Page scores depend on a handful of features per page: error, status code,
+title/description/viewport present, text length, keyword mentioned, load time
+and HSTS present. A FeatureBatch holds those features for many pages as
+parallel typed arrays, one per feature, and `score_batch()` computes every
+sub-score and the weighted overall score for the whole batch one column
+expression at a time, rather than one page at a time through dict lookups.
+
+With numpy installed the columns are scored as numpy arrays without copying
+them. Without it they are scored with one comprehension per sub-score over the
+zipped columns. The two give the same results.
+
+The deductions, thresholds and weights are ScoringRules. The defaults are the
+original rules. `MODURO_SEO_SCORING_RULES` names a JSON file that overrides
+any of them, e.g. `{"weights": {"speed": 0.25, "security": 0.0},
+"speed": {"bands": [[0.8, 100], [2.5, 80]], "slowest": 40}}`.
+"""
+
+import copy
+import json
+import logging
+import os
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ('technical', 'content', 'mobile', 'speed', 'security')
+SCORE_KEYS = tuple(f'{name}_score' for name in CATEGORIES) + ('overall_score',)
+
+# Feature columns: typecode, and the value for a page that lacks the field
+COLUMNS = {
+    'error': ('B', 0),
+    'status_code': ('i', 200),
+    'has_title': ('B', 0),
+    'has_description': ('B', 0),
+    'has_viewport': ('B', 0),
+    'text_length': ('q', 0),
+    'keyword': ('B', 0),
+    'load_time': ('d', 3.0),
+    'has_hsts': ('B', 0)
+}
+
+
+def _clamp(score: float) -> float:
+    return max(0.0, min(100.0, score))
+
+
+class ScoringRules:
+    """Weights, deductions and thresholds of the SEO scores"""
+
+    DEFAULTS = {
+        'weights': {'technical': 0.3, 'content': 0.25, 'mobile': 0.2, 'speed': 0.15, 'security': 0.1},
+        'technical': {'base': 100, 'error': 30, 'bad_status': 20, 'missing_title': 10, 'missing_description': 10},
+        'content': {'base': 100, 'thin_below': 300, 'thin_penalty': 20, 'long_above': 2000, 'long_bonus': 10,
+                    'keywords': ['sample'], 'keyword_bonus': 5},
+        'mobile': {'base': 100, 'missing_viewport': 30},
+        # Score of each [upper load-time bound, score] band, and beyond the last
+        'speed': {'bands': [[1.0, 100], [2.0, 90], [3.0, 70]], 'slowest': 50},
+        'security': {'base': 100, 'missing_hsts': 20}
+    }
+
+    def __init__(self, overrides: Optional[Dict] = None):
+        config = copy.deepcopy(self.DEFAULTS)
+        for section, values in (overrides or {}).items():
+            if section not in config or not isinstance(values, dict):
+                raise ValueError(f"Unknown scoring rules section {section!r}")
+            for key, value in values.items():
+                if key not in config[section]:
+                    raise ValueError(f"Unknown scoring rule {section}.{key}")
+                config[section][key] = value
+        self.config = config
+        self.weights: Dict[str, float] = {name: float(config['weights'][name]) for name in CATEGORIES}
+        if any(weight < 0 for weight in self.weights.values()):
+            raise ValueError('Scoring weights must not be negative')
+        self.technical = {key: float(value) for key, value in config['technical'].items()}
+        content = config['content']
+        self.keywords = tuple(str(word).lower() for word in content['keywords'])
+        self.content = {key: float(value) for key, value in content.items() if key != 'keywords'}
+        if self.content['thin_below'] > self.content['long_above']:
+            raise ValueError('content.thin_below must not exceed content.long_above')
+        self.mobile = {key: float(value) for key, value in config['mobile'].items()}
+        self.security = {key: float(value) for key, value in config['security'].items()}
+        # Scores that depend on one flag or band, precomputed and indexed by it
+        self.mobile_scores = (_clamp(self.mobile['base'] - self.mobile['missing_viewport']),
+                              _clamp(self.mobile['base']))
+        self.security_scores = (_clamp(self.security['base'] - self.security['missing_hsts']),
+                                _clamp(self.security['base']))
+        bands = sorted((float(limit), float(score)) for limit, score in config['speed']['bands'])
+        self.speed_limits = [limit for limit, _ in bands]
+        self.speed_scores = [_clamp(score) for _, score in bands] + [_clamp(float(config['speed']['slowest']))]
+
+    def to_dict(self) -> Dict:
+        return copy.deepcopy(self.config)
+
+
+def scoring_rules_from_env() -> ScoringRules:
+    """ScoringRules with the overrides of the MODURO_SEO_SCORING_RULES file, if any"""
+    path = os.environ.get('MODURO_SEO_SCORING_RULES')
+    if not path:
+        return ScoringRules()
+    with open(path, 'r', encoding='utf-8') as fh:
+        rules = ScoringRules(json.load(fh))
+    logger.info("SEO scoring rules loaded from %s", path)
+    return rules
+
+
+def page_features(site_data: Dict, keywords: Sequence[str] = ('sample',)) -> Tuple:
+    """One page's feature values, in COLUMNS order, from the crawler's site_data dict"""
+    meta_tags = site_data.get('meta_tags') or {}
+    text = site_data.get('text_content') or ''
+    status_code = site_data.get('status_code', 200)
+    load_time = site_data.get('load_time')
+    lowered = text.lower() if keywords else ''
+    return (
+        'error' in site_data,
+        # None (no response) is not 200 and is penalised like any other status
+        0 if status_code is None else int(status_code),
+        bool(meta_tags.get('title')),
+        bool(meta_tags.get('description')),
+        bool(meta_tags.get('viewport')),
+        len(text),
+        any(word in lowered for word in keywords),
+        3.0 if load_time is None else float(load_time),
+        any(name.lower() == 'strict-transport-security' for name in site_data.get('headers') or {})
+    )
+
+
+class FeatureBatch:
+    """Scoring features of many pages as parallel typed columns"""
+
+    def __init__(self, columns: Optional[Dict[str, Sequence]] = None, keywords: Sequence[str] = ('sample',)):
+        self.keywords = tuple(keywords)
+        self.columns: Dict[str, array] = {name: array(code) for name, (code, _) in COLUMNS.items()}
+        if columns:
+            self.extend_columns(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns['status_code'])
+
+    def extend_columns(self, columns: Dict[str, Sequence]):
+        """Append pages given column-wise; a missing column means every page lacks that field"""
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {', '.join(sorted(unknown))}")
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('Feature columns differ in length')
+        count = lengths.pop() if lengths else 0
+        for name, (code, default) in COLUMNS.items():
+            values = columns.get(name)
+            if values is None:
+                self.columns[name].extend(array(code, [default]) * count)
+            elif code == 'd':
+                self.columns[name].extend(map(float, values))
+            elif code == 'B':
+                # Flags are stored as 0/1, which the scorers use as indexes
+                self.columns[name].extend(map(bool, values))
+            else:
+                self.columns[name].extend(map(int, values))
+
+    def append(self, site_data: Dict):
+        """Append one page's features, from the crawler's site_data dict"""
+        for column, value in zip(self.columns.values(), page_features(site_data, self.keywords)):
+            column.append(value)
+
+    def extend(self, pages: Iterable[Dict]):
+        for site_data in pages:
+            self.append(site_data)
+
+
+def score_batch(batch: FeatureBatch, rules: ScoringRules) -> Dict[str, Sequence[float]]:
+    """Every sub-score and the overall score of every page, as float columns"""
+    if numpy is not None:
+        return _score_numpy(batch.columns, rules)
+    return {key: array('d', values) for key, values in _score_columns(batch.columns, rules).items()}
+
+
+def score_page(site_data: Dict, rules: ScoringRules) -> Dict[str, float]:
+    """Scores of a single page, by the same rules as score_batch()"""
+    features = page_features(site_data, rules.keywords)
+    columns = {name: (value,) for name, value in zip(COLUMNS, features)}
+    return {key: values[0] for key, values in _score_columns(columns, rules).items()}
+
+
+def _score_columns(c: Dict[str, Sequence], rules: ScoringRules) -> Dict[str, List[float]]:
+    # Rule values are bound to locals once; the comprehensions run per page
+    t, k = rules.technical, rules.content
+    technical_base, error, bad_status = t['base'], t['error'], t['bad_status']
+    no_title, no_description = t['missing_title'], t['missing_description']
+    technical = [
+        max(0.0, min(100.0, technical_base - e * error - (code != 200) * bad_status
+                     - (not title) * no_title - (not description) * no_description))
+        for e, code, title, description in zip(c['error'], c['status_code'], c['has_title'], c['has_description'])
+    ]
+    content_base, thin_below, thin, long_above, bonus, keyword = (
+        k['base'], k['thin_below'], k['thin_penalty'], k['long_above'], k['long_bonus'], k['keyword_bonus'])
+    content = [
+        max(0.0, min(100.0, content_base - (n < thin_below) * thin + (n > long_above) * bonus + w * keyword))
+        for n, w in zip(c['text_length'], c['keyword'])
+    ]
+    # Indexed by the has_viewport / has_hsts flag
+    mobile_scores, security_scores = rules.mobile_scores, rules.security_scores
+    mobile = [mobile_scores[v] for v in c['has_viewport']]
+    security = [security_scores[h] for h in c['has_hsts']]
+    limits, band_scores = rules.speed_limits, rules.speed_scores
+    speed = [band_scores[bisect_right(limits, lt)] for lt in c['load_time']]
+
+    wt, wc, wm, ws, wx = (rules.weights[name] for name in CATEGORIES)
+    overall = [
+        a * wt + b * wc + d * wm + e * ws + f * wx
+        for a, b, d, e, f in zip(technical, content, mobile, speed, security)
+    ]
+    return {
+        'technical_score': technical,
+        'content_score': content,
+        'mobile_score': mobile,
+        'speed_score': speed,
+        'security_score': security,
+        'overall_score': overall
+    }
+
+
+def _score_numpy(c: Dict[str, array], rules: ScoringRules) -> Dict:
+    # array.array exports its buffer with its type, so these are zero-copy views
+    col = {name: numpy.asarray(values) for name, values in c.items()}
+    t, k = rules.technical, rules.content
+    technical = (t['base'] - col['error'] * t['error'] - (col['status_code'] != 200) * t['bad_status']
+                 - (col['has_title'] == 0) * t['missing_title']
+                 - (col['has_description'] == 0) * t['missing_description'])
+    content = (k['base'] - (col['text_length'] < k['thin_below']) * k['thin_penalty']
+               + (col['text_length'] > k['long_above']) * k['long_bonus'] + col['keyword'] * k['keyword_bonus'])
+    # Flags index the precomputed (without, with) scores; a boolean index would be a mask
+    mobile = numpy.asarray(rules.mobile_scores)[col['has_viewport']]
+    speed = numpy.asarray(rules.speed_scores)[numpy.searchsorted(rules.speed_limits, col['load_time'], side='right')]
+    security = numpy.asarray(rules.security_scores)[col['has_hsts']]
+    scores = {
+        f'{name}_score': numpy.clip(numpy.asarray(values, dtype=numpy.float64), 0.0, 100.0)
+        for name, values in zip(CATEGORIES, (technical, content, mobile, speed, security))
+    }
+    overall = numpy.zeros(len(col['status_code']))
+    for name in CATEGORIES:
+        overall += scores[f'{name}_score'] * rules.weights[name]
+    scores['overall_score'] = overall
+    return scores
@@ -0,0 +1,153 @@
+"""
+Fast, pluggable response serialization for the Moduro Flask apps.
+
+`app.json = FastJSONProvider(app)` makes every jsonify() call use orjson when
+it is installed and fall back to the stdlib encoder otherwise. Both paths
+serialize NumPy arrays and scalars, datetimes, dates, sets, Decimals and
+dataclasses without per-endpoint conversion code. Whatever orjson cannot
+handle exactly (integers beyond 64 bits, literals such as 1e400) goes through
+the stdlib json module, so results match the stdlib provider.
+
+Clients that send `Accept: application/msgpack` get MessagePack instead of
+JSON when the optional `msgpack` package is installed.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import json
+import re
+import uuid
+from typing import Any, Callable, Dict
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+# orjson decodes integers beyond 64 bits to floats; any number this long is
+# left to the stdlib decoder
+_LONG_DIGITS = re.compile(r'\d{19}')
+_LONG_DIGITS_BYTES = re.compile(rb'\d{19}')
+
+
+def to_builtin(obj: Any) -> Any:
+    """Convert a value the encoders do not know into plain Python types"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    # NumPy arrays and scalars, without importing numpy
+    if hasattr(obj, 'tolist') and hasattr(obj, 'dtype'):
+        return obj.tolist()
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def _orjson_dumps(obj: Any, sort_keys: bool, indent: bool) -> bytes:
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(obj, default=to_builtin, option=option)
+    except orjson.JSONEncodeError:
+        # e.g. an integer beyond 64 bits; the stdlib encoder takes any int
+        return _stdlib_dumps(obj, sort_keys, indent)
+
+
+def _orjson_loads(s) -> Any:
+    pattern = _LONG_DIGITS if isinstance(s, str) else _LONG_DIGITS_BYTES
+    if pattern.search(s):
+        return json.loads(s)
+    try:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
+        # The stdlib also takes NaN, Infinity and 1e400, or raises its own error
+        return json.loads(s)
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool, indent: bool) -> bytes:
+    return json.dumps(obj, default=to_builtin, sort_keys=sort_keys, ensure_ascii=False,
+                      indent=2 if indent else None,
+                      separators=None if indent else (',', ':')).encode('utf-8')
+
+
+def _msgpack_dumps(obj: Any) -> bytes:
+    return msgpack.packb(obj, default=to_builtin, use_bin_type=True)
+
+
+def encoders() -> Dict[str, Callable[[Any], bytes]]:
+    """Available encoders by name, configured as FastJSONProvider serves them"""
+    available = {'json': lambda obj: _stdlib_dumps(obj, False, False)}
+    if orjson is not None:
+        available['orjson'] = lambda obj: _orjson_dumps(obj, False, False)
+    if msgpack is not None:
+        available['msgpack'] = _msgpack_dumps
+    return available
+
+
+def wants_msgpack() -> bool:
+    if not request:
+        return False
+    accept = request.accept_mimetypes
+    best = accept.best_match(MSGPACK_MIMETYPES + ('application/json',))
+    return best in MSGPACK_MIMETYPES and accept[best] > accept['application/json']
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with MessagePack negotiation
+
+    Keys are emitted in insertion order rather than sorted, which is what the
+    handlers build anyway; set `sort_keys = True` to restore Flask's default.
+    Debug pretty-printing works as with the default provider.
+    """
+
+    sort_keys = False
+
+    def dump_bytes(self, obj: Any) -> bytes:
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        if orjson is not None:
+            return _orjson_dumps(obj, self.sort_keys, indent)
+        return _stdlib_dumps(obj, self.sort_keys, indent)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            kwargs.setdefault('default', to_builtin)
+            return json.dumps(obj, **kwargs)
+        return self.dump_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return _orjson_loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        if msgpack is None:
+            # Bytes straight into the response; no str round trip
+            return self._app.response_class(self.dump_bytes(obj), mimetype=self.mimetype)
+        if wants_msgpack():
+            response = self._app.response_class(_msgpack_dumps(obj), mimetype=MSGPACK_MIMETYPES[0])
+        else:
+            response = self._app.response_class(self.dump_bytes(obj), mimetype=self.mimetype)
+        response.vary.add('Accept')
+        return response
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Moduro AI Platform - Production Server
+
+Runs a Moduro Flask app under a pre-fork gunicorn server instead of the
+Werkzeug development server. The app is imported once in the master process
+(preload) and then forked into worker processes, each serving requests on a
+pool of threads. SIGTERM/SIGINT drain in-flight requests before exiting.
+
+    python serve.py                          # app:app on 0.0.0.0:5000
+    python serve.py simple_api:app --workers 8 --threads 4
+    MODURO_SUBSYSTEMS=seo MODURO_WORKERS=4 python serve.py --bind 0.0.0.0:5001
+
+Note that in-memory state (uploaded data, analysis results, caches) is kept
+per worker process.
+"""
+
+import argparse
+import importlib
+import logging
+import multiprocessing
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+def default_workers() -> int:
+    return int(os.environ.get('MODURO_WORKERS', min(4, multiprocessing.cpu_count())))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run a Moduro app under a pre-fork production server')
+    parser.add_argument('target', nargs='?', default=os.environ.get('MODURO_APP', 'app:app'),
+                        help='module:variable of the Flask app (default: app:app)')
+    parser.add_argument('--bind', default=os.environ.get('MODURO_BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int, default=default_workers())
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('MODURO_THREADS', 8)))
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('MODURO_TIMEOUT', 300)),
+                        help='seconds before a silent worker is killed and restarted')
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.environ.get('MODURO_GRACEFUL_TIMEOUT', 30)),
+                        help='seconds workers get to finish in-flight requests on shutdown')
+    parser.add_argument('--keepalive', type=int, default=5)
+    parser.add_argument('--max-requests', type=int, default=int(os.environ.get('MODURO_MAX_REQUESTS', 0)),
+                        help='recycle a worker after this many requests (0 disables)')
+    return parser.parse_args(argv)
+
+
+def load_app(target: str):
+    module_name, _, attr = target.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, attr or 'app')
+
+
+def stop_background_workers():
+    """Stop background LLM machinery so a worker exits promptly"""
+    engine_module = sys.modules.get('engine')
+    if engine_module is not None:
+        engine_module.engine.shutdown()
+
+
+def run(args):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ gunicorn is required for production serving: pip install gunicorn")
+        print("   (gunicorn runs on Linux/macOS; on Windows use WSL or a container)")
+        return 1
+
+    # Import once in the master so workers fork with the app already loaded
+    flask_app = load_app(args.target)
+
+    class ModuroServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', [args.bind])
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('preload_app', True)
+            self.cfg.set('timeout', args.timeout)
+            self.cfg.set('graceful_timeout', args.graceful_timeout)
+            self.cfg.set('keepalive', args.keepalive)
+            self.cfg.set('max_requests', args.max_requests)
+            self.cfg.set('max_requests_jitter', args.max_requests // 10)
+            self.cfg.set('worker_exit', lambda server, worker: stop_background_workers())
+
+        def load(self):
+            return flask_app
+
+    logger.info("Serving %s on %s with %s workers x %s threads",
+                args.target, args.bind, args.workers, args.threads)
+    ModuroServer().run()
+    return 0
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(run(parse_args(argv)))
+
+
+if __name__ == '__main__':
+    main()
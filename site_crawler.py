@@ -0,0 +1,488 @@
+"""
+Concurrent, polite site crawler for the SEO tool.
+
+A crawl starts from one or more seed URLs and follows links breadth-first
+through a URL frontier. Workers share one aiohttp session, and each host has
+its own policy:
+
+* at most `per_host_concurrency` requests in flight;
+* request starts spaced by the crawl delay, which is the larger of the
+  configured delay and the robots.txt Crawl-delay for our user agent;
+* robots.txt is fetched once per host and disallowed URLs are skipped.
+  Following RFC 9309, a 4xx robots.txt allows everything and a 5xx or
+  unreachable one disallows everything.
+
+The crawl stops at `max_pages` fetched pages or when the frontier is empty.
+Links deeper than `max_depth` are not followed. Every fetch is timed: `ttfb`
+runs until the response headers arrive and `load_time` until the body has been
+read.
+
+HTML bodies are decoded and parsed by html_extract as the chunks arrive, so a
+page is fully extracted (links, meta tags, headings, text...) by the time its
+last byte is read, and crawled pages never hold more than one chunk of raw
+bytes unless `keep_html` is set.
+
+With a crawl_cache.CrawlCache, fresh cached pages are served without a request,
+stale ones are revalidated with a conditional GET, and full 200 responses are
+stored. Cached pages report the status, headers and timing of their original
+download, and `PageResult.cache` says how each page was obtained.
+
+The session is supplied by the caller, so this module does not import aiohttp
+itself at import time.
+"""
+
+import asyncio
+import codecs
+import logging
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from html_extract import HTMLExtractor, PageExtract
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'ModuroSEOBot/1.0'
+READ_CHUNK_BYTES = 64 * 1024
+
+
+def normalize_url(url: str) -> str:
+    """Drop the fragment and default port, lowercase scheme and host"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+def robots_crawl_delay(lines: List[str], user_agent: str) -> float:
+    """Crawl-delay for `user_agent` from robots.txt lines
+
+    RobotFileParser only understands whole seconds, so fractional delays are
+    read here. A group naming our agent wins over the `*` group.
+    """
+    agent = user_agent.split('/')[0].lower()
+    delays: Dict[str, float] = {}
+    group: List[str] = []
+    in_rules = False
+    for line in lines:
+        field, _, value = line.split('#', 1)[0].partition(':')
+        field, value = field.strip().lower(), value.strip()
+        if field == 'user-agent':
+            if in_rules:
+                group, in_rules = [], False
+            group.append(value.lower())
+        elif field:
+            in_rules = True
+            if field == 'crawl-delay':
+                try:
+                    for name in group:
+                        delays[name] = float(value)
+                except ValueError:
+                    pass
+    for name, delay in delays.items():
+        if name != '*' and name in agent:
+            return delay
+    return delays.get('*', 0.0)
+
+
+def charset_of(content_type: str) -> Optional[str]:
+    """charset parameter of a Content-Type value"""
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            return value.strip().strip('"\'') or None
+    return None
+
+
+class _PageParser:
+    """Decodes body chunks and feeds them to an HTMLExtractor as they come"""
+
+    def __init__(self, page: 'PageResult', charset: Optional[str], keep_text: bool):
+        try:
+            self.decoder = codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.page = page
+        self.extractor = HTMLExtractor(page.final_url)
+        self.keep_text = keep_text
+        self.kept: List[str] = []
+
+    def feed(self, chunk: bytes):
+        text = self.decoder.decode(chunk)
+        self.extractor.feed(text)
+        if self.keep_text:
+            self.kept.append(text)
+
+    def close(self) -> str:
+        """Finish extraction into the page; return the decoded HTML if kept"""
+        text = self.decoder.decode(b'', final=True)
+        self.extractor.feed(text)
+        self.kept.append(text)
+        self.page.extract = self.extractor.close()
+        return ''.join(self.kept)
+
+
+class PageResult:
+    """One fetched page"""
+
+    __slots__ = ('url', 'final_url', 'depth', 'status', 'headers', 'content_type', 'size',
+                 'ttfb', 'load_time', 'links', 'html', 'extract', 'cache', 'error', 'truncated')
+
+    def __init__(self, url: str, depth: int):
+        self.url = url
+        self.final_url = url
+        self.depth = depth
+        self.status = None
+        self.headers: Dict[str, str] = {}
+        self.content_type = ''
+        self.size = 0
+        self.ttfb = None
+        self.load_time = None
+        self.links: List[str] = []
+        self.html: Optional[str] = None
+        self.extract: Optional[PageExtract] = None
+        # 'hit', 'revalidated' or 'miss' when fetched through a CrawlCache
+        self.cache: Optional[str] = None
+        self.error: Optional[str] = None
+        # The body was cut off at max_body_bytes
+        self.truncated = False
+
+    def to_dict(self) -> Dict:
+        return {
+            'url': self.url,
+            'final_url': self.final_url,
+            'depth': self.depth,
+            'status': self.status,
+            'content_type': self.content_type,
+            'size': self.size,
+            'ttfb': self.ttfb,
+            'load_time': self.load_time,
+            'links': len(self.links),
+            'cache': self.cache,
+            'error': self.error,
+            'truncated': self.truncated
+        }
+
+
+class HostPolicy:
+    """Concurrency cap, request spacing and robots rules for one host"""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay = delay
+        self.next_start = 0.0
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_ready: Optional[asyncio.Future] = None
+
+    async def wait_turn(self):
+        """Sleep until this host's next request slot"""
+        if self.delay <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self.next_start)
+        self.next_start = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class CrawlReport:
+    """Pages and counters of one crawl"""
+
+    def __init__(self):
+        self.pages: List[PageResult] = []
+        self.blocked_by_robots = 0
+        self.over_budget = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def summary(self) -> Dict:
+        fetched = [p for p in self.pages if p.error is None]
+        load_times = sorted(p.load_time for p in fetched)
+        return {
+            'pages': len(self.pages),
+            'errors': len(self.pages) - len(fetched),
+            'blocked_by_robots': self.blocked_by_robots,
+            'over_budget': self.over_budget,
+            'bytes': sum(p.size for p in fetched),
+            'status_codes': dict(Counter(p.status for p in fetched)),
+            'cache': dict(Counter(p.cache for p in fetched if p.cache)),
+            'elapsed': round(self.elapsed, 3),
+            'pages_per_second': round(len(self.pages) / self.elapsed, 1) if self.elapsed else 0.0,
+            'load_time_p50': _percentile(load_times, 0.5),
+            'load_time_p95': _percentile(load_times, 0.95)
+        }
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+class SiteCrawler:
+    """Breadth-first crawler with per-host politeness over a shared session"""
+
+    def __init__(self, session, max_pages: int = 500, max_depth: int = 3, concurrency: int = 64,
+                 per_host_concurrency: int = 8, crawl_delay: float = 0.0, respect_robots: bool = True,
+                 allowed_hosts: Optional[Iterable[str]] = None, user_agent: str = DEFAULT_USER_AGENT,
+                 timeout: float = 15.0, max_body_bytes: int = 5 * 1024 * 1024, keep_html: bool = False,
+                 link_extractor: Optional[Callable[[str, str], List[str]]] = None,
+                 on_page: Optional[Callable[[PageResult], None]] = None, cache=None):
+        self.session = session
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.crawl_delay = crawl_delay
+        self.respect_robots = respect_robots
+        self.allowed_hosts = {h.lower() for h in allowed_hosts} if allowed_hosts else None
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.keep_html = keep_html
+        self.link_extractor = link_extractor
+        self.on_page = on_page
+        self.cache = cache
+        self._hosts: Dict[str, HostPolicy] = {}
+
+    def _policy(self, netloc: str) -> HostPolicy:
+        policy = self._hosts.get(netloc)
+        if policy is None:
+            policy = self._hosts[netloc] = HostPolicy(self.per_host_concurrency, self.crawl_delay)
+        return policy
+
+    async def _robots(self, scheme: str, netloc: str, policy: HostPolicy) -> RobotFileParser:
+        """robots.txt rules for a host, fetched once even with many workers waiting
+
+        If the worker fetching them is cancelled, a waiting worker fetches
+        them instead.
+        """
+        while True:
+            ready = policy.robots_ready
+            if ready is None:
+                return await self._fetch_robots(scheme, netloc, policy)
+            try:
+                # Shielded so a cancelled waiter does not cancel the others' fetch
+                return await asyncio.shield(ready)
+            except asyncio.CancelledError:
+                if not ready.cancelled():
+                    raise
+
+    async def _fetch_robots(self, scheme: str, netloc: str, policy: HostPolicy) -> RobotFileParser:
+        ready = policy.robots_ready = asyncio.get_running_loop().create_future()
+        robots = RobotFileParser(f"{scheme}://{netloc}/robots.txt")
+        try:
+            try:
+                async with self.session.get(robots.url, headers={'User-Agent': self.user_agent},
+                                            timeout=self._client_timeout()) as response:
+                    if response.status >= 500:
+                        robots.disallow_all = True
+                    elif response.status >= 400:
+                        robots.allow_all = True
+                    else:
+                        lines = (await response.text(errors='replace')).splitlines()
+                        robots.parse(lines)
+                        policy.delay = max(policy.delay, robots_crawl_delay(lines, self.user_agent))
+            except Exception as e:
+                logger.warning("robots.txt unreachable for %s, skipping host: %s", netloc, e)
+                robots.disallow_all = True
+            policy.robots = robots
+            ready.set_result(robots)
+            return robots
+        finally:
+            if not ready.done():
+                # Cancelled mid-fetch (CancelledError is not an Exception):
+                # wake the waiters so one of them fetches again
+                policy.robots_ready = None
+                ready.cancel()
+
+    def _client_timeout(self):
+        import aiohttp
+        return aiohttp.ClientTimeout(total=self.timeout)
+
+    async def allowed(self, url: str) -> bool:
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        policy = self._policy(parts.netloc)
+        robots = await self._robots(parts.scheme, parts.netloc, policy)
+        return robots.can_fetch(self.user_agent, url)
+
+    async def fetch(self, url: str, depth: int = 0) -> PageResult:
+        """Fetch one page under its host's concurrency cap and crawl delay
+
+        With a cache, a fresh cached copy is served without a request and a
+        stale one is revalidated with a conditional GET.
+        """
+        page = PageResult(url, depth)
+        cached = self.cache.lookup(url) if self.cache is not None else None
+        if cached is not None and cached.fresh:
+            if await self._from_cache(page, cached, 'hit'):
+                return page
+            cached = None
+        policy = self._policy(urlsplit(url).netloc)
+        headers = {'User-Agent': self.user_agent}
+        if cached is not None:
+            headers.update(cached.validators())
+        not_modified = None
+        async with policy.semaphore:
+            await policy.wait_turn()
+            start = time.perf_counter()
+            try:
+                async with self.session.get(url, headers=headers, timeout=self._client_timeout()) as response:
+                    page.ttfb = time.perf_counter() - start
+                    page.status = response.status
+                    page.final_url = str(response.url)
+                    page.headers = dict(response.headers)
+                    page.content_type = response.headers.get('Content-Type', '')
+                    if response.status == 304 and cached is not None:
+                        not_modified = page.headers
+                    else:
+                        body = await self._read_body(response, page)
+                    page.load_time = time.perf_counter() - start
+            except Exception as e:
+                page.load_time = time.perf_counter() - start
+                page.error = f"{type(e).__name__}: {e}"
+                return page
+
+        if self.cache is None:
+            return page
+        loop = asyncio.get_running_loop()
+        if not_modified is not None:
+            entry = await loop.run_in_executor(None, self.cache.refresh, cached, not_modified)
+            if await self._from_cache(page, entry, 'revalidated'):
+                return page
+            # The cached body vanished between lookup and 304; fetch it again
+            return await self.fetch(url, depth)
+        self.cache.record('changed' if cached is not None else 'misses')
+        page.cache = 'miss'
+        await loop.run_in_executor(None, self.cache.store, url, page.status, page.final_url,
+                                   page.headers, body, page.ttfb, page.load_time, not page.truncated)
+        return page
+
+    async def _read_body(self, response, page: PageResult) -> bytes:
+        """Read the body, extracting HTML chunk by chunk while it downloads"""
+        parser = None
+        if 'html' in page.content_type or not page.content_type:
+            parser = _PageParser(page, response.charset, self.keep_html or self.link_extractor is not None)
+        chunks: List[bytes] = []
+        while page.size < self.max_body_bytes:
+            chunk = await response.content.read(min(READ_CHUNK_BYTES, self.max_body_bytes - page.size))
+            if not chunk:
+                break
+            page.size += len(chunk)
+            if parser is not None:
+                parser.feed(chunk)
+            # Raw bytes are only held on to when they will be cached
+            if self.cache is not None:
+                chunks.append(chunk)
+        page.truncated = page.size >= self.max_body_bytes and not response.content.at_eof()
+        if parser is not None:
+            self._finish_html(page, parser)
+        return b''.join(chunks)
+
+    async def _from_cache(self, page: PageResult, entry, outcome: str) -> bool:
+        """Fill a page from a cache entry; False if its body is gone
+
+        Status, headers and timing are those of the original full download,
+        also after a 304 revalidation.
+        """
+        body = await asyncio.get_running_loop().run_in_executor(None, self.cache.body, entry)
+        if body is None:
+            return False
+        page.status = entry.status
+        page.final_url = entry.final_url
+        page.headers = dict(entry.headers)
+        page.content_type = next((v for k, v in entry.headers.items() if k.lower() == 'content-type'), '')
+        page.ttfb = entry.ttfb
+        page.load_time = entry.load_time
+        page.size = len(body)
+        if 'html' in page.content_type or not page.content_type:
+            parser = _PageParser(page, charset_of(page.content_type),
+                                 self.keep_html or self.link_extractor is not None)
+            for offset in range(0, len(body), READ_CHUNK_BYTES):
+                parser.feed(body[offset:offset + READ_CHUNK_BYTES])
+            self._finish_html(page, parser)
+        page.cache = outcome
+        self.cache.record('hits' if outcome == 'hit' else 'revalidated')
+        return True
+
+    def _finish_html(self, page: PageResult, parser: '_PageParser'):
+        html = parser.close()
+        if self.keep_html:
+            page.html = html
+        if self.link_extractor is not None:
+            page.links = self.link_extractor(html, page.final_url)
+        else:
+            page.links = [link for link in page.extract.link_urls()
+                          if link.startswith(('http://', 'https://'))]
+
+    def _in_scope(self, url: str) -> bool:
+        if not url.startswith(('http://', 'https://')):
+            return False
+        return self.allowed_hosts is None or (urlsplit(url).hostname or '') in self.allowed_hosts
+
+    async def crawl(self, seeds: Iterable[str]) -> CrawlReport:
+        """Crawl from `seeds` until the frontier empties or the page budget is spent"""
+        seeds = [normalize_url(url) for url in seeds]
+        if self.allowed_hosts is None:
+            self.allowed_hosts = {urlsplit(url).hostname or '' for url in seeds}
+        report = CrawlReport()
+        frontier: 'asyncio.Queue[Tuple[str, int]]' = asyncio.Queue()
+        seen: Set[str] = set()
+        claimed = 0
+
+        def enqueue(url: str, depth: int):
+            if url in seen or not self._in_scope(url):
+                return
+            seen.add(url)
+            frontier.put_nowait((url, depth))
+
+        async def worker():
+            nonlocal claimed
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    if claimed >= self.max_pages:
+                        report.over_budget += 1
+                        continue
+                    if not await self.allowed(url):
+                        report.blocked_by_robots += 1
+                        continue
+                    if claimed >= self.max_pages:
+                        report.over_budget += 1
+                        continue
+                    # Claimed before the fetch, so concurrent workers cannot overshoot
+                    claimed += 1
+                    page = await self.fetch(url, depth)
+                    report.pages.append(page)
+                    if self.on_page is not None:
+                        self.on_page(page)
+                    seen.add(normalize_url(page.final_url))
+                    if depth < self.max_depth:
+                        for link in page.links:
+                            enqueue(normalize_url(link), depth + 1)
+                except Exception as e:
+                    logger.error("Crawl worker failed on %s: %s", url, e)
+                finally:
+                    frontier.task_done()
+
+        for url in seeds:
+            enqueue(url, 0)
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            await frontier.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        report.elapsed = time.perf_counter() - report.started
+        logger.info("Crawled %s pages in %.2fs (%s blocked by robots.txt, %s over budget)",
+                    len(report.pages), report.elapsed, report.blocked_by_robots, report.over_budget)
+        return report
@@ -0,0 +1,174 @@
+"""
+Precompressed, cache-friendly static file serving.
+
+The frontend build is read once at startup. Each file is kept in memory with a
+strong ETag and, where compression pays off, gzip and brotli variants. A request
+is then a dictionary lookup: pick the best encoding the client accepts, answer
+If-None-Match with 304, and mark content-hashed filenames (main.3f2a1b9c.js)
+as immutable so browsers never ask for them again.
+
+Brotli variants need the optional `brotli` package; without it only gzip is
+produced.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import Response, abort, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Content hash embedded in the filename by the build (CRA/webpack/Vite style)
+HASHED_NAME = re.compile(r'[.-][0-9a-fA-F]{8,}\.')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/xml', 'image/svg+xml', 'application/manifest+json')
+
+# Preference order when the client accepts several encodings equally
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+
+class Asset:
+    """One file of the build with its precomputed representations"""
+
+    __slots__ = ('path', 'mimetype', 'cache_control', 'variants')
+
+    def __init__(self, path: str, body: bytes, mimetype: str, cache_control: str):
+        self.path = path
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        # encoding -> (body, strong ETag); each representation has its own ETag
+        self.variants: Dict[str, Tuple[bytes, str]] = {'identity': (body, f'"{digest}"')}
+
+    def add_variant(self, encoding: str, body: bytes):
+        identity_etag = self.variants['identity'][1]
+        self.variants[encoding] = (body, f'{identity_etag[:-1]}-{encoding}"')
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(asset: Asset, header: str) -> str:
+    if not header or len(asset.variants) == 1:
+        return 'identity'
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = 'identity', 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in asset.variants:
+            continue
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == '*':
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    return any(tag.strip().replace('W/', '', 1) == etag for tag in header.split(','))
+
+
+class AssetStore:
+    """In-memory, precompressed copy of a static directory"""
+
+    def __init__(self, root: str, files: Optional[Iterable[str]] = None,
+                 min_size: int = 512, gzip_level: int = 9, brotli_quality: int = 11):
+        self.root = root
+        self.files = list(files) if files is not None else None
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.assets: Dict[str, Asset] = {}
+        self.load()
+
+    def _paths(self) -> Iterable[str]:
+        if self.files is not None:
+            yield from self.files
+            return
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                yield os.path.relpath(full, self.root).replace(os.sep, '/')
+
+    def load(self):
+        """(Re)read the directory and rebuild every variant"""
+        assets = {}
+        raw_bytes = compressed_bytes = 0
+        if os.path.isdir(self.root):
+            for rel_path in self._paths():
+                full = os.path.join(self.root, rel_path)
+                if not os.path.isfile(full) or rel_path.endswith(('.gz', '.br')):
+                    continue
+                with open(full, 'rb') as fh:
+                    body = fh.read()
+                asset = self._build(rel_path, body)
+                assets[rel_path] = asset
+                raw_bytes += len(body)
+                compressed_bytes += min(len(b) for b, _ in asset.variants.values())
+        self.assets = assets
+        logger.info("Loaded %d static assets from %s (%d bytes, %d bytes best-compressed)",
+                    len(assets), self.root, raw_bytes, compressed_bytes)
+
+    def _build(self, rel_path: str, body: bytes) -> Asset:
+        mimetype = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+        name = rel_path.rsplit('/', 1)[-1]
+        cache_control = IMMUTABLE_CACHE if HASHED_NAME.search(name) else REVALIDATE_CACHE
+        asset = Asset(rel_path, body, mimetype, cache_control)
+        if len(body) >= self.min_size and mimetype.startswith(COMPRESSIBLE_TYPES):
+            gz = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+            if len(gz) < len(body):
+                asset.add_variant('gzip', gz)
+            if brotli is not None:
+                br = brotli.compress(body, quality=self.brotli_quality)
+                if len(br) < len(body):
+                    asset.add_variant('br', br)
+        return asset
+
+    def serve(self, path: str) -> Response:
+        """Response for `path`, a 304 if the client's copy is current, or a 404"""
+        asset = self.assets.get(path)
+        if asset is None:
+            abort(404)
+        encoding = choose_encoding(asset, request.headers.get('Accept-Encoding', ''))
+        body, etag = asset.variants[encoding]
+        headers = {'ETag': etag, 'Cache-Control': asset.cache_control}
+        if len(asset.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and etag_matches(if_none_match, etag):
+            headers.pop('Content-Encoding', None)
+            return Response(status=304, headers=headers)
+
+        return Response(body, mimetype=asset.mimetype, headers=headers)
@@ -0,0 +1,243 @@
+"""
+Lightweight request tracing for the Moduro Flask apps.
+
+Every request gets a request ID, taken from an incoming X-Request-ID header or
+generated, and echoed back in the response. With tracing enabled, each request
+is a trace: the request itself is the root span and handlers open child
+spans around their stages (parse, analysis, LLM wait, serialization). When a
+trace finishes, its per-stage timings are logged as one structured record,
+and they can optionally be exported as OTLP/JSON lines. That is the format
+read by the OpenTelemetry Collector's `otlpjsonfile` receiver, so traces
+can be loaded into Jaeger, Tempo and other viewers.
+
+When tracing is disabled, tracer.span() returns a shared no-op object, so
+instrumented code pays for one attribute check per span.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from log_pipeline import LogPipeline
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar('moduro_current_span', default=None)
+_request_id = contextvars.ContextVar('moduro_request_id', default=None)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_ERROR = 2
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp log records with the request ID of the thread that logged them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class _NoopSpan:
+    """Returned by a disabled tracer; every operation is a no-op"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """A timed stage of a request; use as a context manager"""
+
+    __slots__ = ('tracer', 'name', 'trace_id', 'span_id', 'parent_id', 'kind',
+                 'attributes', 'start_ns', 'end_ns', 'error', 'finished', '_token')
+
+    def __init__(self, tracer: 'Tracer', name: str, parent: Optional['Span'], attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.kind = SPAN_KIND_INTERNAL if parent else SPAN_KIND_SERVER
+        self.attributes = attributes
+        # Spans of one trace share the root's list
+        self.finished: List['Span'] = parent.finished if parent else []
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Streamed responses may tear down from another context
+            if _current_span.get() is self:
+                _current_span.set(None)
+        self.finished.append(self)
+        if self.parent_id is None:
+            self.tracer.finish(self)
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class OTLPJSONFormatter(logging.Formatter):
+    """Formats a finished trace as one OTLP/JSON ExportTraceServiceRequest line"""
+
+    def __init__(self, service_name: str):
+        super().__init__()
+        self.service_name = service_name
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [_otlp_attribute('service.name', self.service_name)]},
+            'scopeSpans': [{
+                'scope': {'name': 'moduro.tracing'},
+                'spans': [_otlp_span(span) for span in record.spans]
+            }]
+        }]}, separators=(',', ':'))
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def _otlp_span(span: Span) -> Dict:
+    otlp = {
+        'traceId': span.trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': span.kind,
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.end_ns),
+        'attributes': [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+        'status': {'code': STATUS_CODE_ERROR, 'message': span.error} if span.error else {}
+    }
+    if span.parent_id:
+        otlp['parentSpanId'] = span.parent_id
+    return otlp
+
+
+class Tracer:
+    """Creates spans and hands finished traces to the log and the exporter"""
+
+    def __init__(self, enabled: bool = False, export_path: Optional[str] = None,
+                 service_name: str = 'moduro'):
+        self.enabled = enabled
+        self.traces = 0
+        self._exporter = None
+        if enabled and export_path:
+            handler = logging.FileHandler(export_path, encoding='utf-8')
+            handler.setFormatter(OTLPJSONFormatter(service_name))
+            # Same queued batch writer as the logs, so export never blocks a request
+            self._exporter = LogPipeline([handler])
+
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, _current_span.get(), attributes)
+
+    def finish(self, root: Span):
+        self.traces += 1
+        spans = root.finished
+        logger.info("%s finished in %.1f ms", root.name, root.duration_ms, extra={
+            'trace_id': root.trace_id,
+            'spans': [{'name': s.name, 'ms': round(s.duration_ms, 3)} for s in spans if s is not root]
+        })
+        if self._exporter is not None:
+            self._exporter.handler.handle(logging.makeLogRecord(
+                {'name': 'moduro.trace', 'levelno': logging.INFO, 'spans': spans}))
+
+    def get_metrics(self) -> Dict:
+        metrics = {'enabled': self.enabled, 'traces': self.traces}
+        if self._exporter is not None:
+            metrics['export'] = self._exporter.get_metrics()
+        return metrics
+
+
+def tracer_from_env() -> Tracer:
+    """Tracer configured by MODURO_TRACING=1 and MODURO_TRACE_EXPORT=<path>"""
+    enabled = os.environ.get('MODURO_TRACING', '').lower() in ('1', 'true', 'yes')
+    return Tracer(enabled=enabled, export_path=os.environ.get('MODURO_TRACE_EXPORT') or None)
+
+
+def init_app(app, tracer: Tracer):
+    """Assign request IDs and open a root span around every request"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_trace():
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_id = request_id
+        g.request_id_token = _request_id.set(request_id)
+        if tracer.enabled:
+            rule = request.url_rule.rule if request.url_rule else request.path
+            span = tracer.span(f"{request.method} {rule}", **{
+                'http.method': request.method,
+                'http.target': request.path,
+                'request.id': request_id
+            })
+            g.trace_span = span.__enter__()
+
+    @app.after_request
+    def _tag_response(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        span = g.get('trace_span')
+        if span is not None:
+            span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.error = f"HTTP {response.status_code}"
+        return response
+
+    @app.teardown_request
+    def _end_trace(exc):
+        span = g.pop('trace_span', None)
+        if span is not None:
+            span.__exit__(type(exc) if exc else None, exc, None)
+        token = g.pop('request_id_token', None)
+        if token is not None:
+            try:
+                _request_id.reset(token)
+            except ValueError:
+                # Streamed responses may tear down from another context
+                pass